@@ -0,0 +1,57 @@
+import math
+
+from transform import Matrix16
+
+
+class AnimationTable:
+    """
+    Ciclo de animacion horneado: la matriz local de una parte para cada
+    angulo multiplo de 'step' entre -limit y +limit, ya en float32 y lista
+    para glMultMatrixf. Los ciclos de Brazo, Pata y Ala solo pasan por
+    esos angulos (suman y restan pasos exactos), asi que cada fotograma es
+    una busqueda por indice de fase en lugar de radianes, senos y cosenos.
+    Las matrices salen de la misma funcion que las calcula en vivo, por lo
+    que el resultado es identico bit a bit.
+    """
+    def __init__(self, build, step, limit, *args):
+        self.step = step
+        self.offset = int(round(limit / step))
+        self.count = 2 * self.offset + 1
+        # Despues de los multiplos del paso van 0 (entero) y -0.0: las
+        # partes vuelven al reposo con 'angulo = 0', y al negarlo dan ceros
+        # con otro signo que 0.0 en la matriz.
+        self.angles = [i * step for i in range(-self.offset, self.offset + 1)] + [0, -0.0]
+        self.matrices = [Matrix16(*build(angle, *args)) for angle in self.angles]
+        self.phases = {angle: i for i, angle in enumerate(self.angles[:self.count])}
+
+    def index(self, angle):
+        """
+        Indice de fase de 'angle', o None si el angulo no esta en la tabla
+        (fuera de rango o no multiplo del paso).
+        """
+        if angle == 0:
+            if type(angle) is int:
+                return self.count
+            if math.copysign(1.0, angle) < 0:
+                return self.count + 1
+        return self.phases.get(angle)
+
+
+# Tablas compartidas por todas las instancias (100 gallinas usan 8 tablas)
+_tables = {}
+
+
+def bake(build, step, limit, *args):
+    """
+    Devuelve la tabla de build(angulo, *args), horneandola la primera vez
+    que se pide. 'args' (desplazamiento, inversion) forma parte de la clave.
+    """
+    key = (build, step, limit, *args)
+    table = _tables.get(key)
+    if table is None:
+        table = _tables[key] = AnimationTable(build, step, limit, *args)
+    return table
+
+
+def clear():
+    _tables.clear()
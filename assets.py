@@ -0,0 +1,144 @@
+import os
+
+from objloader import OBJ
+
+
+class MeshHandle:
+    """
+    Referencia ligera a una malla compartida. Cada entidad guarda su propio
+    handle, pero todos los handles de la misma ruta apuntan al mismo OBJ
+    (y por lo tanto a la misma display list / VBO y texturas).
+
+    Si la malla tiene niveles de detalle, 'level' elige cual se dibuja;
+    cada entidad tiene su propio nivel aunque compartan la malla.
+    """
+    __slots__ = ('manager', 'key', 'mesh', 'levels', 'level')
+
+    def __init__(self, manager, key, mesh, levels=None):
+        self.manager = manager
+        self.key = key
+        self.mesh = mesh
+        self.levels = levels or [mesh]
+        self.level = 0
+
+    def set_level(self, level):
+        self.level = min(max(level, 0), len(self.levels) - 1)
+
+    def current(self):
+        return self.levels[self.level]
+
+    def render(self):
+        self.levels[self.level].render()
+
+    def free(self):
+        """
+        Suelta la referencia; la malla se libera cuando ya nadie la usa.
+        """
+        if self.mesh is not None:
+            self.manager.release(self.key)
+            self.mesh = None
+            self.levels = []
+
+    def __getattr__(self, name):
+        # Acceso de solo lectura al OBJ compartido del nivel 0: stats,
+        # bounds_center/bounds_radius, faceCount(), vertices, face_v, etc.
+        # ('level' y set_level() son del handle)
+        mesh = object.__getattribute__(self, 'mesh')
+        if mesh is None:
+            raise AttributeError(name)
+        return getattr(mesh, name)
+
+
+class AssetManager:
+    """
+    Carga cada malla una sola vez por (ruta, swapyz) y la comparte entre
+    todas las entidades que la piden. Lleva un contador de referencias para
+    liberar los recursos de GPU cuando se suelta el ultimo handle.
+    """
+    def __init__(self):
+        # clave -> [OBJ, refcount, niveles, celdas de LOD ya intentadas o None]
+        self.meshes = {}
+        self.loads = 0
+        self.hits = 0
+
+    def load_mesh(self, filepath, swapyz=False, lod_cells=None):
+        """
+        'lod_cells' (p. ej. lod.DEFAULT_LOD_CELLS) genera niveles de detalle
+        simplificados la primera vez que se piden para esta malla.
+        """
+        key = (os.path.abspath(filepath), bool(swapyz))
+        entry = self.meshes.get(key)
+        if entry is None:
+            mesh = OBJ(filepath, swapyz=swapyz)
+            entry = self.meshes[key] = [mesh, 0, [mesh], None]
+            self.loads += 1
+        else:
+            self.hits += 1
+        if lod_cells and entry[3] is None:
+            # lod usa NumPy; solo se importa si se piden niveles. Se intenta
+            # una sola vez: si no sale ningun nivel mas simple, la malla se
+            # queda con uno y no se vuelve a simplificar.
+            from lod import build_lods
+            entry[2][:] = build_lods(entry[0], lod_cells)
+            entry[3] = tuple(lod_cells)
+            self.drop_geometry(entry[2])
+        elif entry[1] == 0:
+            self.drop_geometry(entry[2])
+        entry[1] += 1
+        return MeshHandle(self, key, entry[0], entry[2])
+
+    def add_mesh(self, filepath, swapyz, levels, lod_cells=None):
+        """
+        Registra una malla ya cargada (p. ej. por AsyncLoader) con sus
+        niveles de detalle, generados con 'lod_cells', sin crear handles;
+        los load_mesh siguientes la reutilizan. Si la ruta ya estaba
+        cargada se liberan los niveles nuevos y se conserva la existente.
+        """
+        key = (os.path.abspath(filepath), bool(swapyz))
+        if key in self.meshes:
+            for mesh in reversed(levels):
+                mesh.free()
+            return self.meshes[key][0]
+        lod_tried = tuple(lod_cells) if lod_cells else None
+        self.meshes[key] = [levels[0], 0, list(levels), lod_tried]
+        self.loads += 1
+        self.drop_geometry(levels)
+        return levels[0]
+
+    def drop_geometry(self, levels):
+        """
+        Con OBJ.keep_geometry = False suelta la copia en CPU de las mallas
+        que ya estan en la GPU. Una malla sin geometria ya no puede generar
+        niveles de detalle despues.
+        """
+        if not OBJ.keep_geometry:
+            for mesh in levels:
+                mesh.dropGeometry()
+
+    def release(self, key):
+        entry = self.meshes.get(key)
+        if entry is None:
+            return
+        entry[1] -= 1
+        if entry[1] <= 0:
+            # Los niveles simplificados comparten las texturas del original
+            for mesh in reversed(entry[2]):
+                mesh.free()
+            del self.meshes[key]
+
+    def stats(self):
+        return {
+            'meshes': len(self.meshes),
+            'handles': sum(entry[1] for entry in self.meshes.values()),
+            'lod_levels': sum(len(entry[2]) - 1 for entry in self.meshes.values()),
+            'loads': self.loads,
+            'hits': self.hits,
+        }
+
+
+# Administrador por defecto para todo el proceso
+manager = AssetManager()
+
+
+def load_mesh(filepath, swapyz=False, lod_cells=None):
+    return manager.load_mesh(filepath, swapyz, lod_cells)
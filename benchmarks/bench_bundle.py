@@ -0,0 +1,78 @@
+"""
+Compara el tiempo de carga (sin OpenGL) de cada modelo parseando el .obj,
+desde su cache .obj.cache y desde un bundle de compile_assets.py, y
+verifica que el bundle entregue la misma geometria.
+
+Uso (desde la raiz del repositorio):
+    python benchmarks/bench_bundle.py [modelo.obj ...] [--repeat N]
+"""
+import os
+import sys
+import glob
+import time
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from objloader import OBJ
+from bundle import Bundle
+from compile_assets import compile_bundle
+
+
+def load(filename, use_cache=False, bundle=None):
+    obj = OBJ.__new__(OBJ)
+    obj.use_cache = use_cache
+    obj.bundle = bundle
+    obj.__init__(filename, swapyz=True, defer_gl=True)
+    return obj
+
+
+def same_geometry(a, b):
+    return all(np.array_equal(np.asarray(getattr(a, name)), np.asarray(getattr(b, name)))
+               for name in ('vertices', 'normals', 'texcoords', 'face_v', 'face_vn', 'face_vt'))
+
+
+def best_of(fn, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('models', nargs='*')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+    models = args.models or sorted(glob.glob('obj/**/*.obj', recursive=True))
+
+    # El bundle va junto al repositorio para que las rutas relativas coincidan
+    fd, path = tempfile.mkstemp(suffix='.bundle', dir='.')
+    os.close(fd)
+    try:
+        compile_bundle(path, lod_cells=None, mipmaps=False, verbose=False)
+        bundle = Bundle(path)
+        print(f"{'modelo':<22}{'caras':>8}{'parse ms':>10}{'cache ms':>10}{'bundle ms':>11}")
+        for filename in models:
+            parsed = load(filename)
+            loaded = load(filename, bundle=bundle)
+            if loaded.bundle_key is None or not same_geometry(parsed, loaded):
+                sys.exit(f"{filename}: el bundle no coincide con el .obj")
+            load(filename, use_cache=True)
+            t_parse = best_of(lambda: load(filename), args.repeat)
+            t_cache = best_of(lambda: load(filename, use_cache=True), args.repeat)
+            t_bundle = best_of(lambda: load(filename, bundle=bundle), args.repeat)
+            print(f"{os.path.relpath(filename, 'obj'):<22}{parsed.faceCount():>8}"
+                  f"{t_parse * 1e3:>10.2f}{t_cache * 1e3:>10.2f}{t_bundle * 1e3:>11.2f}")
+        bundle.close()
+    finally:
+        os.remove(path)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,151 @@
+"""
+Compara dibujar un terreno grande como una sola malla contra dividirlo en
+trozos con chunks.ChunkedWorld mientras la camara lo recorre: tiempo de
+division, trozos en la GPU, subidas por fotograma y FPS.
+
+El terreno es una rejilla generada (la granja real puede no estar en
+obj/farm); cubre X_MIN..X_MAX / Z_MIN..Z_MAX de main.py.
+
+Necesita un contexto OpenGL; sin pantalla se puede usar
+SDL_VIDEODRIVER=offscreen (y PYOPENGL_PLATFORM=egl).
+
+Uso (desde la raiz del repositorio):
+    python benchmarks/bench_chunks.py [--grid 300] [--tile 100] [--view 350] [--frames 120]
+"""
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pygame
+from OpenGL.GL import *
+from OpenGL.GLU import *
+
+from objloader import OBJ
+from chunks import ChunkedWorld
+from transform import Matrix16, yaw_scale_matrix
+from frustum import Frustum
+from bench_flock import setup
+
+# Mismos limites y escala de la granja que main.py
+BOUNDS = (-500, 500, -500, 500)
+SCALE = 7.0
+
+
+def make_terrain(grid):
+    """
+    Rejilla de grid x grid cuadros con relieve, en coordenadas del modelo
+    (se dibuja escalada por SCALE) y dos materiales en franjas.
+    """
+    half = (BOUNDS[1] - BOUNDS[0]) / SCALE / 2
+    xs = np.linspace(-half, half, grid + 1)
+    x, z = np.meshgrid(xs, xs)
+    y = 2.0 * np.sin(x * 0.2) * np.cos(z * 0.15)
+    vertices = np.stack([x, y, z], axis=-1).reshape(-1, 3).astype(np.float32)
+    i, j = np.meshgrid(np.arange(grid), np.arange(grid))
+    a = (j * (grid + 1) + i + 1).reshape(-1)
+    face_v = np.stack([a, a + grid + 1, a + grid + 2, a + 1], axis=1).reshape(-1)
+    faces = grid * grid
+    mtl = {'a': {'Kd': (0.3, 0.7, 0.3)}, 'b': {'Kd': (0.7, 0.6, 0.3)}}
+    data = {
+        'vertices': vertices.reshape(-1),
+        'normals': np.zeros(0, dtype=np.float32),
+        'texcoords': np.zeros(0, dtype=np.float32),
+        'face_sizes': np.full(faces, 4, dtype=np.uint32),
+        'face_v': face_v.astype(np.int32),
+        'face_vn': np.zeros(len(face_v), dtype=np.int32),
+        'face_vt': np.zeros(len(face_v), dtype=np.int32),
+        'face_mtl': ((i // 16 + j // 16) % 2).reshape(-1).astype(np.int32),
+        'material_names': ['a', 'b'],
+    }
+    return data, mtl
+
+
+def path(frames):
+    """
+    Recorrido en diagonal de una esquina del mundo a la otra.
+    """
+    x_min, x_max, z_min, z_max = BOUNDS
+    for k in range(frames):
+        t = k / max(frames - 1, 1)
+        yield x_min + 50 + t * (x_max - x_min - 100), z_min + 50 + t * (z_max - z_min - 100)
+
+
+def run(draw, frames):
+    """
+    Dibuja el recorrido; devuelve (fps, tiempos de update por fotograma).
+    """
+    updates = []
+    start = time.perf_counter()
+    for x, z in path(frames):
+        glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
+        glLoadIdentity()
+        gluLookAt(x - 40.0, 60.0, z - 40.0, x, 0.0, z, 0.0, 1.0, 0.0)
+        updates.append(draw(x, z))
+        glFinish()
+        pygame.display.flip()
+    return frames / (time.perf_counter() - start), updates
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--grid', type=int, default=300)
+    parser.add_argument('--tile', type=float, default=100.0)
+    parser.add_argument('--view', type=float, default=350.0)
+    parser.add_argument('--frames', type=int, default=120)
+    parser.add_argument('--backend', default='vbo', choices=['vbo', 'displaylist'])
+    args = parser.parse_args()
+
+    setup(800, 600)
+    OBJ.backend = args.backend
+    matrix = Matrix16(*yaw_scale_matrix(0.0, 0.0, 0.0, SCALE, 0.0))
+    data, mtl = make_terrain(args.grid)
+
+    start = time.perf_counter()
+    whole = OBJ.fromGeometry(data, mtl)
+    whole_ms = (time.perf_counter() - start) * 1e3
+
+    def draw_whole(x, z):
+        glPushMatrix()
+        glMultMatrixf(matrix)
+        whole.render()
+        glPopMatrix()
+        return 0.0
+
+    start = time.perf_counter()
+    world = ChunkedWorld(OBJ.fromGeometry(data, mtl, defer_gl=True), matrix, args.tile,
+                         BOUNDS, args.view)
+    split_ms = (time.perf_counter() - start) * 1e3
+    loaded = []
+
+    def draw_chunks(x, z):
+        start = time.perf_counter()
+        world.update(x, z)
+        elapsed = time.perf_counter() - start
+        world.draw(x, z, Frustum.from_gl())
+        loaded.append(world.stats['loaded'])
+        return elapsed
+
+    print(f"caras: {whole.faceCount()}  trozos: {world.stats['tiles']}  "
+          f"tam. trozo: {args.tile:g}  radio de vista: {args.view:g}")
+    print(f"malla completa: generate {whole_ms:.1f} ms")
+    print(f"trozos:         division {split_ms:.1f} ms (sin subir a la GPU)")
+
+    fps_whole, _ = run(draw_whole, args.frames)
+    fps_chunks, updates = run(draw_chunks, args.frames)
+    updates_ms = np.array(updates) * 1e3
+    print(f"\n{'modo':<16}{'fps':>8}{'en GPU':>9}{'update p50':>12}{'max':>8}")
+    print(f"{'completa':<16}{fps_whole:>8.1f}{'todo':>9}{'-':>12}{'-':>8}")
+    print(f"{'trozos':<16}{fps_chunks:>8.1f}{max(loaded):>9}"
+          f"{np.percentile(updates_ms, 50):>10.2f}ms{updates_ms.max():>6.2f}ms")
+    print(f"subidas: {world.stats['uploads']}  soltados: {world.stats['unloads']}")
+    world.free()
+    whole.free()
+    pygame.quit()
+
+
+if __name__ == '__main__':
+    main()
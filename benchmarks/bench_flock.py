@@ -0,0 +1,105 @@
+"""
+Compara los FPS al dibujar N gallinas con Gallina.draw (una por una),
+con FlockRenderer en modo por lotes y con FlockRenderer instanciado.
+
+Necesita un contexto OpenGL; sin pantalla se puede usar
+SDL_VIDEODRIVER=offscreen (y PYOPENGL_PLATFORM=egl).
+
+Uso (desde la raiz del repositorio):
+    python benchmarks/bench_flock.py [--counts 100 1000 5000] [--frames 30]
+"""
+import os
+import sys
+import math
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pygame
+from pygame.locals import *
+from OpenGL.GL import *
+from OpenGL.GLU import *
+
+from objloader import OBJ
+from gallina import Gallina
+from flockrender import FlockRenderer, instancing_supported
+
+
+def setup(width, height):
+    pygame.init()
+    pygame.display.set_mode((width, height), DOUBLEBUF | OPENGL)
+    glMatrixMode(GL_PROJECTION)
+    glLoadIdentity()
+    gluPerspective(60.0, width / height, 1.0, 2000.0)
+    glMatrixMode(GL_MODELVIEW)
+    glEnable(GL_DEPTH_TEST)
+    glEnable(GL_LIGHTING)
+    glEnable(GL_LIGHT0)
+    glLightfv(GL_LIGHT0, GL_POSITION, (0, 200, 0, 1.0))
+    glLightfv(GL_LIGHT0, GL_AMBIENT, (0.7, 0.7, 0.7, 1.0))
+    glLightfv(GL_LIGHT0, GL_DIFFUSE, (0.9, 0.9, 0.9, 1.0))
+    glEnable(GL_COLOR_MATERIAL)
+
+
+def make_flock(count, seed=0):
+    rng = random.Random(seed)
+    side = int(math.ceil(math.sqrt(count)))
+    spacing = 12.0
+    flock = []
+    for i in range(count):
+        g = Gallina("obj/gallina/gallina.obj",
+                    [(i % side - side / 2) * spacing, 0.0, (i // side - side / 2) * spacing],
+                    3.0)
+        g.rotation_y = rng.uniform(0.0, 360.0)
+        for _ in range(rng.randrange(20)):
+            g.pata_izq.update(True)
+            g.pata_der.update(True)
+            g.ala_izq.update(True)
+            g.ala_der.update(True)
+        flock.append(g)
+    return flock, side * spacing
+
+
+def measure(draw, extent, frames):
+    def frame():
+        glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
+        glLoadIdentity()
+        gluLookAt(0.0, extent, extent, 0.0, 0.0, 0.0, 0.0, 1.0, 0.0)
+        draw()
+        glFinish()
+        pygame.display.flip()
+
+    frame()
+    start = time.perf_counter()
+    for _ in range(frames):
+        frame()
+    return frames / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--counts', type=int, nargs='+', default=[100, 1000, 5000])
+    parser.add_argument('--frames', type=int, default=30)
+    parser.add_argument('--backend', default='vbo', choices=['vbo', 'displaylist'])
+    args = parser.parse_args()
+
+    setup(800, 600)
+    OBJ.backend = args.backend
+    batched = FlockRenderer(instancing=False)
+    instanced = FlockRenderer() if instancing_supported() else None
+
+    print(f"{'gallinas':>9} {'draw()':>10} {'lotes':>10} {'instanciado':>12}")
+    for count in args.counts:
+        flock, extent = make_flock(count)
+        loop_fps = measure(lambda: [g.draw() for g in flock], extent, args.frames)
+        batched_fps = measure(lambda: batched.draw(flock), extent, args.frames)
+        instanced_fps = (measure(lambda: instanced.draw(flock), extent, args.frames)
+                         if instanced else float('nan'))
+        print(f"{count:>9} {loop_fps:>10.1f} {batched_fps:>10.1f} {instanced_fps:>12.1f}")
+    pygame.quit()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+"""
+Mide ticks por segundo de flocksim.Flock contra las clases escalares
+(Gallina.move / Pata.update / Ala.update). La paridad entre ambas se
+verifica en tests/test_flocksim.py.
+
+Uso (desde la raiz del repositorio):
+    python benchmarks/bench_flocksim.py [--counts 100 1000 10000 100000]
+"""
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pygame
+
+from gallina import Gallina
+from inputs import KeyState
+from flocksim import Flock
+
+KEYS = (pygame.K_LEFT, pygame.K_RIGHT, pygame.K_UP, pygame.K_DOWN)
+
+
+def make_gallinas(count, rng):
+    gallinas = []
+    for _ in range(count):
+        g = Gallina("obj/gallina/gallina.obj",
+                    [rng.uniform(-300, 300), 0.0, rng.uniform(-300, 300)], 3.0,
+                    load_model=False)
+        g.rotation_y = rng.uniform(0.0, 360.0)
+        gallinas.append(g)
+    return gallinas
+
+
+def make_inputs(count, patterns, rng):
+    # Patrones de teclas precalculados que se repiten ciclicamente
+    return rng.random((patterns, 4, count)) < np.array([0.2, 0.2, 0.6, 0.1])[None, :, None]
+
+
+def ticks_per_sec(fn, ticks):
+    start = time.perf_counter()
+    for tick in range(ticks):
+        fn(tick)
+    return ticks / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--counts', type=int, nargs='+', default=[100, 1000, 10000, 100000])
+    parser.add_argument('--ticks', type=int, default=50)
+    parser.add_argument('--scalar-limit', type=int, default=10000,
+                        help="no medir las clases escalares por encima de este numero")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(1)
+    print(f"{'gallinas':>9} {'escalar t/s':>12} {'SoA t/s':>10}")
+    for count in args.counts:
+        gallinas = make_gallinas(count, rng)
+        inputs = make_inputs(count, 16, rng)
+        flock = Flock.from_gallinas(gallinas)
+        soa = ticks_per_sec(lambda t: flock.step(*inputs[t % 16]), args.ticks)
+        scalar = float('nan')
+        if count <= args.scalar_limit:
+            states = [[KeyState(k for k, on in zip(KEYS, pattern[:, i]) if on)
+                       for i in range(count)] for pattern in inputs]
+
+            def scalar_tick(t):
+                for g, keys in zip(gallinas, states[t % 16]):
+                    g.move(keys)
+            scalar = ticks_per_sec(scalar_tick, max(1, args.ticks // 5))
+        print(f"{count:>9} {scalar:>12.1f} {soa:>10.1f}")
+
+
+if __name__ == '__main__':
+    main()
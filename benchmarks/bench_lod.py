@@ -0,0 +1,122 @@
+"""
+Reporta los triangulos de cada nivel de detalle del robot y la gallina y
+los FPS al dibujar una escena con cada nivel forzado y con el nivel
+elegido por distancia.
+
+Necesita un contexto OpenGL; sin pantalla se puede usar
+SDL_VIDEODRIVER=offscreen (y PYOPENGL_PLATFORM=egl).
+
+Uso (desde la raiz del repositorio):
+    python benchmarks/bench_lod.py [--robots 50] [--chickens 500] [--frames 30]
+"""
+import os
+import sys
+import math
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pygame
+from OpenGL.GL import *
+from OpenGL.GLU import *
+
+from objloader import OBJ
+from robot import Cuerpo
+from gallina import Gallina
+from lod import LODSelector, DEFAULT_LOD_CELLS, triangle_count
+from bench_flock import setup
+
+# Mismas distancias que main.py
+LOD_DISTANCES = (80.0, 160.0, 320.0)
+
+
+def entity_meshes(entity):
+    if isinstance(entity, Cuerpo):
+        return [entity.obj, entity.brazo_izq.obj, entity.brazo_der.obj]
+    return [entity.obj, entity.pata_izq.obj, entity.pata_der.obj,
+            entity.ala_izq.obj, entity.ala_der.obj]
+
+
+def entity_triangles(entity):
+    return sum(triangle_count(obj.current()) for obj in entity_meshes(entity))
+
+
+def make_scene(robots, chickens, cells):
+    """
+    Robots y gallinas en una rejilla que se aleja de la camara, para que
+    el modo por distancia use todos los niveles.
+    """
+    entities = []
+    spacing = 15.0
+    total = robots + chickens
+    side = int(math.ceil(math.sqrt(total)))
+    for i in range(total):
+        pos = [(i % side - side / 2) * spacing, 0.0, -(i // side) * spacing]
+        if i < robots:
+            entities.append(Cuerpo("obj/robot/robot.obj", pos, 1.5, lod_cells=cells))
+        else:
+            entities.append(Gallina("obj/gallina/gallina.obj", pos, 3.0, lod_cells=cells))
+    return entities, side * spacing
+
+
+def measure(entities, eye, frames):
+    def frame():
+        glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
+        glLoadIdentity()
+        gluLookAt(eye[0], eye[1], eye[2], 0.0, 0.0, -eye[2], 0.0, 1.0, 0.0)
+        for entity in entities:
+            entity.draw()
+        glFinish()
+        pygame.display.flip()
+
+    frame()
+    start = time.perf_counter()
+    for _ in range(frames):
+        frame()
+    return frames / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--robots', type=int, default=50)
+    parser.add_argument('--chickens', type=int, default=500)
+    parser.add_argument('--frames', type=int, default=30)
+    parser.add_argument('--backend', default='vbo', choices=['vbo', 'displaylist'])
+    args = parser.parse_args()
+
+    setup(800, 600)
+    OBJ.backend = args.backend
+    entities, extent = make_scene(args.robots, args.chickens, DEFAULT_LOD_CELLS)
+
+    print("Triangulos por nivel (celdas: original, " +
+          ", ".join(str(c) for c in DEFAULT_LOD_CELLS) + ")")
+    for entity in entities[:1] + entities[-1:]:
+        for obj in entity_meshes(entity):
+            counts = [triangle_count(level) for level in obj.levels]
+            print(f"  {os.path.basename(obj.key[0]):<16} {counts}")
+
+    eye = (0.0, 40.0, 30.0)
+    levels = max(len(obj.levels) for e in entities for obj in entity_meshes(e))
+    print(f"\n{'nivel':>10} {'triangulos':>12} {'fps':>8}")
+    for level in range(levels):
+        for entity in entities:
+            for obj in entity_meshes(entity):
+                obj.set_level(level)
+        tris = sum(entity_triangles(e) for e in entities)
+        fps = measure(entities, eye, args.frames)
+        print(f"{level:>10} {tris:>12} {fps:>8.1f}")
+
+    selector = LODSelector(LOD_DISTANCES)
+    for entity in entities:
+        for obj in entity_meshes(entity):
+            obj.set_level(0)
+        entity.update_lod(eye, selector)
+    tris = sum(entity_triangles(e) for e in entities)
+    fps = measure(entities, eye, args.frames)
+    print(f"{'distancia':>10} {tris:>12} {fps:>8.1f}")
+    pygame.quit()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,130 @@
+"""
+Memoria que ocupa la geometria de cada modelo de obj/, antes y despues
+de guardarla en arreglos planos:
+
+    listas     la representacion anterior (una lista/tupla de Python por
+               vertice, normal y texcoord, y una tupla de listas mas el
+               nombre del material por cara), reconstruida aqui
+    arreglos   los array('f'/'i'/'I') que guarda OBJ ahora
+
+Para ambas se reporta el heap de Python (tracemalloc) que se agrega al
+construirlas. No se reporta RSS: dentro de un mismo proceso depende de
+cuanta memoria ya libero el allocator (p. ej. la del parser) y no de la
+representacion. Ademas, el heap de todo el OBJ despues de cargar y
+generar la malla, y despues de soltar la copia en CPU con
+OBJ.dropGeometry(). Antes de medir se carga una vez cada modelo y se
+descarta una medicion, para no contar imports ni reservas que se hacen
+una sola vez en el proceso.
+
+Uso (desde la raiz del repositorio):
+    python benchmarks/bench_memory.py [modelo.obj ...] [--backend vbo|displaylist]
+"""
+import os
+import sys
+import gc
+import glob
+import argparse
+import tracemalloc
+from array import array
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Sin servidor grafico se usa un contexto GL por software (EGL/llvmpipe)
+if not os.environ.get('DISPLAY') and not os.environ.get('WAYLAND_DISPLAY'):
+    os.environ.setdefault('SDL_VIDEODRIVER', 'offscreen')
+    os.environ.setdefault('PYOPENGL_PLATFORM', 'egl')
+
+import pygame
+
+from objloader import OBJ
+from tracer import tracer
+
+
+def legacy_geometry(obj):
+    """
+    La geometria de 'obj' con las listas que usaba OBJ antes de los
+    arreglos planos (mismos tipos de fila que su setArrays, con swapyz).
+    """
+    def rows(flat, width, row):
+        it = iter(flat.tolist())
+        return list(map(row, zip(*[it] * width)))
+
+    face_v, face_vn, face_vt = obj.face_v.tolist(), obj.face_vn.tolist(), obj.face_vt.tolist()
+    offsets = obj.face_offsets.tolist()
+    faces = [(face_v[start:end], face_vn[start:end], face_vt[start:end], obj.materialName(mtl_id))
+             for start, end, mtl_id in zip(offsets, offsets[1:], obj.face_mtl.tolist())]
+    return (rows(obj.vertices, 3, tuple), rows(obj.normals, 3, tuple),
+            rows(obj.texcoords, 2, list), faces)
+
+
+def flat_geometry(obj):
+    """
+    Copia de los arreglos planos de 'obj'.
+    """
+    return [array(values.typecode, values) for values in (
+        obj.vertices, obj.normals, obj.texcoords, obj.face_offsets,
+        obj.face_v, obj.face_vn, obj.face_vt, obj.face_mtl)]
+
+
+def footprint(build, obj):
+    """
+    Bytes de heap que agrega build(obj) mientras su resultado vive.
+    """
+    gc.collect()
+    heap0 = tracemalloc.get_traced_memory()[0]
+    data = build(obj)
+    gc.collect()
+    heap1 = tracemalloc.get_traced_memory()[0]
+    del data
+    return heap1 - heap0
+
+
+def measure(filename, backend):
+    """
+    Devuelve (caras, heap_listas, heap_arreglos, heap_objeto, heap_soltado)
+    en bytes.
+    """
+    gc.collect()
+    heap0 = tracemalloc.get_traced_memory()[0]
+    obj = OBJ.__new__(OBJ)
+    obj.backend = backend
+    obj.__init__(filename, swapyz=True)
+    gc.collect()
+    heap1 = tracemalloc.get_traced_memory()[0]
+    faces = obj.stats.get('faces', 0)
+    heap_flat = footprint(flat_geometry, obj)
+    heap_lists = footprint(legacy_geometry, obj)
+    obj.dropGeometry()
+    gc.collect()
+    heap2 = tracemalloc.get_traced_memory()[0]
+    obj.free()
+    return faces, heap_lists, heap_flat, heap1 - heap0, heap2 - heap0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('models', nargs='*')
+    parser.add_argument('--backend', default='vbo', choices=('vbo', 'displaylist'))
+    args = parser.parse_args()
+    models = args.models or sorted(glob.glob('obj/**/*.obj', recursive=True))
+
+    tracer.enabled = False
+    pygame.init()
+    pygame.display.set_mode((64, 64), pygame.DOUBLEBUF | pygame.OPENGL)
+    for filename in models:
+        OBJ(filename, swapyz=True).free()  # crea el cache binario
+
+    tracemalloc.start()
+    measure(models[0], args.backend)  # calentamiento, se descarta
+    kib = 1024.0
+    print(f"{'':<28}{'':>7}{'heap KiB':>20}{'OBJ heap KiB':>20}")
+    print(f"{'modelo':<28}{'caras':>7}{'listas':>10}{'arreglos':>10}{'cargado':>10}{'soltado':>10}")
+    for filename in models:
+        faces, heap_lists, heap_flat, heap1, heap2 = measure(filename, args.backend)
+        print(f"{os.path.relpath(filename, 'obj'):<28}{faces:>7}{heap_lists / kib:>10.1f}"
+              f"{heap_flat / kib:>10.1f}{heap1 / kib:>10.1f}{heap2 / kib:>10.1f}")
+    pygame.quit()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+"""
+Reporta para cada modelo de obj/ los vertices que se suben a la GPU y el
+ACMR (vertices transformados por triangulo, cache FIFO de
+meshopt.CACHE_SIZE) sin indices, indexado en el orden original y
+reordenado con Tipsify, junto con el tiempo de dibujo de cada variante.
+
+Necesita un contexto OpenGL; sin pantalla se puede usar
+SDL_VIDEODRIVER=offscreen (y PYOPENGL_PLATFORM=egl).
+
+Uso (desde la raiz del repositorio):
+    python benchmarks/bench_meshopt.py [modelo.obj ...] [--draws 200]
+"""
+import os
+import sys
+import glob
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pygame
+from OpenGL.GL import *
+
+from objloader import OBJ, VERTEX_FLOATS
+from meshopt import CACHE_SIZE, build_indexed
+from bench_flock import setup
+
+
+def draw_ms(mesh, draws):
+    """
+    Milisegundos por dibujar 'draws' veces la malla (un solo bind).
+    """
+    def frame():
+        glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
+        mesh.bindVBO()
+        for _ in range(draws):
+            mesh.drawBatches()
+        mesh.unbindVBO()
+        glFinish()
+
+    frame()
+    start = time.perf_counter()
+    for _ in range(5):
+        frame()
+    return (time.perf_counter() - start) / 5 * 1e3
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('models', nargs='*')
+    parser.add_argument('--draws', type=int, default=200)
+    args = parser.parse_args()
+    models = args.models or sorted(glob.glob('obj/**/*.obj', recursive=True))
+
+    setup(800, 600)
+    glMatrixMode(GL_MODELVIEW)
+    glLoadIdentity()
+    glTranslatef(0.0, 0.0, -60.0)
+    OBJ.backend = 'vbo'
+
+    print(f"cache FIFO de {CACHE_SIZE} vertices; ms por {args.draws} dibujos\n")
+    print(f"{'modelo':<22}{'esquinas':>9}{'vertices':>9}{'ACMR sin idx':>13}{'original':>9}"
+          f"{'tipsify':>9}{'indexar':>9}{'ms arrays':>10}{'ms idx':>8}")
+    for filename in models:
+        mesh = OBJ(filename, swapyz=True, defer_gl=True)
+        mesh.uploadTextures()
+        triangles = mesh.triangles()
+        start = time.perf_counter()
+        build_indexed(triangles, VERTEX_FLOATS)
+        build = (time.perf_counter() - start) * 1e3
+        _, _, _, stats = build_indexed(triangles, VERTEX_FLOATS, measure=True)
+
+        mesh.index_buffers = False
+        mesh.generate()
+        arrays = draw_ms(mesh, args.draws)
+        mesh.free()
+        mesh.index_buffers = True
+        mesh.generate()
+        indexed = draw_ms(mesh, args.draws)
+        mesh.free()
+
+        print(f"{os.path.relpath(filename, 'obj'):<22}{stats['corners']:>9}{stats['vertices']:>9}"
+              f"{stats['acmr_unindexed']:>13.3f}{stats['acmr_before']:>9.3f}{stats['acmr_after']:>9.3f}"
+              f"{build:>7.1f}ms{arrays:>10.1f}{indexed:>8.1f}")
+    pygame.quit()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+"""
+Compara el parser linea por linea de OBJ contra el parser vectorizado
+con NumPy (objloader.parse_arrays). Verifica que ambos produzcan la misma
+geometria y reporta el tiempo de cada uno.
+
+Uso (desde la raiz del repositorio):
+    python benchmarks/bench_parser.py [modelo.obj ...] [--repeat N]
+"""
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from objloader import OBJ, parse_arrays
+
+
+def load(filename, parser, swapyz=True):
+    obj = OBJ.__new__(OBJ)
+    obj.parser = parser
+    obj.use_cache = False
+    obj.generate_on_init = False
+    obj.__init__(filename, swapyz=swapyz)
+    return obj
+
+
+def same_geometry(a, b):
+    # Ambos parsers guardan float32 en arreglos planos: se comparan tal cual.
+    return (a.vertices == b.vertices
+            and a.normals == b.normals
+            and a.texcoords == b.texcoords
+            and a.face_offsets == b.face_offsets
+            and a.face_v == b.face_v
+            and a.face_vn == b.face_vn
+            and a.face_vt == b.face_vt
+            and list(map(a.materialName, a.face_mtl)) == list(map(b.materialName, b.face_mtl)))
+
+
+def best_of(fn, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('models', nargs='*', default=['obj/robot/robot.obj'])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    for filename in args.models:
+        for swapyz in (False, True):
+            if not same_geometry(load(filename, 'python', swapyz),
+                                 load(filename, 'numpy', swapyz)):
+                sys.exit(f"{filename}: los parsers no coinciden (swapyz={swapyz})")
+        t_py = best_of(lambda: load(filename, 'python'), args.repeat)
+        t_np = best_of(lambda: load(filename, 'numpy'), args.repeat)
+        t_arrays = best_of(lambda: parse_arrays(filename, True), args.repeat)
+        print(f"{filename}: python {t_py * 1000:.1f} ms, numpy {t_np * 1000:.1f} ms "
+              f"(x{t_py / t_np:.1f}), solo arreglos {t_arrays * 1000:.1f} ms "
+              f"(x{t_py / t_arrays:.1f})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+"""
+Compara spatial.SpatialHash contra una busqueda por fuerza bruta para
+"gallina mas cercana al robot" y consultas por radio, verificando que
+ambas den el mismo resultado.
+
+Uso (desde la raiz del repositorio):
+    python benchmarks/bench_spatial.py [--counts 100 1000 10000 100000]
+"""
+import os
+import sys
+import math
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from spatial import SpatialHash
+
+BOUNDS = (-500, 500, -500, 500)
+
+
+def brute_nearest(points, x, z, radius):
+    best = None
+    best_d2 = radius * radius
+    for entity, (ex, ez) in points.items():
+        d2 = (ex - x) ** 2 + (ez - z) ** 2
+        if d2 <= best_d2:
+            best, best_d2 = entity, d2
+    return None if best is None else (best, math.sqrt(best_d2))
+
+
+def brute_radius(points, x, z, radius):
+    r2 = radius * radius
+    return {e for e, (ex, ez) in points.items() if (ex - x) ** 2 + (ez - z) ** 2 <= r2}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--counts', type=int, nargs='+', default=[100, 1000, 10000, 100000])
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--radius', type=float, default=12.0)
+    parser.add_argument('--cell', type=float, default=25.0)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    print(f"{'entidades':>10} {'fuerza bruta us':>16} {'hash us':>9} {'update us':>10}")
+    for count in args.counts:
+        points = {i: (rng.uniform(-500, 500), rng.uniform(-500, 500)) for i in range(count)}
+        index = SpatialHash(args.cell, BOUNDS)
+        for entity, (x, z) in points.items():
+            index.insert(entity, x, z)
+        queries = [(rng.uniform(-500, 500), rng.uniform(-500, 500)) for _ in range(args.queries)]
+
+        for x, z in queries[:20]:
+            a, b = brute_nearest(points, x, z, args.radius), index.nearest(x, z, args.radius)
+            assert (a is None) == (b is None) and (a is None or abs(a[1] - b[1]) < 1e-12)
+            assert brute_radius(points, x, z, 3 * args.radius) == \
+                {e for e, _ in index.query_radius(x, z, 3 * args.radius)}
+
+        brute_queries = queries[:max(1, args.queries // max(1, count // 1000))]
+        start = time.perf_counter()
+        for x, z in brute_queries:
+            brute_nearest(points, x, z, args.radius)
+        t_brute = (time.perf_counter() - start) / len(brute_queries)
+
+        start = time.perf_counter()
+        for x, z in queries:
+            index.nearest(x, z, args.radius)
+        t_hash = (time.perf_counter() - start) / len(queries)
+
+        # Movimiento incremental: cada entidad avanza un poco
+        moves = [(e, x + rng.uniform(-1, 1), z + rng.uniform(-1, 1))
+                 for e, (x, z) in list(points.items())[:10000]]
+        start = time.perf_counter()
+        for e, x, z in moves:
+            index.update(e, x, z)
+        t_update = (time.perf_counter() - start) / len(moves)
+
+        print(f"{count:>10} {t_brute * 1e6:>16.1f} {t_hash * 1e6:>9.1f} {t_update * 1e6:>10.2f}")
+
+
+if __name__ == '__main__':
+    main()
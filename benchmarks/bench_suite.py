@@ -0,0 +1,243 @@
+"""
+Suite de microbenchmarks del cargador, las matrices y la logica de juego.
+Corre sin pantalla (SDL offscreen + EGL) y guarda o compara una linea
+base en JSON.
+
+Casos:
+    parse/<modelo>      OBJ.__init__ sin cache ni GL, para cada .obj en obj/
+    cache/<modelo>      OBJ.__init__ desde el cache binario
+    material/<mtl>      OBJ.loadMaterial de cada .mtl
+    generate/<backend>  OBJ.generate (display list, VBO y VBO indexado) de robot.obj;
+                        el indexado usa los buffers ya preparados, como vienen del cache
+    index/<modelo>      OBJ.indexTriangles de robot.obj (lo que ahorra el cache)
+    matrix/<clase>      matrix() de Cuerpo, Brazo, Gallina, Ala y Pata
+    transform/<clase>   local_matrix() (cacheada) sin cambios de estado
+    anim/<clase>        update() + local_matrix() de una parte en movimiento
+    tick/<entidad>      move() de Cuerpo y Gallina con entrada de guion
+
+Uso (desde la raiz del repositorio):
+    python benchmarks/bench_suite.py [--save benchmarks/baseline.json]
+    python benchmarks/bench_suite.py --compare benchmarks/baseline.json [--threshold 0.15]
+    python benchmarks/bench_suite.py --filter parse/ --no-gl
+
+benchmarks/baseline.json es la linea base del repositorio, con la maquina,
+el Python y el renderer GL en que se midio. Los tiempos solo son
+comparables en una maquina parecida: --compare avisa si no coinciden, y
+en ese caso conviene guardar una linea base propia con --save antes de
+hacer cambios.
+"""
+import os
+import sys
+import glob
+import json
+import time
+import argparse
+import platform
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Sin servidor grafico se usa un contexto GL por software (EGL/llvmpipe)
+if not os.environ.get('DISPLAY') and not os.environ.get('WAYLAND_DISPLAY'):
+    os.environ.setdefault('SDL_VIDEODRIVER', 'offscreen')
+    os.environ.setdefault('PYOPENGL_PLATFORM', 'egl')
+
+import pygame
+
+from objloader import OBJ
+from tracer import tracer
+from robot import Cuerpo, Brazo
+from gallina import Gallina, Ala, Pata
+from inputs import ScriptedInput
+from headless import ROBOT_SCRIPT, CHICKEN_SCRIPT
+
+
+def measure(fn, number, repeat):
+    """
+    Ejecuta 'fn' 'number' veces por muestra y devuelve las estadisticas de
+    'repeat' muestras en microsegundos por llamada.
+    """
+    samples = []
+    fn()
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        samples.append((time.perf_counter() - start) / number * 1e6)
+    return {
+        'median_us': statistics.median(samples),
+        'min_us': min(samples),
+        'max_us': max(samples),
+        'number': number,
+        'repeat': repeat,
+    }
+
+
+def load(filename, use_cache):
+    obj = OBJ.__new__(OBJ)
+    obj.use_cache = use_cache
+    obj.generate_on_init = False
+    obj.__init__(filename, swapyz=True)
+    return obj
+
+
+def model_cases():
+    cases = {}
+    for filename in sorted(glob.glob('obj/**/*.obj', recursive=True)):
+        name = os.path.relpath(filename, 'obj')
+        cases[f'parse/{name}'] = (lambda f=filename: load(f, False), 3)
+        load(filename, True)  # crea el cache para el caso siguiente
+        cases[f'cache/{name}'] = (lambda f=filename: load(f, True), 10)
+    for filename in sorted(glob.glob('obj/**/*.mtl', recursive=True)):
+        name = os.path.relpath(filename, 'obj')
+        cases[f'material/{name}'] = (lambda f=filename: OBJ.loadMaterial(f), 50)
+    return cases
+
+
+def gl_cases():
+    """
+    Casos que necesitan un contexto OpenGL; devuelve {} si no se puede
+    crear uno.
+    """
+    try:
+        pygame.init()
+        pygame.display.set_mode((64, 64), pygame.DOUBLEBUF | pygame.OPENGL)
+    except pygame.error as e:
+        print(f"Sin contexto OpenGL, se omiten los casos generate/: {e}")
+        return {}
+    mesh = load('obj/robot/robot.obj', True)
+    prepared = (False, None, mesh.indexTriangles(mesh.triangles()))
+    cases = {}
+    for backend, indexed in (('displaylist', False), ('vbo', False), ('vbo-indexed', True)):
+        def generate(backend=backend.split('-')[0], indexed=indexed):
+            mesh.backend = backend
+            mesh.index_buffers = indexed
+            if indexed:
+                mesh.prepared = prepared
+            mesh.generate()
+            mesh.free()
+        cases[f'generate/{backend}'] = (generate, 3)
+    cases['index/robot/robot.obj'] = (lambda: mesh.indexTriangles(mesh.triangles()), 3)
+    return cases
+
+
+def logic_cases():
+    robot = Cuerpo("obj/robot/robot.obj", [0.0, 18.0, 0.0], 1.5, load_model=False)
+    gallina = Gallina("obj/gallina/gallina.obj", [0.0, 0.0, 0.0], 3.0, load_model=False)
+    brazo = Brazo("obj/robot/brazoizq.obj", load_model=False)
+    ala = Ala("obj/gallina/alaizq.obj", load_model=False)
+    pata = Pata("obj/gallina/pataizq.obj", load_model=False)
+    robot_input = ScriptedInput(ROBOT_SCRIPT)
+    chicken_input = ScriptedInput(CHICKEN_SCRIPT)
+    ala.flap_phase = 12.0
+    pata.march_angle = 8.0
+    brazo.swing_angle = 20.0
+    return {
+        'matrix/Cuerpo': (robot.matrix, 20000),
+        'matrix/Gallina': (gallina.matrix, 20000),
+        'matrix/Brazo': (lambda: brazo.matrix(robot.offset_brazo_der, True), 20000),
+        'matrix/Ala': (lambda: ala.matrix(gallina.offset_ala_der, True), 20000),
+        'matrix/Pata': (lambda: pata.matrix(gallina.offset_pata_der, True), 20000),
+        'transform/Cuerpo': (robot.local_matrix, 20000),
+        'transform/Brazo': (lambda: brazo.local_matrix(robot.offset_brazo_der, True), 20000),
+        'anim/Brazo': (lambda: (brazo.update(True, False),
+                                brazo.local_matrix(robot.offset_brazo_der, True)), 20000),
+        'anim/Pata': (lambda: (pata.update(True), pata.local_matrix(gallina.offset_pata_der, True)), 20000),
+        'tick/Cuerpo': (lambda: robot.move(robot_input.poll()), 20000),
+        'tick/Gallina': (lambda: gallina.move(chicken_input.poll()), 20000),
+    }
+
+
+def environment():
+    """
+    Datos de la maquina que se guardan con la linea base.
+    """
+    env = {
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'machine': platform.machine(),
+        'platform': platform.platform(),
+        'processor': platform.processor(),
+        'cpus': os.cpu_count(),
+        'gl_renderer': None,
+    }
+    if pygame.display.get_init() and pygame.display.get_surface() is not None:
+        from OpenGL.GL import glGetString, GL_RENDERER
+        renderer = glGetString(GL_RENDERER)
+        env['gl_renderer'] = renderer.decode('utf-8', 'replace') if renderer else None
+    return env
+
+
+def compare(results, baseline, threshold, env=None):
+    """
+    Imprime la comparacion contra la linea base y devuelve los casos cuya
+    mediana empeoro mas de 'threshold' (fraccion) y cuyas muestras ya no
+    se traslapan con las de la base (la mas rapida ahora es mas lenta que
+    la mas lenta de la base), para no marcar el ruido de los casos de
+    menos de un microsegundo.
+    """
+    for key, value in (env or {}).items():
+        base = baseline.get(key)
+        if base is not None and value is not None and base != value:
+            print(f"Aviso: la linea base se midio con {key} = {base!r} (ahora {value!r})")
+    regressions = []
+    print(f"{'caso':<36} {'base us':>11} {'actual us':>11} {'cambio':>8}")
+    for name, result in results.items():
+        base = baseline.get('results', {}).get(name)
+        if base is None:
+            print(f"{name:<36} {'-':>11} {result['median_us']:>11.2f} {'nuevo':>8}")
+            continue
+        change = result['median_us'] / base['median_us'] - 1.0
+        flag = ''
+        if change > threshold and result['min_us'] > base['max_us']:
+            flag = '  REGRESION'
+            regressions.append(name)
+        print(f"{name:<36} {base['median_us']:>11.2f} {result['median_us']:>11.2f} "
+              f"{change * 100:>+7.1f}%{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--save', metavar='JSON', help="guardar los resultados como linea base")
+    parser.add_argument('--compare', metavar='JSON', help="comparar contra una linea base")
+    parser.add_argument('--threshold', type=float, default=0.15,
+                        help="empeoramiento maximo permitido de la mediana (0.15 = 15%%)")
+    parser.add_argument('--repeat', type=int, default=7)
+    parser.add_argument('--filter', default='', help="solo casos cuyo nombre contiene este texto")
+    parser.add_argument('--no-gl', action='store_true', help="omitir los casos que usan OpenGL")
+    args = parser.parse_args()
+
+    # La traza de arranque acumularia un span por cada OBJ medido
+    tracer.enabled = False
+
+    cases = {}
+    cases.update(model_cases())
+    if not args.no_gl:
+        cases.update(gl_cases())
+    cases.update(logic_cases())
+
+    results = {}
+    for name, (fn, number) in cases.items():
+        if args.filter in name:
+            results[name] = measure(fn, number, args.repeat)
+            if not args.compare:
+                print(f"{name:<36} {results[name]['median_us']:>11.2f} us")
+
+    failed = []
+    if args.compare:
+        with open(args.compare) as f:
+            failed = compare(results, json.load(f), args.threshold, environment())
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump({
+                **environment(),
+                'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                'results': results,
+            }, f, indent=1)
+    if failed:
+        sys.exit(f"{len(failed)} caso(s) por encima del umbral de {args.threshold:.0%}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,231 @@
+import os
+import sys
+import json
+import mmap
+import struct
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from objloader import OBJ, VERTEX_FLOATS, _file_digest
+from texregistry import registry as texture_registry
+
+# --- Bundle de assets ---
+# Un solo archivo (por defecto "assets.bundle" en la raiz del repositorio)
+# que escribe compile_assets.py con todo lo de obj/ y texturas/ ya
+# procesado. Cabecera: magic, version y longitud del indice (JSON con las
+# mallas, materiales y texturas); despues vienen los datos binarios
+# alineados a 16 bytes. El indice guarda cada arreglo como
+# [desplazamiento desde el fin del indice, dtype, cantidad], asi que se
+# leen como vistas NumPy sobre el archivo mapeado, sin copiar ni parsear.
+BUNDLE_MAGIC = b'GBDL'
+BUNDLE_VERSION = 1
+BUNDLE_HEADER = struct.Struct('<4sII')
+BUNDLE_ALIGN = 16
+
+# Arreglos de cada nivel de malla, en el formato de parse_arrays
+GEOMETRY_SECTIONS = ('vertices', 'normals', 'texcoords', 'face_sizes',
+                     'face_v', 'face_vn', 'face_vt', 'face_mtl')
+
+
+def mesh_key(relpath, swapyz):
+    return f"{relpath}|{int(bool(swapyz))}"
+
+
+def texture_key(relpath, flip):
+    return f"{relpath}|{int(bool(flip))}"
+
+
+class Bundle:
+    """
+    Bundle de assets abierto y mapeado en memoria. Las rutas se buscan
+    relativas al directorio del bundle. Si el archivo original de un asset
+    existe y cambio desde que se compilo, ese asset se ignora y se carga
+    del archivo como siempre; si no existe (juego distribuido solo con el
+    bundle), se usa el del bundle.
+    """
+    def __init__(self, path):
+        self.path = path
+        self.root = os.path.dirname(os.path.abspath(path))
+        self.file = open(path, 'rb')
+        try:
+            self.mm = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+            magic, version, toc_len = BUNDLE_HEADER.unpack_from(self.mm, 0)
+            if magic != BUNDLE_MAGIC or version != BUNDLE_VERSION:
+                raise ValueError(f"{path}: not a version {BUNDLE_VERSION} asset bundle")
+            self.toc = json.loads(self.mm[BUNDLE_HEADER.size:BUNDLE_HEADER.size + toc_len].decode('utf-8'))
+            if self.toc['byteorder'] != sys.byteorder:
+                raise ValueError(f"{path}: bundle was compiled for another byte order")
+        except (struct.error, UnicodeDecodeError, KeyError):
+            self.close()
+            raise ValueError(f"{path}: corrupt asset bundle")
+        except Exception:
+            self.close()
+            raise
+        self.base = BUNDLE_HEADER.size + toc_len
+        self.fresh = {}  # clave -> bool, se revisa una vez por proceso
+        self.hits = 0
+        self.misses = 0
+
+    def relpath(self, filepath):
+        return os.path.relpath(os.path.abspath(filepath), self.root).replace(os.sep, '/')
+
+    def abspath(self, relpath):
+        return os.path.join(self.root, *relpath.split('/'))
+
+    def array(self, spec):
+        offset, dtype, count = spec
+        return np.frombuffer(self.mm, dtype=dtype, count=count, offset=self.base + offset)
+
+    def is_fresh(self, key, deps):
+        fresh = self.fresh.get(key)
+        if fresh is None:
+            fresh = self.fresh[key] = all(self.dep_is_fresh(dep) for dep in deps)
+        return fresh
+
+    def dep_is_fresh(self, dep):
+        # Mismo criterio que el cache de OBJ: mtime y tamaño, o el hash si
+        # solo cambio el mtime. Sin el archivo original vale el del bundle.
+        try:
+            st = os.stat(self.abspath(dep['path']))
+        except OSError:
+            return True
+        if st.st_size != dep['size']:
+            return False
+        if st.st_mtime_ns == dep['mtime']:
+            return True
+        return _file_digest(self.abspath(dep['path'])) == dep['sha1']
+
+    def lookup(self, table, key):
+        entry = self.toc[table].get(key)
+        if entry is None or not self.is_fresh(key, entry['deps']):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry
+
+    # --- Mallas ---
+
+    def mesh(self, filepath, swapyz=False):
+        """
+        Entrada de la malla (con sus niveles de detalle), o None.
+        """
+        key = mesh_key(self.relpath(filepath), swapyz)
+        entry = self.lookup('meshes', key)
+        if entry is not None:
+            entry['key'] = key
+        return entry
+
+    def geometry(self, entry, level):
+        """
+        Geometria de un nivel en el formato de parse_arrays (vistas sobre
+        el archivo mapeado).
+        """
+        data = {name: self.array(level['arrays'][name]) for name in GEOMETRY_SECTIONS}
+        data['material_names'] = entry['material_names']
+        return data
+
+    def prepared(self, level):
+        """
+        Buffers indexados del nivel en el formato de OBJ.prepared, o None
+        si el bundle no los trae o son de otro formato de vertice.
+        """
+        indexed = level.get('indexed')
+        if indexed is None or self.toc['vertex_floats'] != VERTEX_FLOATS:
+            return None
+        batches = [tuple(batch) for batch in indexed['batches']]
+        return (False, None, (self.array(indexed['vertices']), self.array(indexed['indices']),
+                              batches, dict(indexed['stats'])))
+
+    def materials(self, entry):
+        # Copia por malla: loadTextures agrega 'texture_Kd' a cada material
+        return {name: dict(mtl) for name, mtl in entry['materials'].items()}
+
+    def lod_levels(self, obj, cells, defer_gl=False):
+        """
+        Niveles de detalle precompilados de 'obj' (cargado del bundle) para
+        las mismas 'cells' con las que se compilo, o None.
+        """
+        entry = self.toc['meshes'].get(obj.bundle_key)
+        if entry is None or list(entry['lod_cells']) != list(cells):
+            return None
+        levels = [obj]
+        for level in entry['levels'][1:]:
+            mesh = OBJ.fromGeometry(self.geometry(entry, level), obj.mtl, defer_gl=True)
+            mesh.prepared = self.prepared(level)
+            if OBJ.generate_on_init and not defer_gl:
+                mesh.generate()
+            levels.append(mesh)
+        return levels
+
+    # --- Materiales y texturas ---
+
+    def material(self, filepath):
+        """
+        Tabla de materiales de un .mtl (sin texturas subidas), o None.
+        """
+        key = self.relpath(filepath)
+        entry = self.lookup('materials', key)
+        if entry is None:
+            return None
+        return {name: dict(mtl) for name, mtl in entry['contents'].items()}
+
+    def texture(self, filepath, flip):
+        """
+        (pixeles RGBA, ancho, alto) del nivel 0 de la textura, o None.
+        """
+        entry = self.lookup('textures', texture_key(self.relpath(filepath), flip))
+        if entry is None:
+            return None
+        return (self.array(entry['levels'][0][0]), entry['width'], entry['height'])
+
+    def mipmaps(self, filepath, flip):
+        """
+        [(pixeles, ancho, alto), ...] de los niveles 1..n precalculados de
+        la textura, o None si el bundle no los trae.
+        """
+        key = texture_key(self.relpath(filepath), flip)
+        entry = self.toc['textures'].get(key)
+        if entry is None or len(entry['levels']) < 2 or not self.is_fresh(key, entry['deps']):
+            return None
+        return [(self.array(spec), width, height) for spec, width, height in entry['levels'][1:]]
+
+    def stats(self):
+        return {
+            'meshes': len(self.toc['meshes']),
+            'textures': len(self.toc['textures']),
+            'bytes': len(self.mm),
+            'hits': self.hits,
+            'misses': self.misses,
+        }
+
+    def close(self):
+        mm = getattr(self, 'mm', None)
+        if mm is not None:
+            try:
+                mm.close()
+            except BufferError:
+                # Quedan vistas NumPy vivas; el mapeo se libera con ellas
+                pass
+        self.file.close()
+
+
+def open_bundle(path):
+    """
+    Abre el bundle y hace que OBJ y el registro de texturas carguen de el
+    antes que de los archivos sueltos.
+    """
+    bundle = Bundle(path)
+    OBJ.bundle = bundle
+    texture_registry.bundle = bundle
+    return bundle
+
+
+def close_bundle():
+    bundle = OBJ.bundle
+    OBJ.bundle = None
+    texture_registry.bundle = None
+    if bundle is not None:
+        bundle.close()
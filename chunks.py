@@ -0,0 +1,275 @@
+import math
+import time
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+from OpenGL.GL import glPushMatrix, glPopMatrix, glMultMatrixf
+
+from objloader import OBJ
+
+
+def world_positions(obj, matrix):
+    """
+    Vertices de 'obj' en coordenadas del mundo con 'matrix' (4x4
+    column-major), como arreglo (N, 3) en float64.
+    """
+    positions = np.frombuffer(obj.vertices, dtype=np.float32).reshape(-1, 3).astype(np.float64)
+    m = np.array(list(matrix), dtype=np.float64).reshape(4, 4).T
+    return positions @ m[:3, :3].T + m[:3, 3]
+
+
+def split_faces(obj, world, tile_size, bounds):
+    """
+    Asigna cada cara a la celda (col, row) de una rejilla de 'tile_size'
+    sobre el plano XZ que contiene su centroide en el mundo. Como en
+    SpatialHash, lo que cae fuera de 'bounds' va a la celda del borde.
+    Devuelve {(col, row): indices de cara en orden}.
+    """
+    x_min, x_max, z_min, z_max = bounds
+    cols = max(1, int(math.ceil((x_max - x_min) / tile_size)))
+    rows = max(1, int(math.ceil((z_max - z_min) / tile_size)))
+    offsets = np.frombuffer(obj.face_offsets, dtype=np.uint32).astype(np.int64)
+    sizes = np.diff(offsets)
+    face_of = np.repeat(np.arange(len(sizes)), sizes)
+    corners = world[np.frombuffer(obj.face_v, dtype=np.int32) - 1]
+    count = np.maximum(sizes, 1)
+    cx = np.bincount(face_of, weights=corners[:, 0], minlength=len(sizes)) / count
+    cz = np.bincount(face_of, weights=corners[:, 2], minlength=len(sizes)) / count
+    col = np.clip(np.floor((cx - x_min) / tile_size), 0, cols - 1).astype(np.int64)
+    row = np.clip(np.floor((cz - z_min) / tile_size), 0, rows - 1).astype(np.int64)
+    cell = row * cols + col
+    order = np.argsort(cell, kind='stable')
+    found, starts = np.unique(cell[order], return_index=True)
+    return {(int(c % cols), int(c // cols)): faces
+            for c, faces in zip(found.tolist(), np.split(order, starts[1:]))}
+
+
+def face_corners(obj, faces):
+    """
+    Tamaños de las caras 'faces' y los indices de todas sus esquinas en
+    face_v/face_vn/face_vt, en orden.
+    """
+    offsets = np.frombuffer(obj.face_offsets, dtype=np.uint32).astype(np.int64)
+    sizes = offsets[faces + 1] - offsets[faces]
+    return sizes, np.repeat(offsets[faces] - (np.cumsum(sizes) - sizes), sizes) + np.arange(int(sizes.sum()))
+
+
+def _compact(index, values, width):
+    """
+    Reindexa 'index' (base 1, 0 = sin dato) para que apunte solo a las
+    filas de 'values' que usa. Devuelve (filas usadas, indices nuevos).
+    """
+    used = np.unique(index[index > 0])
+    rows = np.frombuffer(values, dtype=np.float32).reshape(-1, width)[used - 1]
+    new = np.where(index > 0, np.searchsorted(used, index) + 1, 0)
+    return rows.reshape(-1), new.astype(np.int32)
+
+
+def tile_geometry(obj, faces):
+    """
+    Geometria para OBJ.fromGeometry con solo las caras 'faces' de 'obj' y
+    los vertices, normales y texcoords que usan. Los materiales se
+    comparten con la malla original.
+    """
+    sizes, corners = face_corners(obj, faces)
+    vertices, face_v = _compact(np.frombuffer(obj.face_v, dtype=np.int32)[corners], obj.vertices, 3)
+    normals, face_vn = _compact(np.frombuffer(obj.face_vn, dtype=np.int32)[corners], obj.normals, 3)
+    texcoords, face_vt = _compact(np.frombuffer(obj.face_vt, dtype=np.int32)[corners], obj.texcoords, 2)
+    return {
+        'vertices': vertices,
+        'normals': normals,
+        'texcoords': texcoords,
+        'face_sizes': sizes.astype(np.uint32),
+        'face_v': face_v,
+        'face_vn': face_vn,
+        'face_vt': face_vt,
+        'face_mtl': np.frombuffer(obj.face_mtl, dtype=np.int32)[faces],
+        'material_names': obj.material_names,
+    }
+
+
+class Tile:
+    """
+    Un trozo del mundo: su malla (en coordenadas del modelo, se dibuja con
+    la matriz del mundo completo) y su caja en coordenadas del mundo. Los
+    buffers de generate() se calculan una sola vez (OBJ.prepare) y quedan
+    en CPU; load() los sube a la GPU y unload() los suelta.
+    """
+    __slots__ = ('key', 'mesh', 'prepared', 'bounds_min', 'bounds_max', 'loaded')
+
+    def __init__(self, key, mesh, bounds_min, bounds_max):
+        self.key = key
+        self.mesh = mesh
+        self.bounds_min = bounds_min
+        self.bounds_max = bounds_max
+        self.loaded = False
+        mesh.prepare()
+        prepared = mesh.prepared
+        if prepared[2] is not None:
+            # Con index buffer no hacen falta los triangulos sueltos
+            prepared = (prepared[0], None, prepared[2])
+        self.prepared = prepared
+        mesh.dropGeometry(force=True)
+
+    def distance(self, x, z):
+        """
+        Distancia en XZ de (x, z) al rectangulo del trozo (0 si esta dentro).
+        """
+        dx = max(self.bounds_min[0] - x, 0.0, x - self.bounds_max[0])
+        dz = max(self.bounds_min[2] - z, 0.0, z - self.bounds_max[2])
+        return math.sqrt(dx * dx + dz * dz)
+
+    def load(self):
+        if not self.loaded:
+            self.mesh.prepared = self.prepared
+            self.mesh.generate()
+            self.loaded = True
+
+    def unload(self):
+        if self.loaded:
+            self.mesh.free()
+            self.loaded = False
+
+
+class ChunkedWorld:
+    """
+    Escenario grande dividido en una rejilla de trozos sobre el plano XZ.
+    Cada trozo es su propia malla (VBO o display list) y solo esta en la
+    GPU mientras el foco (el robot) esta cerca:
+
+    - se dibuja si esta a menos de 'view_radius' y dentro del frustum;
+    - se sube a la GPU al entrar en 'load_radius' (un poco mas que la
+      vista, para tenerlo listo antes de verlo), los mas cercanos primero
+      y con un presupuesto de tiempo por fotograma;
+    - se suelta al salir de 'unload_radius', mas lejos que load_radius
+      para no subir y soltar el mismo trozo al caminar por el borde.
+
+    La division (y el indexado de cada trozo) no llama a OpenGL, asi que
+    se puede construir en un hilo de carga; la malla original solo
+    conserva sus texturas.
+    """
+    def __init__(self, mesh, matrix, tile_size, bounds, view_radius,
+                 load_margin=None, unload_margin=None, budget=0.002):
+        self.source = mesh
+        self.matrix = matrix
+        self.tile_size = float(tile_size)
+        self.x_min, self.x_max, self.z_min, self.z_max = bounds
+        self.cols = max(1, int(math.ceil((self.x_max - self.x_min) / self.tile_size)))
+        self.rows = max(1, int(math.ceil((self.z_max - self.z_min) / self.tile_size)))
+        self.view_radius = view_radius
+        self.load_radius = view_radius + (self.tile_size * 0.5 if load_margin is None else load_margin)
+        self.unload_radius = self.load_radius + (self.tile_size if unload_margin is None else unload_margin)
+        self.budget = budget   # segundos de subidas por fotograma
+        self.tiles = {}        # (col, row) -> Tile
+        self.loaded = {}       # (col, row) -> Tile en la GPU
+        self.stats = {'tiles': 0, 'loaded': 0, 'drawn': 0, 'culled': 0,
+                      'uploads': 0, 'unloads': 0, 'pending': 0}
+        if mesh.faceCount():
+            self.split(mesh)
+        self.stats['tiles'] = len(self.tiles)
+        # Los trozos tienen su propia copia compacta de la geometria
+        mesh.dropGeometry(force=True)
+
+    def split(self, mesh):
+        world = world_positions(mesh, self.matrix)
+        bounds = (self.x_min, self.x_max, self.z_min, self.z_max)
+        for key, faces in split_faces(mesh, world, self.tile_size, bounds).items():
+            tile_mesh = OBJ.fromGeometry(tile_geometry(mesh, faces), mesh.mtl, defer_gl=True)
+            # Caja del trozo en el mundo: las caras que cruzan el borde de
+            # la celda la agrandan
+            _, corners = face_corners(mesh, faces)
+            points = world[np.frombuffer(mesh.face_v, dtype=np.int32)[corners] - 1]
+            self.tiles[key] = Tile(key, tile_mesh, tuple(points.min(axis=0).tolist()),
+                                   tuple(points.max(axis=0).tolist()))
+
+    def nearby(self, x, z, radius):
+        """
+        Trozos cuyas celdas toca el circulo de 'radius' alrededor de (x, z).
+        """
+        inv = 1.0 / self.tile_size
+        col0 = max(int(math.floor((x - radius - self.x_min) * inv)), 0)
+        col1 = min(int(math.floor((x + radius - self.x_min) * inv)), self.cols - 1)
+        row0 = max(int(math.floor((z - radius - self.z_min) * inv)), 0)
+        row1 = min(int(math.floor((z + radius - self.z_min) * inv)), self.rows - 1)
+        tiles = self.tiles
+        for row in range(row0, row1 + 1):
+            for col in range(col0, col1 + 1):
+                tile = tiles.get((col, row))
+                if tile is not None:
+                    yield tile
+
+    def update(self, x, z, budget=None):
+        """
+        Llamar una vez por fotograma con la posicion del foco. Suelta los
+        trozos lejanos y sube los cercanos que falten hasta agotar el
+        presupuesto (al menos uno por llamada).
+        """
+        for key, tile in list(self.loaded.items()):
+            if tile.distance(x, z) > self.unload_radius:
+                tile.unload()
+                del self.loaded[key]
+                self.stats['unloads'] += 1
+
+        # Los trozos de los bordes pueden tener cajas mas grandes que su
+        # celda; se busca con el margen de un trozo
+        wanted = []
+        for tile in self.nearby(x, z, self.load_radius + self.tile_size):
+            if not tile.loaded:
+                d = tile.distance(x, z)
+                if d <= self.load_radius:
+                    wanted.append((d, tile))
+        wanted.sort(key=lambda item: item[0])
+
+        budget = self.budget if budget is None else budget
+        start = time.perf_counter()
+        uploaded = 0
+        for _, tile in wanted:
+            tile.load()
+            self.loaded[tile.key] = tile
+            uploaded += 1
+            if time.perf_counter() - start >= budget:
+                break
+        self.stats['uploads'] += uploaded
+        self.stats['pending'] = len(wanted) - uploaded
+        self.stats['loaded'] = len(self.loaded)
+
+    def draw(self, x, z, frustum=None):
+        """
+        Dibuja los trozos en la GPU a menos de view_radius de (x, z) que
+        esten dentro del frustum (en coordenadas del mundo). Devuelve
+        cuantos se dibujaron.
+        """
+        drawn = culled = 0
+        glPushMatrix()
+        glMultMatrixf(self.matrix)
+        for tile in self.loaded.values():
+            if tile.distance(x, z) > self.view_radius or (
+                    frustum is not None and not frustum.aabb_visible(tile.bounds_min, tile.bounds_max)):
+                culled += 1
+                continue
+            tile.mesh.render()
+            drawn += 1
+        glPopMatrix()
+        self.stats['drawn'] = drawn
+        self.stats['culled'] = culled
+        return drawn
+
+    def free(self):
+        for tile in self.tiles.values():
+            tile.unload()
+        self.loaded.clear()
+        self.stats['loaded'] = 0
+        # La malla original es la duena de las texturas compartidas
+        self.source.free()
+
+
+def load_world(filepath, matrix, tile_size, bounds, view_radius, swapyz=False, **params):
+    """
+    Carga un OBJ y lo divide en trozos; ninguno se sube a la GPU hasta el
+    primer update().
+    """
+    mesh = OBJ(filepath, swapyz=swapyz, defer_gl=True)
+    mesh.uploadTextures()
+    return ChunkedWorld(mesh, matrix, tile_size, bounds, view_radius, **params)
@@ -0,0 +1,233 @@
+"""
+Compilador de assets: recorre obj/ y texturas/ y escribe un solo bundle
+binario (ver bundle.py) con las mallas ya parseadas, indexadas y con sus
+niveles de detalle, las tablas de materiales y las texturas decodificadas
+con su cadena de mipmaps. main.py lo usa si existe ASSET_BUNDLE; no hace
+falta OpenGL para compilarlo.
+
+Uso (desde la raiz del repositorio):
+    python compile_assets.py [--out assets.bundle] [--no-mipmaps] [--no-lod] [obj texturas]
+"""
+import os
+import sys
+import json
+import time
+import hashlib
+import argparse
+
+import numpy as np
+import pygame
+
+from objloader import OBJ, VERTEX_FLOATS, _file_key
+from lod import build_lods, DEFAULT_LOD_CELLS
+from bundle import (BUNDLE_MAGIC, BUNDLE_VERSION, BUNDLE_HEADER, BUNDLE_ALIGN,
+                    GEOMETRY_SECTIONS, mesh_key, texture_key)
+
+IMAGE_EXTENSIONS = ('.bmp', '.png', '.jpg', '.jpeg', '.tga')
+
+
+class BundleWriter:
+    """
+    Junta los arreglos binarios del bundle, alineados a BUNDLE_ALIGN. Los
+    arreglos identicos (p. ej. las normales que comparten los niveles de
+    detalle) se guardan una sola vez.
+    """
+    def __init__(self):
+        self.chunks = []
+        self.size = 0
+        self.seen = {}
+
+    def add(self, values, dtype):
+        """
+        Agrega un arreglo y devuelve su [desplazamiento, dtype, cantidad].
+        """
+        data = np.ascontiguousarray(values, dtype=dtype).reshape(-1)
+        raw = data.tobytes()
+        digest = (data.dtype.str, hashlib.sha1(raw).digest())
+        spec = self.seen.get(digest)
+        if spec is not None:
+            return spec
+        pad = -self.size % BUNDLE_ALIGN
+        if pad:
+            self.chunks.append(b'\0' * pad)
+            self.size += pad
+        spec = self.seen[digest] = [self.size, data.dtype.str, int(data.size)]
+        self.chunks.append(raw)
+        self.size += len(raw)
+        return spec
+
+    def write(self, path, toc):
+        # El indice se rellena para que los datos empiecen alineados
+        meta = json.dumps(toc).encode('utf-8')
+        meta += b' ' * (-(BUNDLE_HEADER.size + len(meta)) % BUNDLE_ALIGN)
+        tmp = path + '.tmp'
+        with open(tmp, 'wb') as f:
+            f.write(BUNDLE_HEADER.pack(BUNDLE_MAGIC, BUNDLE_VERSION, len(meta)))
+            f.write(meta)
+            for chunk in self.chunks:
+                f.write(chunk)
+        os.replace(tmp, path)
+        return BUNDLE_HEADER.size + len(meta) + self.size
+
+
+def relative(path, root):
+    return os.path.relpath(os.path.abspath(path), root).replace(os.sep, '/')
+
+
+def dependency(path, root):
+    dep = _file_key(path)
+    dep['path'] = relative(path, root)
+    return dep
+
+
+def find_files(roots, extensions):
+    found = []
+    for top in roots:
+        for dirpath, dirnames, filenames in os.walk(top):
+            dirnames.sort()
+            for name in sorted(filenames):
+                if name.lower().endswith(extensions):
+                    found.append(os.path.join(dirpath, name))
+    return found
+
+
+def mip_chain(pixels, width, height):
+    """
+    Mipmaps 1..n (hasta 1x1) de una imagen RGBA con filtro de caja de
+    2x2, calculados en float para no acumular redondeos entre niveles.
+    """
+    image = np.frombuffer(pixels, dtype=np.uint8).reshape(height, width, 4).astype(np.float32)
+    levels = []
+    while width > 1 or height > 1:
+        w, h = max(1, width // 2), max(1, height // 2)
+        image = image[:h * 2 if height > 1 else 1, :w * 2 if width > 1 else 1]
+        image = image.reshape(h, image.shape[0] // h, w, image.shape[1] // w, 4).mean(axis=(1, 3))
+        width, height = w, h
+        levels.append((np.rint(image).astype(np.uint8), width, height))
+    return levels
+
+
+def compile_mesh(writer, filename, root, swapyz, lod_cells):
+    mesh = OBJ(filename, swapyz=swapyz, defer_gl=True)
+    levels = build_lods(mesh, lod_cells, defer_gl=True) if lod_cells else [mesh]
+    deps = [dependency(filename, root)]
+    if mesh.mtllib:
+        deps.append(dependency(mesh.mtllib, root))
+    entry = {
+        'deps': deps,
+        'mtllib': relative(mesh.mtllib, root) if mesh.mtllib else None,
+        'materials': {name: {k: v for k, v in mtl.items() if k != 'texture_Kd'}
+                      for name, mtl in mesh.mtl.items()},
+        'material_names': mesh.material_names,
+        'lod_cells': list(lod_cells or ()),
+        'levels': [],
+    }
+    for level in levels:
+        data = {
+            'vertices': level.vertices, 'normals': level.normals, 'texcoords': level.texcoords,
+            'face_sizes': level.faceSizes(), 'face_v': level.face_v, 'face_vn': level.face_vn,
+            'face_vt': level.face_vt, 'face_mtl': level.face_mtl,
+        }
+        types = {'face_sizes': np.uint32, 'face_v': np.int32, 'face_vn': np.int32,
+                 'face_vt': np.int32, 'face_mtl': np.int32}
+        vertices, indices, batches, stats = level.indexTriangles(level.triangles())
+        entry['levels'].append({
+            'faces': level.faceCount(),
+            'arrays': {name: writer.add(data[name], types.get(name, np.float32))
+                       for name in GEOMETRY_SECTIONS},
+            'indexed': {
+                'vertices': writer.add(vertices, np.float32),
+                'indices': writer.add(indices, indices.dtype),
+                'batches': [list(batch) for batch in batches],
+                'stats': stats,
+            },
+        })
+    return entry
+
+
+def compile_texture(writer, filename, root, flip, mipmaps):
+    surf = pygame.image.load(filename)
+    pixels = pygame.image.tostring(surf, 'RGBA', flip)
+    width, height = surf.get_rect().size
+    levels = [[writer.add(np.frombuffer(pixels, dtype=np.uint8), np.uint8), width, height]]
+    if mipmaps:
+        for data, w, h in mip_chain(pixels, width, height):
+            levels.append([writer.add(data, np.uint8), w, h])
+    return {'deps': [dependency(filename, root)], 'width': width, 'height': height,
+            'levels': levels}
+
+
+def compile_bundle(out, roots=('obj', 'texturas'), swapyz=True,
+                   lod_cells=DEFAULT_LOD_CELLS, mipmaps=True, verbose=True):
+    """
+    Escribe el bundle 'out' con todos los .obj, .mtl e imagenes bajo
+    'roots'. Las rutas se guardan relativas al directorio de 'out'.
+    Devuelve el indice escrito.
+    """
+    root = os.path.dirname(os.path.abspath(out))
+    writer = BundleWriter()
+    toc = {
+        'byteorder': sys.byteorder,
+        'vertex_floats': VERTEX_FLOATS,
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'meshes': {},
+        'materials': {},
+        'textures': {},
+    }
+
+    # Las imagenes de los materiales se usan volteadas (como en
+    # OBJ.loadTexture); las sueltas, como el cielo, sin voltear.
+    flipped = set()
+    for filename in find_files(roots, ('.mtl',)):
+        contents = OBJ.readMaterial(filename)
+        toc['materials'][relative(filename, root)] = {
+            'deps': [dependency(filename, root)], 'contents': contents}
+        for mtl in contents.values():
+            if 'map_Kd' in mtl:
+                flipped.add(os.path.abspath(os.path.join(os.path.dirname(filename), mtl['map_Kd'])))
+
+    for filename in find_files(roots, ('.obj',)):
+        start = time.perf_counter()
+        try:
+            entry = compile_mesh(writer, filename, root, swapyz, lod_cells)
+        except (OSError, ValueError) as e:
+            print(f"Error: No se pudo compilar {filename} ({e})")
+            continue
+        toc['meshes'][mesh_key(relative(filename, root), swapyz)] = entry
+        if verbose:
+            faces = [level['faces'] for level in entry['levels']]
+            print(f"  {relative(filename, root):<28} caras {faces}  "
+                  f"{(time.perf_counter() - start) * 1e3:.0f} ms")
+
+    for filename in find_files(roots, IMAGE_EXTENSIONS):
+        flip = os.path.abspath(filename) in flipped
+        try:
+            entry = compile_texture(writer, filename, root, flip, mipmaps)
+        except (OSError, pygame.error) as e:
+            print(f"Error: No se pudo compilar {filename} ({e})")
+            continue
+        toc['textures'][texture_key(relative(filename, root), flip)] = entry
+        if verbose:
+            print(f"  {relative(filename, root):<28} {entry['width']}x{entry['height']}  "
+                  f"niveles {len(entry['levels'])}")
+
+    size = writer.write(out, toc)
+    if verbose:
+        print(f"{out}: {len(toc['meshes'])} mallas, {len(toc['materials'])} materiales, "
+              f"{len(toc['textures'])} texturas, {size / 1024:.0f} KiB")
+    return toc
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('roots', nargs='*', default=['obj', 'texturas'])
+    parser.add_argument('--out', default='assets.bundle')
+    parser.add_argument('--no-mipmaps', action='store_true')
+    parser.add_argument('--no-lod', action='store_true')
+    args = parser.parse_args()
+    compile_bundle(args.out, args.roots, lod_cells=None if args.no_lod else DEFAULT_LOD_CELLS,
+                   mipmaps=not args.no_mipmaps)
+
+
+if __name__ == '__main__':
+    main()
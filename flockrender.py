@@ -0,0 +1,193 @@
+import ctypes
+
+from OpenGL.GL import *
+from OpenGL.GL import shaders
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Reproduce la iluminacion del pipeline fijo (GL_LIGHT0 + GL_COLOR_MATERIAL,
+# sin especular) con la matriz del modelo leida de 4 atributos por instancia.
+VERTEX_SHADER = """
+#version 120
+attribute vec4 inst0;
+attribute vec4 inst1;
+attribute vec4 inst2;
+attribute vec4 inst3;
+varying vec4 color;
+varying vec2 uv;
+void main() {
+    mat4 model = mat4(inst0, inst1, inst2, inst3);
+    vec4 eye = gl_ModelViewMatrix * (model * gl_Vertex);
+    // Igual que el pipeline fijo sin GL_NORMALIZE: la normal se transforma
+    // con la inversa transpuesta (para rotacion + escala uniforme s, M / s^2).
+    vec3 n = gl_NormalMatrix * (mat3(model) * gl_Normal) / dot(inst0.xyz, inst0.xyz);
+    vec3 l = normalize(gl_LightSource[0].position.xyz - eye.xyz);
+    float d = max(dot(n, l), 0.0);
+    vec4 light = gl_LightModel.ambient + gl_LightSource[0].ambient
+               + gl_LightSource[0].diffuse * d;
+    color = vec4(clamp(gl_Color.rgb * light.rgb, 0.0, 1.0), gl_Color.a);
+    uv = gl_MultiTexCoord0.xy;
+    gl_Position = gl_ProjectionMatrix * eye;
+}
+"""
+
+FRAGMENT_SHADER = """
+#version 120
+uniform sampler2D texture;
+uniform int textured;
+varying vec4 color;
+varying vec2 uv;
+void main() {
+    gl_FragColor = textured != 0 ? color * texture2D(texture, uv) : color;
+}
+"""
+
+
+def instancing_supported():
+    """
+    True si hay NumPy y el contexto expone glDrawArraysInstanced,
+    glDrawElementsInstanced y glVertexAttribDivisor (GL 3.3 o
+    ARB_instanced_arrays).
+    """
+    if np is None:
+        return False
+    try:
+        return (bool(glDrawArraysInstanced) and bool(glDrawElementsInstanced)
+                and bool(glVertexAttribDivisor))
+    except Exception:
+        return False
+
+
+class FlockRenderer:
+    """
+    Dibuja muchas gallinas agrupando por malla en lugar de por gallina.
+    Reune la matriz del cuerpo y de cada parte de todas las gallinas y
+    dibuja cada malla (cuerpo, patas, alas) con una sola llamada
+    instanciada. Si no hay instanciado disponible, o la malla no tiene VBO,
+    recorre las instancias de cada malla con un solo bind por malla.
+    """
+    def __init__(self, instancing=None):
+        if instancing is None:
+            instancing = instancing_supported()
+        self.instancing = instancing
+        self.program = None
+        self.instance_vbo = 0
+        self.stats = {}
+        if self.instancing:
+            try:
+                self.setupInstancing()
+            except Exception as e:
+                print(f"Instanciado no disponible, se usa el modo por lotes: {e}")
+                self.instancing = False
+
+    def setupInstancing(self):
+        self.program = shaders.compileProgram(
+            shaders.compileShader(VERTEX_SHADER, GL_VERTEX_SHADER),
+            shaders.compileShader(FRAGMENT_SHADER, GL_FRAGMENT_SHADER))
+        self.attribs = [glGetAttribLocation(self.program, f"inst{i}") for i in range(4)]
+        self.u_textured = glGetUniformLocation(self.program, "textured")
+        self.instance_vbo = glGenBuffers(1)
+
+    def gather(self, gallinas):
+        """
+        Agrupa por malla las matrices de todas las gallinas. Devuelve una
+        lista de (malla, [matrices del cuerpo], [matrices locales o None]).
+        """
+        groups = {}
+
+        def add(obj, body, local):
+            # Con un MeshHandle se agrupa por el nivel de detalle activo
+            mesh = obj.current() if hasattr(obj, 'current') else obj
+            group = groups.get(id(mesh))
+            if group is None:
+                group = groups[id(mesh)] = (mesh, [], [])
+            group[1].append(body)
+            group[2].append(local)
+
+        for gallina in gallinas:
+            if not gallina.obj:
+                continue
+            body = gallina.local_matrix()
+            add(gallina.obj, body, None)
+            for obj, local in gallina.parts():
+                if obj:
+                    add(obj, body, local)
+        return list(groups.values())
+
+    def draw(self, gallinas):
+        groups = self.gather(gallinas)
+        self.stats = {'instances': 0, 'meshes': len(groups), 'draw_calls': 0,
+                      'mode': 'instanced' if self.instancing else 'batched'}
+        for mesh, bodies, locals_ in groups:
+            self.stats['instances'] += len(bodies)
+            if self.instancing and mesh.vbo:
+                self.drawInstanced(mesh, bodies, locals_)
+            else:
+                self.drawBatched(mesh, bodies, locals_)
+
+    def drawBatched(self, mesh, bodies, locals_):
+        if mesh.vbo:
+            mesh.bindVBO()
+        for body, local in zip(bodies, locals_):
+            glPushMatrix()
+            glMultMatrixf(body)
+            if local is not None:
+                glMultMatrixf(local)
+            if mesh.vbo:
+                mesh.drawBatches()
+                self.stats['draw_calls'] += len(mesh.batches)
+            else:
+                glCallList(mesh.gl_list)
+                self.stats['draw_calls'] += 1
+            glPopMatrix()
+        if mesh.vbo:
+            mesh.unbindVBO()
+
+    def instanceMatrices(self, bodies, locals_):
+        # Las listas column-major leidas como filas son la transpuesta, asi
+        # que (B * L)^T = L^T * B^T.
+        world = np.asarray(bodies, dtype=np.float32).reshape(-1, 4, 4)
+        if locals_[0] is not None:
+            world = np.matmul(np.asarray(locals_, dtype=np.float32).reshape(-1, 4, 4), world)
+        return np.ascontiguousarray(world.reshape(-1, 16))
+
+    def drawInstanced(self, mesh, bodies, locals_):
+        data = self.instanceMatrices(bodies, locals_)
+        count = len(data)
+
+        glUseProgram(self.program)
+        glBindBuffer(GL_ARRAY_BUFFER, self.instance_vbo)
+        glBufferData(GL_ARRAY_BUFFER, data.nbytes, data, GL_STREAM_DRAW)
+        for i, loc in enumerate(self.attribs):
+            glEnableVertexAttribArray(loc)
+            glVertexAttribPointer(loc, 4, GL_FLOAT, GL_FALSE, 64, ctypes.c_void_p(16 * i))
+            glVertexAttribDivisor(loc, 1)
+
+        mesh.bindVBO()
+        for material, first, n in mesh.batches:
+            mesh.applyMaterial(material, mesh.no_textures)
+            textured = not mesh.no_textures and 'texture_Kd' in mesh.mtl[material]
+            glUniform1i(self.u_textured, int(textured))
+            if mesh.ibo:
+                glDrawElementsInstanced(GL_TRIANGLES, n, mesh.index_type,
+                                        ctypes.c_void_p(first * mesh.index_size), count)
+            else:
+                glDrawArraysInstanced(GL_TRIANGLES, first, n, count)
+            self.stats['draw_calls'] += 1
+        mesh.unbindVBO()
+
+        for loc in self.attribs:
+            glVertexAttribDivisor(loc, 0)
+            glDisableVertexAttribArray(loc)
+        glUseProgram(0)
+
+    def free(self):
+        if self.instance_vbo:
+            glDeleteBuffers(1, [self.instance_vbo])
+            self.instance_vbo = 0
+        if self.program:
+            glDeleteProgram(self.program)
+            self.program = None
@@ -0,0 +1,124 @@
+import math
+
+import numpy as np
+
+
+class Flock:
+    """
+    Simulacion de N gallinas en estructura de arreglos (SoA). Posicion,
+    rumbo, velocidades y el estado de marcha de las patas y de aleteo de
+    las alas viven en arreglos NumPy contiguos, y step() avanza a todas
+    las gallinas a la vez con las mismas reglas que Gallina.move,
+    Pata.update y Ala.update.
+
+    Las dos patas (y las dos alas) de una gallina reciben siempre el mismo
+    is_moving y parten del mismo estado, asi que basta un estado por
+    gallina; el lado derecho solo invierte el angulo al dibujar.
+    """
+    def __init__(self, count, positions=None, rotations=None):
+        self.count = count
+        self.position = np.zeros((count, 3), dtype=np.float64)
+        if positions is not None:
+            self.position[:] = positions
+        self.rotation_y = np.zeros(count, dtype=np.float64)
+        if rotations is not None:
+            self.rotation_y[:] = rotations
+
+        # Mismos valores por defecto que Gallina, Pata y Ala
+        self.speed = np.full(count, 0.5)
+        self.turn_speed = np.full(count, 1.5)
+
+        self.march_angle = np.zeros(count)
+        self.march_direction = np.ones(count)
+        self.march_speed = 4.0
+        self.march_max_angle = 20.0
+        self.return_speed = 6.0
+
+        self.flap_phase = np.zeros(count)
+        self.flap_direction = np.ones(count)
+        self.flap_speed = 3.0
+        self.flap_max_angle = 30.0
+
+    @classmethod
+    def from_gallinas(cls, gallinas):
+        """
+        Copia el estado de una lista de Gallina a un Flock.
+        """
+        flock = cls(len(gallinas),
+                    positions=[g.position for g in gallinas],
+                    rotations=[g.rotation_y for g in gallinas])
+        flock.speed[:] = [g.speed for g in gallinas]
+        flock.turn_speed[:] = [g.turn_speed for g in gallinas]
+        flock.march_angle[:] = [g.pata_izq.march_angle for g in gallinas]
+        flock.march_direction[:] = [g.pata_izq.march_direction for g in gallinas]
+        flock.flap_phase[:] = [g.ala_izq.flap_phase for g in gallinas]
+        flock.flap_direction[:] = [g.ala_izq.flap_direction for g in gallinas]
+        return flock
+
+    def apply_to(self, gallinas):
+        """
+        Escribe el estado de vuelta en objetos Gallina (p. ej. para dibujar
+        con Gallina.draw o FlockRenderer).
+        """
+        positions = self.position.tolist()
+        rotations = self.rotation_y.tolist()
+        march = self.march_angle.tolist()
+        march_dir = self.march_direction.astype(int).tolist()
+        flap = self.flap_phase.tolist()
+        flap_dir = self.flap_direction.astype(int).tolist()
+        for i, g in enumerate(gallinas):
+            g.position = positions[i]
+            g.rotation_y = rotations[i]
+            for pata in (g.pata_izq, g.pata_der):
+                pata.march_angle = march[i]
+                pata.march_direction = march_dir[i]
+            for ala in (g.ala_izq, g.ala_der):
+                ala.flap_phase = flap[i]
+                ala.flap_direction = flap_dir[i]
+
+    def step(self, left, right, up, down):
+        """
+        Avanza un tick. left/right/up/down son arreglos booleanos (o
+        escalares) con las teclas de cada gallina.
+        """
+        left = np.broadcast_to(left, (self.count,))
+        right = np.broadcast_to(right, (self.count,))
+        up = np.broadcast_to(up, (self.count,))
+        down = np.broadcast_to(down, (self.count,))
+
+        self.rotation_y += np.where(left, self.turn_speed, 0.0)
+        self.rotation_y -= np.where(right, self.turn_speed, 0.0)
+
+        rad = self.rotation_y * (math.pi / 180.0)
+        dir_x = np.cos(rad)
+        dir_z = -np.sin(rad)
+
+        step = np.where(up, self.speed, 0.0)
+        self.position[:, 0] += dir_x * step
+        self.position[:, 2] += dir_z * step
+        step = np.where(down, self.speed, 0.0)
+        self.position[:, 0] -= dir_x * step
+        self.position[:, 2] -= dir_z * step
+
+        is_moving = up | down
+        self.march_angle, self.march_direction = _oscillate(
+            self.march_angle, self.march_direction, is_moving,
+            self.march_speed, self.march_max_angle, self.return_speed)
+        self.flap_phase, self.flap_direction = _oscillate(
+            self.flap_phase, self.flap_direction, is_moving,
+            self.flap_speed, self.flap_max_angle, self.flap_speed)
+
+
+def _oscillate(angle, direction, is_moving, speed, max_angle, return_speed):
+    """
+    Version vectorizada de Pata.update / Ala.update: si se mueve, avanza el
+    angulo e invierte la direccion al pasar el limite; si no, regresa
+    hacia 0 a 'return_speed' por tick.
+    """
+    moving_angle = angle + speed * direction
+    flip = is_moving & (np.abs(moving_angle) > max_angle)
+    returning = np.where(np.abs(angle) > return_speed,
+                         angle - np.copysign(return_speed, angle), 0.0)
+    new_angle = np.where(is_moving, moving_angle, returning)
+    new_direction = np.where(flip, -direction, direction)
+    return new_angle, new_direction
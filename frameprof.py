@@ -0,0 +1,142 @@
+import csv
+import json
+import time
+from collections import deque
+
+
+def percentile(sorted_values, p):
+    """
+    Percentil 'p' (0-100) por rango mas cercano de una lista ordenada.
+    """
+    if not sorted_values:
+        return 0.0
+    index = int(round(p / 100.0 * (len(sorted_values) - 1)))
+    return sorted_values[index]
+
+
+class FrameProfiler:
+    """
+    Perfilador por fotograma. El bucle llama a begin_frame() al empezar,
+    lap(nombre) al terminar cada fase y end_frame() al final; cada lap
+    cuesta dos perf_counter y un append. Se guardan los ultimos 'window'
+    fotogramas por fase para los percentiles p50/p95/p99, y hasta
+    'keep_frames' fotogramas completos para exportar a Chrome trace
+    (chrome://tracing, Perfetto) o CSV. Por defecto no se guardan: solo
+    hacen falta si despues se llama a write().
+    """
+    def __init__(self, window=600, keep_frames=0):
+        self.enabled = True
+        self.window = window
+        self.keep_frames = keep_frames
+        self.samples = {}   # fase -> deque de milisegundos
+        self.order = []     # fases en el orden en que aparecen
+        self.frames = []    # (numero, [(fase, inicio, fin)]) en segundos
+        self.frame_count = 0
+        self.frame_start = 0.0
+        self.last = 0.0
+        self.laps = []
+        self.origin = time.perf_counter()
+        self.overlay = False
+        self.overlay_refresh = 30
+        self.overlay_lines = []
+
+    def begin_frame(self):
+        if not self.enabled:
+            return
+        self.frame_start = self.last = time.perf_counter()
+        self.laps = []
+
+    def lap(self, name):
+        """
+        Cierra la fase 'name': el tiempo desde el lap anterior (o desde
+        begin_frame).
+        """
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        self.laps.append((name, self.last, now))
+        self.last = now
+
+    def end_frame(self):
+        if not self.enabled:
+            return
+        end = time.perf_counter()
+        laps = self.laps
+        laps.append(('frame', self.frame_start, end))
+        for name, start, stop in laps:
+            samples = self.samples.get(name)
+            if samples is None:
+                samples = self.samples[name] = deque(maxlen=self.window)
+                self.order.append(name)
+            samples.append((stop - start) * 1000.0)
+        if len(self.frames) < self.keep_frames:
+            self.frames.append((self.frame_count, laps))
+        self.frame_count += 1
+
+    def summary(self):
+        """
+        Lista de (fase, p50, p95, p99, max) en milisegundos sobre la
+        ventana actual.
+        """
+        rows = []
+        for name in self.order:
+            values = sorted(self.samples[name])
+            rows.append((name, percentile(values, 50), percentile(values, 95),
+                         percentile(values, 99), values[-1] if values else 0.0))
+        return rows
+
+    def toggle_overlay(self):
+        self.overlay = not self.overlay
+        self.overlay_lines = []
+
+    def draw_overlay(self, hud, x, y, line_height=18, font=None):
+        """
+        Dibuja la tabla de percentiles con el HUD (entre hud.begin() y
+        hud.end()). El texto se recalcula cada 'overlay_refresh'
+        fotogramas para no rasterizar en todos.
+        """
+        if not self.overlay:
+            return
+        if not self.overlay_lines or self.frame_count % self.overlay_refresh == 0:
+            self.overlay_lines = [f"{'fase':<10}{'p50':>7}{'p95':>7}{'p99':>7}"]
+            for name, p50, p95, p99, _ in self.summary():
+                self.overlay_lines.append(f"{name:<10}{p50:7.2f}{p95:7.2f}{p99:7.2f}")
+        for i, line in enumerate(self.overlay_lines):
+            hud.draw_text(line, x, y + i * line_height, font=font)
+
+    def chrome_trace(self):
+        """
+        Eventos en el formato de Chrome trace (fases completas 'X', en
+        microsegundos). Cada fotograma es un evento que contiene a sus fases.
+        """
+        events = []
+        for number, laps in self.frames:
+            for name, start, stop in laps:
+                events.append({
+                    'name': name,
+                    'cat': 'frame',
+                    'ph': 'X',
+                    'ts': (start - self.origin) * 1e6,
+                    'dur': (stop - start) * 1e6,
+                    'pid': 0,
+                    'tid': 0,
+                    'args': {'frame': number},
+                })
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def write(self, path):
+        """
+        Exporta los fotogramas guardados: CSV si 'path' termina en .csv,
+        si no Chrome trace JSON.
+        """
+        if path.endswith('.csv'):
+            with open(path, 'w', newline='') as f:
+                writer = csv.writer(f)
+                writer.writerow(['frame', 'phase', 'start_ms', 'duration_ms'])
+                for number, laps in self.frames:
+                    for name, start, stop in laps:
+                        writer.writerow([number, name, f"{(start - self.origin) * 1000:.3f}",
+                                         f"{(stop - start) * 1000:.3f}"])
+        else:
+            with open(path, 'w') as f:
+                json.dump(self.chrome_trace(), f)
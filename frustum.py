@@ -0,0 +1,114 @@
+import math
+
+from OpenGL.GL import *
+
+
+def _flatten(matrix):
+    # glGetFloatv devuelve un arreglo 4x4 (NumPy) o listas anidadas
+    return [float(v) for row in matrix for v in row]
+
+
+def mat_mul(a, b):
+    """
+    Producto a * b de dos matrices 4x4 column-major (listas de 16).
+    """
+    return [sum(a[k * 4 + row] * b[col * 4 + k] for k in range(4))
+            for col in range(4) for row in range(4)]
+
+
+def transform_point(m, p):
+    x, y, z = p
+    return (m[0] * x + m[4] * y + m[8] * z + m[12],
+            m[1] * x + m[5] * y + m[9] * z + m[13],
+            m[2] * x + m[6] * y + m[10] * z + m[14])
+
+
+def max_scale(m):
+    """
+    Mayor factor de escala de la parte 3x3 (largo maximo de sus columnas).
+    """
+    return math.sqrt(max(m[c] ** 2 + m[c + 1] ** 2 + m[c + 2] ** 2 for c in (0, 4, 8)))
+
+
+def transform_sphere(m, center, radius):
+    return transform_point(m, center), radius * max_scale(m)
+
+
+def merge_spheres(spheres):
+    """
+    Esfera (no minima) que contiene a todas las dadas.
+    """
+    spheres = [s for s in spheres if s is not None]
+    if not spheres:
+        return None
+    (cx, cy, cz), radius = spheres[0]
+    for (x, y, z), r in spheres[1:]:
+        d = math.sqrt((x - cx) ** 2 + (y - cy) ** 2 + (z - cz) ** 2)
+        if d + r <= radius:
+            continue
+        if d + radius <= r:
+            (cx, cy, cz), radius = (x, y, z), r
+            continue
+        new_radius = (d + radius + r) * 0.5
+        t = (new_radius - radius) / d
+        cx, cy, cz = cx + (x - cx) * t, cy + (y - cy) * t, cz + (z - cz) * t
+        radius = new_radius
+    return (cx, cy, cz), radius
+
+
+def part_sphere(mesh, offset):
+    """
+    Esfera que contiene a una parte articulada (brazo, pata, ala) en
+    cualquier angulo: la parte gira sobre su origen, colocado en 'offset'.
+    """
+    if not mesh:
+        return None
+    cx, cy, cz = mesh.bounds_center
+    reach = math.sqrt(cx * cx + cy * cy + cz * cz) + mesh.bounds_radius
+    return tuple(offset), reach
+
+
+class Frustum:
+    """
+    Los 6 planos del volumen de vista en coordenadas del mundo, extraidos de
+    proyeccion * modelview (metodo de Gribb/Hartmann). Cada plano es
+    (a, b, c, d) normalizado, con la normal apuntando hacia adentro.
+    """
+    def __init__(self, projection, modelview):
+        m = mat_mul(projection, modelview)
+        # Filas de la matriz combinada (column-major: fila i = m[i], m[4+i], ...)
+        rows = [[m[col * 4 + i] for col in range(4)] for i in range(4)]
+        planes = []
+        for i in range(3):
+            planes.append([rows[3][k] + rows[i][k] for k in range(4)])
+            planes.append([rows[3][k] - rows[i][k] for k in range(4)])
+        self.planes = []
+        for a, b, c, d in planes:
+            length = math.sqrt(a * a + b * b + c * c) or 1.0
+            self.planes.append((a / length, b / length, c / length, d / length))
+
+    @classmethod
+    def from_gl(cls):
+        """
+        Frustum de las matrices GL_PROJECTION y GL_MODELVIEW actuales. Se
+        llama despues de gluLookAt y antes de aplicar matrices de modelo.
+        """
+        return cls(_flatten(glGetFloatv(GL_PROJECTION_MATRIX)),
+                   _flatten(glGetFloatv(GL_MODELVIEW_MATRIX)))
+
+    def sphere_visible(self, center, radius):
+        x, y, z = center
+        for a, b, c, d in self.planes:
+            if a * x + b * y + c * z + d < -radius:
+                return False
+        return True
+
+    def aabb_visible(self, bounds_min, bounds_max):
+        for a, b, c, d in self.planes:
+            # Vertice de la caja mas adentro en la direccion del plano
+            x = bounds_max[0] if a >= 0 else bounds_min[0]
+            y = bounds_max[1] if b >= 0 else bounds_min[1]
+            z = bounds_max[2] if c >= 0 else bounds_min[2]
+            if a * x + b * y + c * z + d < 0:
+                return False
+        return True
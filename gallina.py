@@ -2,7 +2,11 @@ import pygame
 from OpenGL.GL import *
 import math
 
-from objloader import OBJ
+from assets import load_mesh
+from frustum import transform_sphere, merge_spheres, part_sphere
+from transform import Transform, yaw_scale_matrix
+from animation import bake
+from timestep import lerp
 
 class Ala:
     """
@@ -10,23 +14,40 @@ class Ala:
     Se mueven simétricamente (ambas suben o ambas bajan) y
     se abren en el eje Y.
     """
-    def __init__(self, filepath):
-        try:
-            self.obj = OBJ(filepath, swapyz=True)
-        except FileNotFoundError:
-            print(f"Error: No se pudo cargar el modelo 3D desde {filepath}")
-            self.obj = None
+    def __init__(self, filepath, load_model=True, lod_cells=None):
+        self.filepath = filepath
+        self.obj = None
+        if load_model:
+            self.load_models(lod_cells)
         
         self.flap_phase = 0.0
         self.flap_direction = 1
         self.flap_speed = 3.0       # Grados por fotograma
         self.flap_max_angle = 30.0  # Ángulo máximo 
+        self.prev_flap_phase = self.flap_phase # Del paso anterior
+
+        # Tabla horneada de la animacion (ver local_matrix)
+        self.table = None
+        self.table_key = None
+
+        # El padre (el cuerpo) lo asigna Gallina al crear sus partes
+        self.transform = Transform()
+
+    def load_models(self, lod_cells=None):
+        """
+        Carga (o toma del AssetManager) la malla de la parte.
+        """
+        try:
+            self.obj = load_mesh(self.filepath, swapyz=True, lod_cells=lod_cells)
+        except FileNotFoundError:
+            print(f"Error: No se pudo cargar el modelo 3D desde {self.filepath}")
 
     def update(self, is_moving):
         """
         Actualiza el ángulo del ala. Si la gallina se mueve, aletea.
         Si está quieta, regresa a su posición original.
         """
+        self.prev_flap_phase = self.flap_phase
         if not is_moving:
             if abs(self.flap_phase) > self.flap_speed:
                 self.flap_phase -= math.copysign(self.flap_speed, self.flap_phase)
@@ -39,7 +60,7 @@ class Ala:
         if abs(self.flap_phase) > self.flap_max_angle:
             self.flap_direction *= -1
 
-    def draw(self, position_offset, invert_sweep=False):
+    def draw(self, position_offset, invert_sweep=False, alpha=1.0):
         """
         Dibuja el ala usando una matriz de transformación pre-calculada
         que combina la rotación en X (aleteo) y en Y (abrir/cerrar).
@@ -49,12 +70,55 @@ class Ala:
             return
             
         glPushMatrix()
-        
+        glMultMatrixf(self.local_matrix(position_offset, invert_sweep, alpha))
+        self.obj.render()
+        glPopMatrix()
+
+    def render_phase(self, alpha=1.0):
+        """
+        Fase de aleteo interpolada con 'alpha' entre el paso anterior y el
+        actual.
+        """
+        prev, phase = self.prev_flap_phase, self.flap_phase
+        if alpha >= 1.0 or prev == phase:
+            return phase
+        return lerp(prev, phase, alpha)
+
+    def local_matrix(self, position_offset, invert_sweep=False, alpha=1.0):
+        """
+        Matriz local tomada de la tabla horneada del aleteo (paso
+        flap_speed). Solo se calcula si la fase (interpolada con 'alpha')
+        no esta en la tabla.
+        """
+        table_key = (invert_sweep, *position_offset)
+        if table_key != self.table_key:
+            self.table = bake(Ala.pose_matrix, self.flap_speed, self.flap_max_angle + self.flap_speed,
+                              tuple(position_offset), invert_sweep)
+            self.table_key = table_key
+        table = self.table
+        flap_phase = self.render_phase(alpha)
+        phase = table.index(flap_phase)
+        if phase is None:
+            return self.transform.update((None, flap_phase, invert_sweep, *position_offset),
+                                         self.pose_matrix, flap_phase, position_offset, invert_sweep)
+        return self.transform.pose((table, phase), table.matrices[phase])
+
+    def matrix(self, position_offset, invert_sweep=False):
+        """
+        Matriz local del ala (column-major, lista para glMultMatrixf).
+        """
+        return self.pose_matrix(self.flap_phase, position_offset, invert_sweep)
+
+    @staticmethod
+    def pose_matrix(flap_phase, position_offset, invert_sweep=False):
+        """
+        Matriz local del ala para una fase de aleteo dada.
+        """
         tx, ty, tz = position_offset
 
-        angle_x_flap = abs(self.flap_phase)
+        angle_x_flap = abs(flap_phase)
 
-        angle_y_sweep_amount = abs(self.flap_phase) * 0.5
+        angle_y_sweep_amount = abs(flap_phase) * 0.5
         
         angle_y_sweep = angle_y_sweep_amount if invert_sweep else -angle_y_sweep_amount
         
@@ -84,12 +148,7 @@ class Ala:
             m8,  m9,   m10, 0.0,
             tx,  ty,   tz,  1.0
         ]
-        
-        glMultMatrixf(ala_matrix)
-        
-        self.obj.render()
-        
-        glPopMatrix()
+        return ala_matrix
 
 
 class Pata:
@@ -97,24 +156,41 @@ class Pata:
     Gestiona el estado y renderizado de una pata de la gallina.
     Realiza un movimiento de marcha alterno.
     """
-    def __init__(self, filepath):
-        try:
-            self.obj = OBJ(filepath, swapyz=True)
-        except FileNotFoundError:
-            print(f"Error: No se pudo cargar el modelo 3D desde {filepath}")
-            self.obj = None
+    def __init__(self, filepath, load_model=True, lod_cells=None):
+        self.filepath = filepath
+        self.obj = None
+        if load_model:
+            self.load_models(lod_cells)
         
         self.march_angle = 0.0
         self.march_direction = 1
         self.march_speed = 4.0       # Grados por fotograma
         self.march_max_angle = 20.0  # Límite de 20 grados
         self.return_speed = 6.0      # Velocidad de retorno a 0
+        self.prev_march_angle = self.march_angle # Del paso anterior
+
+        # Tabla horneada de la animacion (ver local_matrix)
+        self.table = None
+        self.table_key = None
+
+        # El padre (el cuerpo) lo asigna Gallina al crear sus partes
+        self.transform = Transform()
+
+    def load_models(self, lod_cells=None):
+        """
+        Carga (o toma del AssetManager) la malla de la parte.
+        """
+        try:
+            self.obj = load_mesh(self.filepath, swapyz=True, lod_cells=lod_cells)
+        except FileNotFoundError:
+            print(f"Error: No se pudo cargar el modelo 3D desde {self.filepath}")
 
     def update(self, is_moving):
         """
         Actualiza el ángulo de la pata. Si se mueve, marcha.
         Si está quieta, regresa a su posición original.
         """
+        self.prev_march_angle = self.march_angle
         if not is_moving:
             if abs(self.march_angle) > self.return_speed:
                 self.march_angle -= math.copysign(self.return_speed, self.march_angle)
@@ -127,7 +203,7 @@ class Pata:
         if abs(self.march_angle) > self.march_max_angle:
             self.march_direction *= -1
 
-    def draw(self, position_offset, invert_swing=False):
+    def draw(self, position_offset, invert_swing=False, alpha=1.0):
         """
         Dibuja la pata. La rotación es sobre el eje X para
         levantarla (como una marcha).
@@ -136,8 +212,51 @@ class Pata:
             return
             
         glPushMatrix()
-        
-        angle_to_use = -self.march_angle if invert_swing else self.march_angle
+        glMultMatrixf(self.local_matrix(position_offset, invert_swing, alpha))
+        self.obj.render()
+        glPopMatrix()
+
+    def render_angle(self, alpha=1.0):
+        """
+        Angulo de marcha interpolado con 'alpha' entre el paso anterior y
+        el actual.
+        """
+        prev, angle = self.prev_march_angle, self.march_angle
+        if alpha >= 1.0 or prev == angle:
+            return angle
+        return lerp(prev, angle, alpha)
+
+    def local_matrix(self, position_offset, invert_swing=False, alpha=1.0):
+        """
+        Matriz local tomada de la tabla horneada de la marcha. Solo se
+        calcula si el angulo (interpolado con 'alpha') no esta en la tabla.
+        """
+        table_key = (invert_swing, *position_offset)
+        if table_key != self.table_key:
+            # Paso 2: maximo comun divisor de march_speed (4) y return_speed (6)
+            self.table = bake(Pata.pose_matrix, 2.0, self.march_max_angle + self.march_speed,
+                              tuple(position_offset), invert_swing)
+            self.table_key = table_key
+        table = self.table
+        angle = self.render_angle(alpha)
+        phase = table.index(angle)
+        if phase is None:
+            return self.transform.update((None, angle, invert_swing, *position_offset),
+                                         self.pose_matrix, angle, position_offset, invert_swing)
+        return self.transform.pose((table, phase), table.matrices[phase])
+
+    def matrix(self, position_offset, invert_swing=False):
+        """
+        Matriz local de la pata (column-major, lista para glMultMatrixf).
+        """
+        return self.pose_matrix(self.march_angle, position_offset, invert_swing)
+
+    @staticmethod
+    def pose_matrix(march_angle, position_offset, invert_swing=False):
+        """
+        Matriz local de la pata para un angulo de marcha dado.
+        """
+        angle_to_use = -march_angle if invert_swing else march_angle
         angle_rad = math.radians(angle_to_use)
         
         tx, ty, tz = position_offset
@@ -150,10 +269,7 @@ class Pata:
             0.0, -sin_a,  cos_a,  0.0,
              tx,    ty,     tz,   1.0
         ]
-        
-        glMultMatrixf(pata_matrix)
-        self.obj.render()
-        glPopMatrix()
+        return pata_matrix
 
 
 class Gallina:
@@ -161,13 +277,12 @@ class Gallina:
     Clase principal de la gallina. Gestiona el estado general, movimiento,
     y contiene las instancias de las patas y alas.
     """
-    def __init__(self, filepath, initial_pos, scale):
-        try:
-            self.obj = OBJ(filepath, swapyz=True)
-        except FileNotFoundError:
-            print(f"Error: No se pudo cargar el modelo 3D desde {filepath}")
-            self.obj = None
-            
+    def __init__(self, filepath, initial_pos, scale, load_model=True, lod_cells=None):
+        # load_model=False: gallina solo de simulacion (sin mallas ni GL).
+        # Los modelos se pueden cargar despues con load_models().
+        self.filepath = filepath
+        self.obj = None
+
         self.position = list(initial_pos)
         self.scale_factor = scale
         self.rotation_y = 0.0
@@ -177,10 +292,10 @@ class Gallina:
         
         self.base_height = 6.5      
         
-        self.pata_izq = Pata(filepath="obj/gallina/pataizq.obj")
-        self.pata_der = Pata(filepath="obj/gallina/patader.obj")
-        self.ala_izq = Ala(filepath="obj/gallina/alaizq.obj")
-        self.ala_der = Ala(filepath="obj/gallina/alader.obj")
+        self.pata_izq = Pata(filepath="obj/gallina/pataizq.obj", load_model=False)
+        self.pata_der = Pata(filepath="obj/gallina/patader.obj", load_model=False)
+        self.ala_izq = Ala(filepath="obj/gallina/alaizq.obj", load_model=False)
+        self.ala_der = Ala(filepath="obj/gallina/alader.obj", load_model=False)
         
         pata_x = 0.24
         pata_y = -0.35 
@@ -194,11 +309,44 @@ class Gallina:
         self.offset_ala_izq = [ala_x, ala_y, ala_z]
         self.offset_ala_der = [-ala_x, ala_y, ala_z]
 
+        self.transform = Transform()
+        for part in (self.pata_izq, self.pata_der, self.ala_izq, self.ala_der):
+            part.transform.parent = self.transform
+
+        # Estado del paso de simulacion anterior, para dibujar interpolando
+        # con 'alpha' entre ese paso y el actual (ver timestep.py)
+        self.prev_position = list(self.position)
+        self.prev_rotation_y = self.rotation_y
+        self.alpha = 1.0
+
+        if load_model:
+            self.load_models(lod_cells)
+
+    def model_files(self):
+        """
+        Rutas de todas las mallas de la gallina (cuerpo, patas y alas).
+        """
+        return [self.filepath, self.pata_izq.filepath, self.pata_der.filepath,
+                self.ala_izq.filepath, self.ala_der.filepath]
+
+    def load_models(self, lod_cells=None):
+        """
+        Carga las mallas del cuerpo, patas y alas. Si ya estan en el
+        AssetManager (p. ej. precargadas por AsyncLoader) no lee archivos.
+        """
+        try:
+            self.obj = load_mesh(self.filepath, swapyz=True, lod_cells=lod_cells)
+        except FileNotFoundError:
+            print(f"Error: No se pudo cargar el modelo 3D desde {self.filepath}")
+        for part in (self.pata_izq, self.pata_der, self.ala_izq, self.ala_der):
+            part.load_models(lod_cells)
 
     def move(self, keys):
         """
         Procesa la entrada del teclado para actualizar el estado de la gallina.
+        Es un paso de simulacion: las velocidades son por paso.
         """
+        self.save_state()
         is_moving = False
 
         if keys[pygame.K_LEFT]:
@@ -224,6 +372,25 @@ class Gallina:
         self.ala_izq.update(is_moving)
         self.ala_der.update(is_moving)
 
+    def save_state(self):
+        """
+        Guarda el estado actual como el del paso anterior.
+        """
+        self.prev_position[:] = self.position
+        self.prev_rotation_y = self.rotation_y
+
+    def render_state(self):
+        """
+        (posicion, rotacion_y) interpolados con 'alpha' entre el paso
+        anterior y el actual.
+        """
+        a = self.alpha
+        if a >= 1.0:
+            return self.position, self.rotation_y
+        p, q = self.prev_position, self.position
+        return ([lerp(p[0], q[0], a), lerp(p[1], q[1], a), lerp(p[2], q[2], a)],
+                lerp(self.prev_rotation_y, self.rotation_y, a))
+
     def draw(self):
         """
         Dibuja el cuerpo de la gallina y luego a sus partes hijas.
@@ -233,36 +400,77 @@ class Gallina:
             
         glPushMatrix()
         
-        tx, ty, tz = self.position
-        ty += self.base_height 
-        sx = sy = sz = self.scale_factor
-        r = math.radians(self.rotation_y)
-        s = math.radians(-90.0) # Ajuste de orientación
-
-        cos_r, sin_r = math.cos(r), math.sin(r)
-        cos_s, sin_s = math.cos(s), math.sin(s)
-
-        m0 = sx * (cos_r * cos_s - sin_r * sin_s)
-        m2 = sx * (-cos_r * sin_s - sin_r * cos_s)
-        m5 = sy
-        m8 = sz * (sin_r * cos_s + cos_r * sin_s)
-        m10 = sz * (-sin_r * sin_s + cos_r * cos_s)
-
-        gallina_matrix = [
-            m0,  0.0,  m2,  0.0,
-           0.0,   m5, 0.0,  0.0,
-            m8,  0.0, m10,  0.0,
-            tx,   ty,  tz,  1.0
-        ]
-        
-        glMultMatrixf(gallina_matrix)
+        glMultMatrixf(self.local_matrix())
         
         self.obj.render()
         
-        self.pata_izq.draw(self.offset_pata_izq, invert_swing=False)
-        self.pata_der.draw(self.offset_pata_der, invert_swing=True)
+        a = self.alpha
+        self.pata_izq.draw(self.offset_pata_izq, invert_swing=False, alpha=a)
+        self.pata_der.draw(self.offset_pata_der, invert_swing=True, alpha=a)
         
-        self.ala_izq.draw(self.offset_ala_izq, invert_sweep=False)
-        self.ala_der.draw(self.offset_ala_der, invert_sweep=True)
+        self.ala_izq.draw(self.offset_ala_izq, invert_sweep=False, alpha=a)
+        self.ala_der.draw(self.offset_ala_der, invert_sweep=True, alpha=a)
         
-        glPopMatrix()
\ No newline at end of file
+        glPopMatrix()
+
+    def local_matrix(self):
+        """
+        Matriz del cuerpo (en el estado interpolado de render_state())
+        cacheada en su Transform; solo se recalcula si cambio la posicion,
+        la rotacion o la escala.
+        """
+        (tx, ty, tz), rotation_y = self.render_state()
+        return self.transform.update(
+            (tx, ty, tz, rotation_y, self.scale_factor, self.base_height),
+            yaw_scale_matrix, tx, ty + self.base_height, tz,
+            self.scale_factor, rotation_y, -90.0)
+
+    def matrix(self):
+        """
+        Matriz del cuerpo en el mundo (column-major).
+        """
+        tx, ty, tz = self.position
+        ty += self.base_height
+        return yaw_scale_matrix(tx, ty, tz, self.scale_factor, self.rotation_y, -90.0)
+
+    def update_lod(self, camera_pos, selector):
+        """
+        Elige el nivel de detalle del cuerpo, patas y alas segun la
+        distancia a la camara. Devuelve el nivel elegido.
+        """
+        if not self.obj:
+            return 0
+        distance = math.dist(camera_pos, self.render_state()[0])
+        level = selector.select(self.obj.level, distance)
+        for obj in (self.obj, self.pata_izq.obj, self.pata_der.obj,
+                    self.ala_izq.obj, self.ala_der.obj):
+            if obj:
+                obj.set_level(level)
+        return level
+
+    def bounding_sphere(self):
+        """
+        Esfera envolvente de la gallina con patas y alas, en el mundo.
+        """
+        if not self.obj:
+            return None
+        return transform_sphere(self.local_matrix(), *merge_spheres([
+            (self.obj.bounds_center, self.obj.bounds_radius),
+            part_sphere(self.pata_izq.obj, self.offset_pata_izq),
+            part_sphere(self.pata_der.obj, self.offset_pata_der),
+            part_sphere(self.ala_izq.obj, self.offset_ala_izq),
+            part_sphere(self.ala_der.obj, self.offset_ala_der),
+        ]))
+
+    def parts(self):
+        """
+        Devuelve las partes hijas como pares (malla, matriz local), en el
+        mismo orden en que se dibujan.
+        """
+        a = self.alpha
+        return [
+            (self.pata_izq.obj, self.pata_izq.local_matrix(self.offset_pata_izq, invert_swing=False, alpha=a)),
+            (self.pata_der.obj, self.pata_der.local_matrix(self.offset_pata_der, invert_swing=True, alpha=a)),
+            (self.ala_izq.obj, self.ala_izq.local_matrix(self.offset_ala_izq, invert_sweep=False, alpha=a)),
+            (self.ala_der.obj, self.ala_der.local_matrix(self.offset_ala_der, invert_sweep=True, alpha=a)),
+        ]
\ No newline at end of file
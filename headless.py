@@ -0,0 +1,113 @@
+"""
+Simulacion sin ventana ni OpenGL del robot, sus brazos y las gallinas.
+Sirve para pruebas de carga y CI: avanza la logica de juego tan rapido
+como puede y reporta los ticks por segundo.
+
+Uso:
+    python headless.py [--ticks 10000] [--chickens 100] [--seed 0]
+"""
+import time
+import random
+import argparse
+
+import pygame
+
+from robot import Cuerpo
+from gallina import Gallina
+from inputs import ScriptedInput
+from spatial import SpatialHash
+
+# Recorrido de prueba del robot: avanza, gira, toma y suelta una gallina.
+ROBOT_SCRIPT = [
+    (120, {pygame.K_UP}),
+    (30, {pygame.K_UP, pygame.K_LEFT}),
+    (1, {pygame.K_e}),
+    (90, {pygame.K_UP}),
+    (45, {pygame.K_RIGHT}),
+    (1, {pygame.K_q}),
+    (60, {pygame.K_DOWN}),
+    (30, set()),
+]
+
+# Paseo de las gallinas: caminar, detenerse y girar.
+CHICKEN_SCRIPT = [
+    (80, {pygame.K_UP}),
+    (20, {pygame.K_UP, pygame.K_LEFT}),
+    (40, set()),
+    (60, {pygame.K_UP}),
+    (25, {pygame.K_RIGHT}),
+]
+
+
+# Limites del mundo, iguales a los de main.py
+WORLD_BOUNDS = (-500, 500, -500, 500)
+
+
+def make_world(chickens, seed=0):
+    """
+    Crea el robot y 'chickens' gallinas sin modelos, cada una con su propio
+    guion desfasado para que no se muevan todas igual.
+    """
+    rng = random.Random(seed)
+    robot = Cuerpo(filepath="obj/robot/robot.obj", initial_pos=[0.0, 18.0, 0.0],
+                   scale=1.5, load_model=False)
+    gallinas = []
+    inputs = []
+    for _ in range(chickens):
+        gallina = Gallina(filepath="obj/gallina/gallina.obj",
+                          initial_pos=[rng.uniform(-300, 300), 0.0, rng.uniform(-300, 300)],
+                          scale=3.0, load_model=False)
+        gallina.rotation_y = rng.uniform(0.0, 360.0)
+        script = ScriptedInput(CHICKEN_SCRIPT)
+        script.index = rng.randrange(len(script.steps))
+        gallinas.append(gallina)
+        inputs.append(script)
+    return robot, gallinas, inputs
+
+
+def step(robot, robot_input, gallinas, inputs, index):
+    """
+    Avanza un tick y devuelve la gallina al alcance del robot (o None).
+    """
+    robot.move(robot_input.poll(), index)
+    for gallina, source in zip(gallinas, inputs):
+        gallina.move(source.poll())
+        index.update(gallina, gallina.position[0], gallina.position[2])
+    return robot.nearest_chicken(index)
+
+
+def run(ticks=10000, chickens=100, seed=0, robot_input=None):
+    robot, gallinas, inputs = make_world(chickens, seed)
+    if robot_input is None:
+        robot_input = ScriptedInput(ROBOT_SCRIPT)
+    index = SpatialHash(25.0, WORLD_BOUNDS)
+    in_reach = 0
+    start = time.perf_counter()
+    for _ in range(ticks):
+        if step(robot, robot_input, gallinas, inputs, index):
+            in_reach += 1
+    elapsed = time.perf_counter() - start
+    return {
+        'ticks': ticks,
+        'chickens': chickens,
+        'seconds': elapsed,
+        'ticks_per_sec': ticks / elapsed if elapsed > 0 else float('inf'),
+        'robot_position': list(robot.position),
+        'ticks_with_chicken_in_reach': in_reach,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--ticks', type=int, default=10000)
+    parser.add_argument('--chickens', type=int, default=100)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    result = run(args.ticks, args.chickens, args.seed)
+    print(f"{result['ticks']} ticks con {result['chickens']} gallinas en "
+          f"{result['seconds']:.3f} s ({result['ticks_per_sec']:.0f} ticks/s)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,162 @@
+from collections import OrderedDict
+
+import pygame
+from OpenGL.GL import *
+from OpenGL.GLU import *
+
+
+class TextCache:
+    """
+    Cache de textos ya rasterizados. Cada combinacion (texto, fuente,
+    color) se dibuja con pygame y se sube a una textura una sola vez; los
+    fotogramas siguientes solo dibujan un quad con esa textura. Cuando hay
+    mas de 'max_entries' textos se elimina el usado hace mas tiempo, asi
+    que un contador que cambia seguido no llena la VRAM.
+    """
+    def __init__(self, max_entries=64):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()  # (texto, fuente, color) -> (texid, lista, ancho, alto)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, text, font, color):
+        key = (text, font, tuple(color))
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return entry
+
+        self.misses += 1
+        entry = self.entries[key] = self.rasterize(text, font, color)
+        while len(self.entries) > self.max_entries:
+            self.delete(self.entries.popitem(last=False)[1])
+            self.evictions += 1
+        return entry
+
+    def clear(self):
+        while self.entries:
+            self.delete(self.entries.popitem(last=False)[1])
+
+    @staticmethod
+    def delete(entry):
+        texid, gl_list, _, _ = entry
+        glDeleteLists(gl_list, 1)
+        glDeleteTextures([texid])
+
+    def stats(self):
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'textures': len(self.entries),
+        }
+
+    @staticmethod
+    def rasterize(text, font, color):
+        surface = font.render(text, True, color)
+        data = pygame.image.tostring(surface, "RGBA", True)
+        width, height = surface.get_size()
+        texid = glGenTextures(1)
+        glBindTexture(GL_TEXTURE_2D, texid)
+        # NEAREST y quads en pixeles enteros: el texto sale igual que con
+        # glDrawPixels, sin filtrado.
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_NEAREST)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_NEAREST)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_S, GL_CLAMP_TO_EDGE)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_T, GL_CLAMP_TO_EDGE)
+        glPixelStorei(GL_UNPACK_ALIGNMENT, 1)
+        glTexImage2D(GL_TEXTURE_2D, 0, GL_RGBA, width, height, 0,
+                     GL_RGBA, GL_UNSIGNED_BYTE, data)
+        glBindTexture(GL_TEXTURE_2D, 0)
+
+        # Quad con la esquina inferior izquierda en el origen; draw_text
+        # solo traslada y llama a la lista.
+        gl_list = glGenLists(1)
+        glNewList(gl_list, GL_COMPILE)
+        glBindTexture(GL_TEXTURE_2D, texid)
+        glBegin(GL_QUADS)
+        glTexCoord2f(0.0, 0.0)
+        glVertex2f(0.0, 0.0)
+        glTexCoord2f(1.0, 0.0)
+        glVertex2f(width, 0.0)
+        glTexCoord2f(1.0, 1.0)
+        glVertex2f(width, height)
+        glTexCoord2f(0.0, 1.0)
+        glVertex2f(0.0, height)
+        glEnd()
+        glEndList()
+        return texid, gl_list, width, height
+
+
+class HUD:
+    """
+    Texto en pantalla en coordenadas de ventana, con (x, y) desde la
+    esquina superior izquierda. Los textos vienen de un TextCache, asi que
+    solo se rasterizan cuando cambian.
+    """
+    def __init__(self, width, height, font, cache=None):
+        self.width = width
+        self.height = height
+        self.font = font
+        self.cache = cache if cache is not None else TextCache()
+
+    def begin(self):
+        """
+        Cambia a proyeccion 2D y al estado para dibujar texto. Varios
+        draw_text pueden ir entre un solo begin() y end().
+        """
+        glMatrixMode(GL_PROJECTION)
+        glPushMatrix()
+        glLoadIdentity()
+        gluOrtho2D(0, self.width, 0, self.height)
+
+        glMatrixMode(GL_MODELVIEW)
+        glPushMatrix()
+        glLoadIdentity()
+
+        glDisable(GL_LIGHTING)
+        glDisable(GL_DEPTH_TEST)
+        glEnable(GL_TEXTURE_2D)
+        glEnable(GL_BLEND)
+        glBlendFunc(GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA)
+        # El color de la textura pasa tal cual (modulado por blanco)
+        glColor4f(1.0, 1.0, 1.0, 1.0)
+
+    def end(self):
+        glBindTexture(GL_TEXTURE_2D, 0)
+        glDisable(GL_TEXTURE_2D)
+        glDisable(GL_BLEND)
+
+        glEnable(GL_DEPTH_TEST)
+        glEnable(GL_LIGHTING)
+
+        glPopMatrix()  # MODELVIEW
+        glMatrixMode(GL_PROJECTION)
+        glPopMatrix()
+        glMatrixMode(GL_MODELVIEW)
+
+    def draw_text(self, text, x, y, color=(255, 255, 255), font=None):
+        _, gl_list, _, height = self.cache.get(text, font or self.font, color)
+        glPushMatrix()
+        glTranslatef(x, self.height - y - height, 0.0)
+        glCallList(gl_list)
+        glPopMatrix()
+
+    def draw_bar(self, fraction, x, y, width, height,
+                 color=(1.0, 1.0, 1.0), background=(0.3, 0.3, 0.3)):
+        """
+        Barra de progreso de 'fraction' (0 a 1), con (x, y) desde la
+        esquina superior izquierda.
+        """
+        fraction = min(max(fraction, 0.0), 1.0)
+        y0 = self.height - y - height
+        glBindTexture(GL_TEXTURE_2D, 0)
+        glDisable(GL_TEXTURE_2D)
+        glColor3f(*background)
+        glRectf(x, y0, x + width, y0 + height)
+        glColor3f(*color)
+        glRectf(x, y0, x + width * fraction, y0 + height)
+        glColor4f(1.0, 1.0, 1.0, 1.0)
+        glEnable(GL_TEXTURE_2D)
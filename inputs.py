@@ -0,0 +1,64 @@
+import pygame
+
+
+class KeyState:
+    """
+    Estado de teclas independiente de pygame.key. Se indexa igual que el
+    arreglo de pygame.key.get_pressed() (keys[pygame.K_UP]), asi que
+    Cuerpo.move y Gallina.move lo aceptan sin cambios.
+    """
+    __slots__ = ('pressed',)
+
+    def __init__(self, pressed=()):
+        self.pressed = frozenset(pressed)
+
+    def __getitem__(self, key):
+        return key in self.pressed
+
+
+class KeyboardInput:
+    """
+    Entrada desde el teclado real. Requiere pygame inicializado y una
+    ventana.
+    """
+    def poll(self):
+        return pygame.key.get_pressed()
+
+
+class ProgrammaticInput:
+    """
+    Entrada controlada desde codigo: press()/release() cambian las teclas
+    que devuelve cada poll().
+    """
+    def __init__(self, pressed=()):
+        self.pressed = set(pressed)
+
+    def press(self, *keys):
+        self.pressed.update(keys)
+
+    def release(self, *keys):
+        self.pressed.difference_update(keys)
+
+    def poll(self):
+        return KeyState(self.pressed)
+
+
+class ScriptedInput:
+    """
+    Reproduce un guion de entradas: una lista de (ticks, teclas) que se
+    recorre un tick por cada poll(). Con loop=True vuelve a empezar al
+    terminar; si no, devuelve teclas vacias.
+    """
+    def __init__(self, script, loop=True):
+        self.steps = [KeyState(keys) for ticks, keys in script for _ in range(ticks)]
+        self.loop = loop
+        self.index = 0
+
+    def poll(self):
+        if self.index >= len(self.steps):
+            if not self.loop or not self.steps:
+                return KeyState()
+            self.index = 0
+        state = self.steps[self.index]
+        self.index += 1
+        return state
@@ -0,0 +1,179 @@
+import os
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from objloader import OBJ
+from assets import manager as asset_manager
+from texregistry import registry as texture_registry
+from tracer import tracer
+
+
+class LoadJob:
+    """
+    Un asset en carga: primero 'work' en un hilo (sin OpenGL) y despues
+    los pasos de subida a la GPU en el hilo de render.
+    """
+    def __init__(self, name, work, steps, callback=None):
+        self.name = name
+        self.work = work
+        self.steps = steps
+        self.callback = callback
+        self.future = None
+        self.result = None
+        self.error = None
+        self.done = False
+
+
+class AsyncLoader:
+    """
+    Cargador de assets en segundo plano. Los hilos de trabajo leen y
+    procesan OBJ/MTL y decodifican imagenes; todo lo que llama a OpenGL
+    queda en una cola que update() vacia en el hilo de render, con un
+    presupuesto de tiempo por fotograma para no congelar la ventana.
+    """
+    def __init__(self, workers=2, budget=0.004, assets=None, registry=None):
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='loader')
+        self.budget = budget   # segundos de subidas por fotograma
+        self.assets = assets if assets is not None else asset_manager
+        self.registry = registry if registry is not None else texture_registry
+        self.jobs = []
+        self.running = []
+        self.uploads = deque()  # (job, paso, es_el_ultimo)
+        self.waiters = []       # (trabajos, callback)
+        self.errors = []
+
+    def submit(self, job):
+        job.future = self.executor.submit(job.work)
+        self.jobs.append(job)
+        self.running.append(job)
+        return job
+
+    def load_mesh(self, filepath, swapyz=False, lod_cells=None, callback=None):
+        """
+        Carga una malla (y sus niveles de detalle) y la registra en el
+        AssetManager; despues load_mesh() de assets la obtiene sin esperar.
+        'callback' recibe el OBJ cuando ya esta en la GPU.
+        """
+        def work():
+            mesh = OBJ(filepath, swapyz=swapyz, defer_gl=True)
+            pixels = mesh.decodeTextures()
+            levels = [mesh]
+            if lod_cells:
+                from lod import build_lods
+                with tracer.span('lod', file=os.path.basename(filepath)):
+                    levels = build_lods(mesh, lod_cells, defer_gl=True)
+            if OBJ.generate_on_init:
+                for level in levels:
+                    level.prepare()
+            return levels, pixels
+
+        def steps(result):
+            levels, pixels = result
+            yield lambda: levels[0].uploadTextures(pixels)
+            if OBJ.generate_on_init:
+                for level in levels:
+                    yield level.generate
+            yield lambda: self.assets.add_mesh(filepath, swapyz, levels, lod_cells)
+
+        return self.submit(LoadJob(filepath, work, steps, callback))
+
+    def load_world(self, filepath, matrix, tile_size, bounds, view_radius,
+                   swapyz=False, callback=None, **params):
+        """
+        Carga un escenario y lo divide en trozos (ver chunks.ChunkedWorld)
+        en un hilo; en el hilo de render solo se suben sus texturas.
+        'callback' recibe el ChunkedWorld, que despues sube sus trozos con
+        update().
+        """
+        def work():
+            from chunks import ChunkedWorld
+            mesh = OBJ(filepath, swapyz=swapyz, defer_gl=True)
+            pixels = mesh.decodeTextures()
+            with tracer.span('chunks', file=os.path.basename(filepath)):
+                world = ChunkedWorld(mesh, matrix, tile_size, bounds, view_radius, **params)
+            return world, pixels
+
+        def steps(result):
+            world, pixels = result
+            yield lambda: world.source.uploadTextures(pixels)
+            yield lambda: world
+
+        return self.submit(LoadJob(filepath, work, steps, callback))
+
+    def load_texture(self, filepath, callback=None, flip=True, **params):
+        """
+        Decodifica la imagen en un hilo y la sube con el registro de
+        texturas; 'callback' recibe el id de la textura.
+        """
+        def work():
+            return self.registry.loadPixels(filepath, flip)
+
+        def steps(pixels):
+            yield lambda: self.registry.acquire(filepath, flip=flip, pixels=pixels, **params)
+
+        return self.submit(LoadJob(filepath, work, steps, callback))
+
+    def after(self, jobs, callback):
+        """
+        Llama a 'callback' cuando terminen todos los trabajos dados (con o
+        sin error).
+        """
+        self.waiters.append((list(jobs), callback))
+
+    def update(self, budget=None):
+        """
+        Llamar una vez por fotograma desde el hilo de render. Ejecuta pasos
+        de subida hasta agotar el presupuesto (al menos uno por llamada).
+        """
+        for job in [job for job in self.running if job.future.done()]:
+            self.running.remove(job)
+            try:
+                steps = list(job.steps(job.future.result()))
+            except Exception as e:
+                self.fail(job, e)
+                continue
+            for i, step in enumerate(steps):
+                self.uploads.append((job, step, i == len(steps) - 1))
+
+        budget = self.budget if budget is None else budget
+        start = time.perf_counter()
+        while self.uploads:
+            job, step, last = self.uploads.popleft()
+            if job.error is not None:
+                continue
+            try:
+                job.result = step()
+            except Exception as e:
+                self.fail(job, e)
+            else:
+                if last:
+                    job.done = True
+                    if job.callback:
+                        job.callback(job.result)
+            if time.perf_counter() - start >= budget:
+                break
+
+        for waiter in [w for w in self.waiters if all(job.done for job in w[0])]:
+            self.waiters.remove(waiter)
+            waiter[1]()
+
+    def fail(self, job, error):
+        job.error = error
+        job.done = True
+        self.errors.append((job.name, error))
+        print(f"Error: No se pudo cargar {job.name} ({error})")
+
+    def progress(self):
+        """
+        Fraccion de trabajos terminados, de 0.0 a 1.0.
+        """
+        if not self.jobs:
+            return 1.0
+        return sum(1 for job in self.jobs if job.done) / len(self.jobs)
+
+    def busy(self):
+        return any(not job.done for job in self.jobs)
+
+    def shutdown(self):
+        self.executor.shutdown(wait=True, cancel_futures=True)
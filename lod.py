@@ -0,0 +1,157 @@
+from objloader import OBJ
+
+# NumPy se importa dentro de las funciones que simplifican: main.py solo
+# usa LODSelector y DEFAULT_LOD_CELLS, que no lo necesitan.
+
+# Celdas por el eje mas largo de cada nivel simplificado (el nivel 0 es la
+# malla original). Menos celdas = menos triangulos.
+DEFAULT_LOD_CELLS = (24, 12, 6)
+
+
+def fan_triangles(obj):
+    """
+    Triangula las caras de 'obj' en abanico. Devuelve arreglos (T, 3) con
+    los indices de posicion, normal y texcoord (base 1, 0 = sin dato) y el
+    id de material de cada triangulo.
+    """
+    import numpy as np
+    offsets = np.frombuffer(obj.face_offsets, dtype=np.uint32).astype(np.int64)
+    per_face = np.maximum(np.diff(offsets) - 2, 0)
+    face_of = np.repeat(np.arange(len(per_face)), per_face)
+    k = np.arange(int(per_face.sum())) - np.repeat(np.cumsum(per_face) - per_face, per_face) + 1
+    base = offsets[face_of]
+    corners = np.stack([base, base + k, base + k + 1], axis=1)
+    return (np.frombuffer(obj.face_v, dtype=np.int32)[corners].astype(np.int64),
+            np.frombuffer(obj.face_vn, dtype=np.int32)[corners].astype(np.int64),
+            np.frombuffer(obj.face_vt, dtype=np.int32)[corners].astype(np.int64),
+            np.frombuffer(obj.face_mtl, dtype=np.int32)[face_of])
+
+
+def simplify(obj, cells, defer_gl=False):
+    """
+    Simplifica la malla por agrupamiento de vertices en una rejilla con
+    representantes por cuadricas de error (Lindstrom 2000): todos los
+    vertices de una celda se funden en el punto que minimiza la suma de
+    distancias cuadradas a los planos de sus triangulos. Los triangulos
+    que quedan degenerados o repetidos se eliminan; las normales y
+    coordenadas de textura de cada esquina se conservan.
+    """
+    import numpy as np
+    positions = np.frombuffer(obj.vertices, dtype=np.float32).reshape(-1, 3).astype(np.float64)
+    tri_v, tri_vn, tri_vt, tri_mtl = fan_triangles(obj)
+    if len(positions) == 0 or len(tri_v) == 0:
+        return OBJ.fromGeometry(geometry(obj, obj.vertices, obj.faceSizes(), obj.face_v,
+                                         obj.face_vn, obj.face_vt, obj.face_mtl), obj.mtl, defer_gl)
+
+    lo = positions.min(axis=0)
+    extent = (positions.max(axis=0) - lo).max()
+    cell = extent / cells if extent > 0 else 1.0
+    keys = np.floor((positions - lo) / cell).astype(np.int64)
+    _, cluster = np.unique(keys, axis=0, return_inverse=True)
+    cluster = cluster.reshape(-1)
+    n_clusters = int(cluster.max()) + 1
+
+    # Cuadrica de cada triangulo ponderada por su area, acumulada en las
+    # celdas de sus tres vertices.
+    p0, p1, p2 = (positions[tri_v[:, k] - 1] for k in range(3))
+    cross = np.cross(p1 - p0, p2 - p0)
+    area = np.linalg.norm(cross, axis=1)
+    normal = cross / np.where(area > 0, area, 1.0)[:, None]
+    plane = np.concatenate([normal, -(normal * p0).sum(axis=1, keepdims=True)], axis=1)
+    quadric = plane[:, :, None] * plane[:, None, :] * (area * 0.5)[:, None, None]
+    Q = np.zeros((n_clusters, 4, 4))
+    for k in range(3):
+        np.add.at(Q, cluster[tri_v[:, k] - 1], quadric)
+
+    counts = np.bincount(cluster, minlength=n_clusters)
+    mean = np.zeros((n_clusters, 3))
+    np.add.at(mean, cluster, positions)
+    mean /= counts[:, None]
+
+    # Minimo de la cuadrica: A x = -b. Si el sistema esta mal condicionado
+    # (zonas planas) o el punto sale de su celda, se usa el promedio.
+    A = Q[:, :3, :3]
+    b = Q[:, :3, 3]
+    rep = mean.copy()
+    solvable = np.abs(np.linalg.det(A)) > 1e-12 * np.maximum(np.abs(A).max(axis=(1, 2)), 1e-30) ** 3
+    if solvable.any():
+        solved = np.linalg.solve(A[solvable], -b[solvable][:, :, None])[:, :, 0]
+        cell_lo = lo + np.floor((mean[solvable] - lo) / cell) * cell
+        inside = np.all((solved >= cell_lo - cell) & (solved <= cell_lo + 2 * cell), axis=1)
+        idx = np.nonzero(solvable)[0][inside]
+        rep[idx] = solved[inside]
+
+    new_v = cluster[tri_v - 1]
+    keep = (new_v[:, 0] != new_v[:, 1]) & (new_v[:, 1] != new_v[:, 2]) & (new_v[:, 0] != new_v[:, 2])
+    # Quitar triangulos repetidos (mismos 3 vertices) conservando el primero
+    order = np.sort(new_v, axis=1)
+    _, first = np.unique(order[keep], axis=0, return_index=True)
+    kept = np.nonzero(keep)[0][np.sort(first)]
+
+    sizes = np.full(len(kept), 3, dtype=np.uint32)
+    return OBJ.fromGeometry(geometry(obj, rep, sizes, new_v[kept] + 1, tri_vn[kept],
+                                     tri_vt[kept], tri_mtl[kept]), obj.mtl, defer_gl)
+
+
+def geometry(obj, vertices, face_sizes, face_v, face_vn, face_vt, face_mtl):
+    """
+    Geometria para OBJ.fromGeometry con las normales, texcoords y
+    materiales de 'obj' (los arreglos se comparten, no se copian).
+    """
+    return {
+        'vertices': vertices,
+        'normals': obj.normals,
+        'texcoords': obj.texcoords,
+        'face_sizes': face_sizes,
+        'face_v': face_v,
+        'face_vn': face_vn,
+        'face_vt': face_vt,
+        'face_mtl': face_mtl,
+        'material_names': obj.material_names,
+    }
+
+
+def build_lods(obj, cells=DEFAULT_LOD_CELLS, defer_gl=False):
+    """
+    Lista de niveles [original, simplificado(cells[0]), ...]. Los niveles
+    que no reducen triangulos respecto al anterior se omiten. Con
+    defer_gl=True los niveles nuevos quedan sin generate(). Si 'obj' vino
+    de un bundle compilado con las mismas celdas, se toman de ahi.
+    """
+    if obj.bundle_key is not None and OBJ.bundle is not None:
+        levels = OBJ.bundle.lod_levels(obj, cells, defer_gl)
+        if levels is not None:
+            return levels
+    levels = [obj]
+    for n in cells:
+        level = simplify(obj, n, defer_gl)
+        if triangle_count(level) >= triangle_count(levels[-1]):
+            level.free()
+            continue
+        levels.append(level)
+    return levels
+
+
+def triangle_count(obj):
+    return obj.triangleCount()
+
+
+class LODSelector:
+    """
+    Elige el nivel de detalle por distancia a la camara. 'distances[i]' es
+    la distancia a partir de la cual se pasa del nivel i al i+1. Con
+    histeresis el cambio solo ocurre al pasar el umbral por un margen,
+    para que una entidad en el borde no alterne de nivel cada fotograma.
+    """
+    def __init__(self, distances=(80.0, 160.0, 320.0), hysteresis=0.1):
+        self.distances = list(distances)
+        self.hysteresis = hysteresis
+
+    def select(self, level, distance):
+        up = 1.0 + self.hysteresis
+        down = 1.0 - self.hysteresis
+        while level < len(self.distances) and distance > self.distances[level] * up:
+            level += 1
+        while level > 0 and distance < self.distances[level - 1] * down:
+            level -= 1
+        return level
@@ -1,14 +1,40 @@
-import pygame
-from pygame.locals import *
-from OpenGL.GL import *
-from OpenGL.GLU import *
+# El tracer va primero para medir tambien las importaciones
+from tracer import tracer
+
+with tracer.span('import pygame'):
+    import pygame
+    from pygame.locals import *
+with tracer.span('import OpenGL'):
+    from OpenGL.GL import *
+    from OpenGL.GLU import *
 import math
-
-from objloader import OBJ
-
-# Se importa la clases principales
-# from gallina import Gallina
-from robot import Cuerpo
+import time
+import importlib.util
+
+with tracer.span('import modulos'):
+    from objloader import OBJ
+    from assets import load_mesh
+    from texregistry import registry as texture_registry
+
+    # Se importa la clases principales
+    # from gallina import Gallina
+    from robot import Cuerpo
+    from inputs import KeyboardInput
+    from spatial import SpatialHash
+    from frustum import Frustum, transform_sphere
+    from chunks import load_world
+    from lod import LODSelector, DEFAULT_LOD_CELLS
+    from hud import HUD
+    from skybox import Skybox
+    from loader import AsyncLoader
+    from frameprof import FrameProfiler
+    from transform import Transform, yaw_scale_matrix
+    from timestep import FixedTimestep
+    from bundle import open_bundle
+
+# NumPy es opcional: sin el no se simplifican mallas (LOD_CELLS), no se
+# divide la granja en trozos (WORLD_TILE_SIZE) ni se lee el bundle.
+HAVE_NUMPY = importlib.util.find_spec('numpy') is not None
 
 # --- Configuracion de la Ventana y Camara ---
 screen_width = 1200
@@ -17,6 +43,66 @@ FOVY = 60.0
 ZNEAR = 1.0
 ZFAR = 900.0
 
+# --- Configuracion de Render ---
+# 'vbo' sube las mallas a vertex buffers; 'displaylist' usa el camino original
+OBJ_BACKEND = "vbo"
+# Con "vbo": vertices sin repetir e index buffer reordenado para la cache de
+# vertices de la GPU (meshopt.py). False = un vertice por esquina.
+INDEXED_VBO = True
+# True: las mallas sueltan su copia en CPU una vez subidas a la GPU (con
+# sus niveles de detalle); ahorra memoria pero ya no se pueden re-generar.
+DROP_CPU_GEOMETRY = False
+
+# --- Simulacion ---
+# La logica de juego corre a SIMULATION_HZ pasos fijos por segundo (las
+# velocidades de robot.py y gallina.py son por paso, pensadas para 60) y
+# se dibuja hasta MAX_FPS interpolando entre los dos ultimos pasos. Si un
+# fotograma se atrasa se corren a lo mas MAX_SIMULATION_STEPS pasos.
+SIMULATION_HZ = 60
+MAX_SIMULATION_STEPS = 5
+MAX_FPS = 144  # 0 = sin limite
+timestep = FixedTimestep(SIMULATION_HZ, MAX_SIMULATION_STEPS)
+
+# --- Carga de assets ---
+# True: las mallas y texturas se cargan en hilos y la ventana dibuja desde
+# el primer fotograma lo que ya este listo, con una barra de progreso.
+ASYNC_LOADING = True
+LOADER_WORKERS = 2
+LOADER_BUDGET = 0.004  # segundos de subidas a la GPU por fotograma
+loader = None
+
+# --- Bundle de assets ---
+# Si existe (python compile_assets.py), las mallas, materiales y texturas
+# se leen de este archivo mapeado en memoria en lugar de parsear obj/ y
+# decodificar texturas/. None = siempre los archivos sueltos.
+ASSET_BUNDLE = "assets.bundle" if HAVE_NUMPY else None
+asset_bundle = None
+
+# --- Traza de arranque ---
+# Al primer flip (y cuando termina la carga en segundo plano) se imprime
+# el resumen y/o se exporta a JSON, junto con las pilas colapsadas en
+# "<archivo>.folded" para flamegraph.pl.
+STARTUP_TRACE_PRINT = False
+STARTUP_TRACE_JSON = None  # p. ej. "startup_trace.json"
+startup_trace_done = False
+
+# --- Perfilador por fotograma ---
+# F3 muestra/oculta la tabla de p50/p95/p99 por fase. Con FRAME_TRACE_FILE
+# se exportan los fotogramas al salir (".csv" o Chrome trace ".json").
+PROFILER_KEY = pygame.K_F3
+FRAME_TRACE_FILE = None  # p. ej. "frames.json"
+# Los fotogramas completos solo se guardan si se van a exportar
+profiler = FrameProfiler(keep_frames=36000 if FRAME_TRACE_FILE else 0)
+overlay_font = None
+
+# --- Nivel de detalle ---
+# Celdas de cada nivel simplificado (None = solo la malla original) y
+# distancias a la camara a las que se cambia de nivel.
+LOD_CELLS = DEFAULT_LOD_CELLS if HAVE_NUMPY else None
+LOD_DISTANCES = (80.0, 160.0, 320.0)
+LOD_HYSTERESIS = 0.1
+lod_selector = LODSelector(LOD_DISTANCES, LOD_HYSTERESIS)
+
 # --- Configuracion del Entorno ---
 DimBoard = 300
 X_MIN, X_MAX = -500, 500
@@ -27,92 +113,155 @@ Z_MIN, Z_MAX = -500, 500
 robot = None
 gallina = None # Se deja la variable pero no se usara
 
+# Indice espacial de gallinas para decidir cual esta al alcance del robot
+# (la tecla E toma la mas cercana dentro de robot.pickup_radius). Mientras
+# no haya gallinas registradas, E toma una sin revisar el alcance.
+CHICKEN_CELL_SIZE = 25.0
+chicken_index = SpatialHash(CHICKEN_CELL_SIZE, (X_MIN, X_MAX, Z_MIN, Z_MAX))
+
 # --- Nuevas variables para la granja ---
 granja = None
 granja_matrix = None
 
+# --- Mundo por trozos ---
+# La granja se divide en una rejilla de WORLD_TILE_SIZE unidades sobre
+# X_MIN..X_MAX / Z_MIN..Z_MAX; cada trozo se sube a la GPU al acercarse el
+# robot y se suelta al alejarse. Solo se dibujan los trozos a menos de
+# WORLD_VIEW_RADIUS. None = la granja como una sola malla.
+WORLD_TILE_SIZE = 100.0 if HAVE_NUMPY else None
+WORLD_VIEW_RADIUS = 350.0
+WORLD_TILE_BUDGET = 0.002  # segundos de subidas de trozos por fotograma
+
 # --- Variables para el Skybox ---
 textures = []
+# Presupuesto de VRAM para texturas sin uso (None = sin limite)
+TEXTURE_BUDGET_BYTES = None
 SkyboxSize = 240
+# Seis imagenes (+X, -X, +Y, -Y, +Z, -Z) para usar un cube map en lugar de
+# texturas/cielo.bmp en todas las caras. None = modo original.
+SKYBOX_CUBE_FACES = None
+skybox = None
 
 # Variables para el texto en pantalla
 
 chickenCounter = 0
 font = None
+hud = None
+
+# Contadores de culling por frustum del ultimo fotograma
+cull_stats = {'drawn': 0, 'culled': 0}
+
+def is_visible(frustum, sphere):
+    """Prueba una esfera contra el frustum y actualiza cull_stats."""
+    if sphere is None or frustum.sphere_visible(*sphere):
+        cull_stats['drawn'] += 1
+        return True
+    cull_stats['culled'] += 1
+    return False
 
 # Funciones para el Skybox ---
 
+# Parametros de muestreo de la textura del cielo
+SKYBOX_TEXTURE_PARAMS = dict(
+    min_filter=GL_LINEAR_MIPMAP_LINEAR,
+    mag_filter=GL_LINEAR,
+    wrap=GL_CLAMP,
+    mipmap=True,
+    flip=False)
+
 def load_texture(filepath):
-    """Carga una textura desde un archivo y la añade a la lista global."""
-    textures.append(glGenTextures(1))
-    id = len(textures) - 1
-    glBindTexture(GL_TEXTURE_2D, textures[id])
-    glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_S, GL_CLAMP)
-    glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_T, GL_CLAMP)
-    glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_LINEAR)
-    glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_LINEAR_MIPMAP_LINEAR)
+    """
+    Carga una textura (via el registro compartido, que la toma del bundle
+    de assets si esta ahi) y la añade a la lista global.
+    """
     try:
-        image = pygame.image.load(filepath).convert()
-        w, h = image.get_rect().size
-        image_data = pygame.image.tostring(image, "RGBA")
-        glTexImage2D(GL_TEXTURE_2D, 0, GL_RGBA, w, h, 0, GL_RGBA, GL_UNSIGNED_BYTE, image_data)
-        glGenerateMipmap(GL_TEXTURE_2D)
+        texid = texture_registry.acquire(filepath, **SKYBOX_TEXTURE_PARAMS)
     except FileNotFoundError:
         print(f"Error: No se pudo cargar la textura {filepath}")
         raise
-
-def draw_skybox_quad(vertices):
-    """Dibuja un solo quad del skybox."""
-    tex_coords = [(0.0, 0.0), (1.0, 0.0), (1.0, 1.0), (0.0, 1.0)]
-    glBegin(GL_QUADS)
-    for i in range(4):
-        glTexCoord2f(tex_coords[i][0], tex_coords[i][1])
-        glVertex3d(vertices[i][0], vertices[i][1], vertices[i][2])
-    glEnd()
-
-def draw_skybox():
-    """Dibuja las 6 caras del skybox."""
-    # Usar textures[0] porque es la primera (y unica) que cargamos
-    glBindTexture(GL_TEXTURE_2D, textures[0])
-    half_size = SkyboxSize / 2
-    faces = [
-        # Cara frontal
-        [(-half_size, half_size, -half_size), (half_size, half_size, -half_size),
-         (half_size, -half_size, -half_size), (-half_size, -half_size, -half_size)],
-        # Cara trasera
-        [(half_size, half_size, half_size), (-half_size, half_size, half_size),
-         (-half_size, -half_size, half_size), (half_size, -half_size, half_size)],
-        # Cara izquierda
-        [(-half_size, half_size, half_size), (-half_size, half_size, -half_size),
-         (-half_size, -half_size, -half_size), (-half_size, -half_size, half_size)],
-        # Cara derecha
-        [(half_size, half_size, -half_size), (half_size, half_size, half_size),
-         (half_size, -half_size, half_size), (half_size, -half_size, -half_size)],
-        # Cara superior
-        [(-half_size, half_size, half_size), (half_size, half_size, half_size),
-         (half_size, half_size, -half_size), (-half_size, half_size, -half_size)],
-        # Cara inferior
-        [(-half_size, -half_size, half_size), (half_size, -half_size, half_size),
-         (half_size, -half_size, -half_size), (-half_size, -half_size, -half_size)]
-    ]
-    for vertices in faces:
-        draw_skybox_quad(vertices)
+    textures.append(texid)
+
+def on_skybox_loaded(texid):
+    """Crea el skybox cuando AsyncLoader termina de subir su textura."""
+    global skybox
+    textures.append(texid)
+    skybox = Skybox(SkyboxSize, texture=texid)
+
+def on_granja_loaded(mesh):
+    """
+    Toma un handle de la granja ya precargada por AsyncLoader. 'mesh' es
+    el OBJ que AsyncLoader ya registro en el AssetManager; no se guarda
+    directo porque granja necesita un MeshHandle: load_mesh encuentra ese
+    mismo OBJ en cache, sin volver a cargarlo, y cuenta la referencia.
+    """
+    global granja
+    granja = load_mesh("obj/farm/granja.obj", swapyz=True)
+
+def on_world_loaded(world):
+    """Toma la granja ya dividida en trozos por AsyncLoader."""
+    global granja
+    granja = world
+
+def load_granja():
+    """Granja completa o dividida en trozos segun WORLD_TILE_SIZE."""
+    if WORLD_TILE_SIZE:
+        return load_world("obj/farm/granja.obj", granja_matrix, WORLD_TILE_SIZE,
+                          (X_MIN, X_MAX, Z_MIN, Z_MAX), WORLD_VIEW_RADIUS,
+                          swapyz=True, budget=WORLD_TILE_BUDGET)
+    return load_mesh("obj/farm/granja.obj", swapyz=True)
+
+def start_async_loading():
+    """Encola en AsyncLoader todo lo que Init cargaba de forma sincrona."""
+    global loader
+    loader = AsyncLoader(workers=LOADER_WORKERS, budget=LOADER_BUDGET)
+    robot_jobs = [loader.load_mesh(path, swapyz=True, lod_cells=LOD_CELLS)
+                  for path in robot.model_files()]
+    loader.after(robot_jobs, lambda: robot.load_models(LOD_CELLS))
+    if WORLD_TILE_SIZE:
+        loader.load_world("obj/farm/granja.obj", granja_matrix, WORLD_TILE_SIZE,
+                          (X_MIN, X_MAX, Z_MIN, Z_MAX), WORLD_VIEW_RADIUS,
+                          swapyz=True, callback=on_world_loaded, budget=WORLD_TILE_BUDGET)
+    else:
+        loader.load_mesh("obj/farm/granja.obj", swapyz=True, callback=on_granja_loaded)
+    if not SKYBOX_CUBE_FACES:
+        loader.load_texture("texturas/cielo.bmp", callback=on_skybox_loaded,
+                            **SKYBOX_TEXTURE_PARAMS)
+
+def report_startup_trace():
+    """Imprime y/o exporta la traza de arranque una sola vez."""
+    global startup_trace_done
+    startup_trace_done = True
+    # Solo interesa el arranque; despues se deja de registrar
+    tracer.enabled = False
+    if STARTUP_TRACE_PRINT:
+        print(tracer.report())
+    if STARTUP_TRACE_JSON:
+        tracer.write(STARTUP_TRACE_JSON)
+        with open(STARTUP_TRACE_JSON + ".folded", "w") as f:
+            f.write(tracer.folded())
 
 def Init():
     """ Funcion de inicializacion general. """
     global robot
     global gallina
     global granja, granja_matrix # Hacer globales las nuevas variables
-    global font
+    global font, hud, overlay_font
+    global skybox
     global chickenCounter
+    global asset_bundle
 
-    pygame.init()
-    pygame.font.init()
-    font = pygame.font.SysFont("Arial", 32, bold=True)
+    with tracer.span('pygame.init'):
+        pygame.init()
+        pygame.font.init()
+    with tracer.span('font'):
+        font = pygame.font.SysFont("Arial", 32, bold=True)
+        overlay_font = pygame.font.SysFont("Courier", 16)
+        hud = HUD(screen_width, screen_height, font)
 
-    screen = pygame.display.set_mode(
-        (screen_width, screen_height), DOUBLEBUF | OPENGL)
-    pygame.display.set_caption("Captura las Gallinas")
+    with tracer.span('set_mode'):
+        screen = pygame.display.set_mode(
+            (screen_width, screen_height), DOUBLEBUF | OPENGL)
+        pygame.display.set_caption("Captura las Gallinas")
 
     glMatrixMode(GL_PROJECTION)
     glLoadIdentity()
@@ -131,12 +280,29 @@ def Init():
 
     glEnable(GL_COLOR_MATERIAL)
 
+    OBJ.backend = OBJ_BACKEND
+    OBJ.index_buffers = INDEXED_VBO
+    OBJ.keep_geometry = not DROP_CPU_GEOMETRY
+    texture_registry.budget_bytes = TEXTURE_BUDGET_BYTES
+
+    if ASSET_BUNDLE:
+        try:
+            with tracer.span('bundle'):
+                asset_bundle = open_bundle(ASSET_BUNDLE)
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            print(f"Error: No se pudo abrir {ASSET_BUNDLE} ({e}); se cargan los archivos sueltos")
+
     # Creación del robot
-    robot = Cuerpo(
-        filepath="obj/robot/robot.obj",
-        initial_pos=[0.0, 18.0, 0.0],
-        scale=1.5
-    )
+    with tracer.span('robot'):
+        robot = Cuerpo(
+            filepath="obj/robot/robot.obj",
+            initial_pos=[0.0, 18.0, 0.0],
+            scale=1.5,
+            load_model=not ASYNC_LOADING,
+            lod_cells=LOD_CELLS
+        )
 
     # Creación de la gallina
     # gallina = Gallina(
@@ -145,86 +311,41 @@ def Init():
     #     scale=3.0
     # )
     
+    # La granja no se mueve: su Transform se calcula una sola vez (antes de
+    # cargarla, porque los trozos se reparten en coordenadas del mundo)
+    granja_transform = Transform()
+    granja_matrix = granja_transform.update('granja', yaw_scale_matrix, 0.0, 0.0, 0.0, 7.0, 0.0)
+
+    if ASYNC_LOADING:
+        start_async_loading()
+
     # --- Cargar la Granja ---
-    try:
-        granja = OBJ(filename="obj/farm/granja.obj", swapyz=True)
-    except FileNotFoundError:
-        print("Error: No se pudo cargar obj/farm/granja.obj")
-        granja = None
-    
-    # Pre-calcular la matriz de transformacion para la granja
-    tx, ty, tz = 0.0, 0.0, 0.0
-    sx = sy = sz = 7.0
-    r = math.radians(0.0)
-    s = math.radians(0.0)
-
-    cos_r, sin_r = math.cos(r), math.sin(r)
-    cos_s, sin_s = math.cos(s), math.sin(s)
-
-    m0 = sx * (cos_r * cos_s - sin_r * sin_s)
-    m2 = sx * (-cos_r * sin_s - sin_r * cos_s)
-    m5 = sy
-    m8 = sz * (sin_r * cos_s + cos_r * sin_s)
-    m10 = sz * (-sin_r * sin_s + cos_r * cos_s)
-
-    granja_matrix = [
-        m0,  0.0,  m2,  0.0,
-       0.0,   m5, 0.0,  0.0,
-        m8,  0.0, m10,  0.0,
-        tx,   ty,  tz,  1.0
-    ]
+    if not ASYNC_LOADING:
+        try:
+            with tracer.span('granja'):
+                granja = load_granja()
+        except FileNotFoundError:
+            print("Error: No se pudo cargar obj/farm/granja.obj")
+            granja = None
 
     # Cargar textura del Skybox ---
     try:
-        load_texture("texturas/cielo.bmp")
+        with tracer.span('skybox'):
+            if SKYBOX_CUBE_FACES:
+                skybox = Skybox(SkyboxSize, cube_texture=texture_registry.acquireCubeMap(SKYBOX_CUBE_FACES))
+            elif not ASYNC_LOADING:
+                load_texture("texturas/cielo.bmp")
+                skybox = Skybox(SkyboxSize, texture=textures[0])
     except Exception as e:
         print(f"Error cargando la textura del skybox: {e}")
 
 # Función para mostrar texto en la pantalla
 
 def draw_text(text, x, y, color=(255,255,255)):
-    global font
-
-    # Crear superficie del texto
-    surface = font.render(text, True, color)
-    text_data = pygame.image.tostring(surface, "RGBA", True)
-    width, height = surface.get_size()
-
-    # Cambiar a proyección 2D
-    glMatrixMode(GL_PROJECTION)
-    glPushMatrix()
-    glLoadIdentity()
-    gluOrtho2D(0, screen_width, 0, screen_height)
-
-    glMatrixMode(GL_MODELVIEW)
-    glPushMatrix()
-    glLoadIdentity()
-
-    glDisable(GL_LIGHTING)
-    glDisable(GL_DEPTH_TEST)
-    glDisable(GL_TEXTURE_2D)
-
-    # --- ARREGLO IMPORTANTE: alineamiento ---
-    glPixelStorei(GL_UNPACK_ALIGNMENT, 1)
-
-    # --- ARREGLO MEGA IMPORTANTE: soporte para alfa ---
-    glEnable(GL_BLEND)
-    glBlendFunc(GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA)
-
-    # (x,y) desde arriba
-    glRasterPos2i(x, screen_height - y - height)
-
-    glDrawPixels(width, height, GL_RGBA, GL_UNSIGNED_BYTE, text_data)
-
-    glDisable(GL_BLEND)
-
-    glEnable(GL_DEPTH_TEST)
-    glEnable(GL_LIGHTING)
-
-    glPopMatrix()  # MODELVIEW
-    glMatrixMode(GL_PROJECTION)
-    glPopMatrix()
-    glMatrixMode(GL_MODELVIEW)
+    """Dibuja texto con el HUD; solo se rasteriza cuando el texto cambia."""
+    hud.begin()
+    hud.draw_text(text, x, y, color)
+    hud.end()
 
 
 def display():
@@ -238,9 +359,10 @@ def display():
     center_x, center_y, center_z = 0.0, 5.0, 0.0
 
     if robot:
-        robot_x, robot_y, robot_z = robot.position
-        robot_dir_x = robot.direction[0]
-        robot_dir_z = robot.direction[2]
+        # Posicion y direccion interpoladas entre los dos ultimos pasos
+        (robot_x, robot_y, robot_z), rotation_y, _ = robot.render_state()
+        robot_dir_x = math.cos(math.radians(rotation_y))
+        robot_dir_z = -math.sin(math.radians(rotation_y))
         scale_factor = robot.scale_factor
         distance_behind_factor = 12.0
         height_offset_factor = 8.0
@@ -260,60 +382,117 @@ def display():
               center_x, center_y, center_z, 
               0.0, 1.0, 0.0)
 
+    # Frustum de la camara actual (FOVY, ZNEAR, ZFAR y gluLookAt)
+    frustum = Frustum.from_gl()
+    cull_stats['drawn'] = cull_stats['culled'] = 0
+    profiler.lap('camara')
+
     # --- Dibujar Skybox ---
-    glPushMatrix()
-    glDisable(GL_LIGHTING)   
-    glDisable(GL_DEPTH_TEST)  
-    
-    glEnable(GL_TEXTURE_2D) 
-    
-    draw_skybox()
-    
-    glBindTexture(GL_TEXTURE_2D, 0)
-    
-    glDisable(GL_TEXTURE_2D) 
-    glEnable(GL_DEPTH_TEST)  
-    glEnable(GL_LIGHTING)    
-    glPopMatrix()
+    if skybox:
+        glPushMatrix()
+        glDisable(GL_LIGHTING)
+        glDisable(GL_DEPTH_TEST)
+
+        skybox.draw()
+
+        glEnable(GL_DEPTH_TEST)
+        glEnable(GL_LIGHTING)
+        glPopMatrix()
+    profiler.lap('skybox')
 
     # --- Dibujar la Granja ---
-    if granja:
+    if WORLD_TILE_SIZE and granja:
+        # Subir y soltar trozos segun donde esta el robot
+        focus_x, focus_z = (robot_x, robot_z) if robot else (center_x, center_z)
+        granja.update(focus_x, focus_z)
+        granja.draw(focus_x, focus_z, frustum)
+        cull_stats['drawn'] += granja.stats['drawn']
+        cull_stats['culled'] += granja.stats['culled']
+    elif granja and is_visible(frustum, transform_sphere(
+            granja_matrix, granja.bounds_center, granja.bounds_radius)):
         glPushMatrix()
         glMultMatrixf(granja_matrix)
         granja.render()
         glPopMatrix()
+    profiler.lap('granja')
     
     # Dibujar al robot
-    if robot:
+    if robot and is_visible(frustum, robot.bounding_sphere()):
+        robot.update_lod((eye_x, eye_y, eye_z), lod_selector)
         robot.draw()
+    profiler.lap('robot')
 
     # Dibujar la gallina 
-    # if gallina:
+    # if gallina and is_visible(frustum, gallina.bounding_sphere()):
+    #     gallina.update_lod((eye_x, eye_y, eye_z), lod_selector)
     #     gallina.draw()
 
 # --- Bucle Principal ---
 done = False
-Init()
+with tracer.span('Init'):
+    Init()
 clock = pygame.time.Clock()
+keyboard = KeyboardInput()
+last_time = time.perf_counter()
 
 while not done:
+    profiler.begin_frame()
     for event in pygame.event.get():
         if event.type == pygame.QUIT or (event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE):
             done = True
+        elif event.type == pygame.KEYDOWN and event.key == PROFILER_KEY:
+            profiler.toggle_overlay()
+
+    keys = keyboard.poll()
+    profiler.lap('eventos')
 
-    keys = pygame.key.get_pressed()
+    # Subir a la GPU lo que los hilos de carga ya terminaron
+    if loader:
+        loader.update()
+        profiler.lap('carga')
 
-    # Actualizar el estado del robot
+    # Actualizar el estado del robot en pasos fijos
+    now = time.perf_counter()
+    steps = timestep.advance(now - last_time)
+    last_time = now
     if robot:
-        robot.move(keys)
+        for _ in range(steps):
+            robot.move(keys, chicken_index)
+        robot.alpha = timestep.alpha
+    profiler.lap('move')
 
     # Renderizar la escena
     display()
 
     draw_text(f"hasChicken: {robot.hasChicken}", 20, 20)
 
+    if loader and loader.busy():
+        progress = loader.progress()
+        hud.begin()
+        hud.draw_text(f"Cargando... {int(progress * 100)}%", 20, 60)
+        hud.draw_bar(progress, 20, 100, 300, 12)
+        hud.end()
+
+    if profiler.overlay:
+        hud.begin()
+        profiler.draw_overlay(hud, screen_width - 300, 20, font=overlay_font)
+        hud.end()
+    profiler.lap('texto')
+
     pygame.display.flip()
+    profiler.lap('flip')
+
+    if not startup_trace_done:
+        tracer.mark('first_flip')
+        if not (loader and loader.busy()):
+            tracer.mark('assets_loaded')
+            report_startup_trace()
+
+    clock.tick(MAX_FPS)
+    profiler.lap('espera')
+    profiler.end_frame()
 
-    clock.tick(60)
+if FRAME_TRACE_FILE:
+    profiler.write(FRAME_TRACE_FILE)
 
 pygame.quit()
\ No newline at end of file
@@ -1,26 +1,287 @@
 import os
-import pygame
+import re
+import sys
+import json
+import mmap
+import ctypes
+import struct
+import hashlib
+from array import array
+from itertools import accumulate
 from OpenGL.GL import *
 
+from texregistry import registry as texture_registry
+from tracer import tracer
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+_NUMPY_TYPES = {'f': 'float32', 'i': 'int32', 'I': 'uint32'}
+
+# --- Cache binario de mallas ---
+# Archivo "<modelo>.obj.cache" junto al .obj con la geometria ya parseada.
+# Cabecera: magic, version, swapyz y longitud de los metadatos (JSON con
+# las dependencias, los conteos y la tabla de materiales). Despues vienen
+# los arreglos planos alineados a 4 bytes, en el orden de CACHE_SECTIONS,
+# y si ya se calcularon, los buffers indexados de generate() (vertices
+# float32 e indices; ver 'indexed' en los metadatos).
+CACHE_MAGIC = b'OBJC'
+CACHE_VERSION = 2
+CACHE_HEADER = struct.Struct('<4sIB3xI')
+CACHE_SECTIONS = (
+    ('vertices', 'f'),
+    ('normals', 'f'),
+    ('texcoords', 'f'),
+    ('face_sizes', 'I'),
+    ('face_v', 'i'),
+    ('face_vn', 'i'),
+    ('face_vt', 'i'),
+    ('face_mtl', 'i'),
+)
+
+
+def _file_digest(path):
+    h = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 16), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _file_key(path):
+    st = os.stat(path)
+    return {'path': os.path.abspath(path), 'mtime': st.st_mtime_ns, 'size': st.st_size,
+            'sha1': _file_digest(path)}
+
+
+def _key_is_fresh(dep):
+    # mtime y tamaño iguales: valido sin leer el archivo. Si solo cambio el
+    # mtime (p. ej. tras un checkout) se compara el hash del contenido.
+    try:
+        st = os.stat(dep['path'])
+    except OSError:
+        return False
+    if st.st_size != dep['size']:
+        return False
+    if st.st_mtime_ns == dep['mtime']:
+        return True
+    return _file_digest(dep['path']) == dep['sha1']
+
+
+def _face_normal(positions):
+    # Normal geometrica para caras sin 'vn' (los VBO necesitan una normal
+    # por vertice; el modo inmediato reutilizaba la ultima enviada).
+    (x0, y0, z0), (x1, y1, z1), (x2, y2, z2) = positions[:3]
+    ux, uy, uz = x1 - x0, y1 - y0, z1 - z0
+    vx, vy, vz = x2 - x0, y2 - y0, z2 - z0
+    nx, ny, nz = uy * vz - uz * vy, uz * vx - ux * vz, ux * vy - uy * vx
+    length = (nx * nx + ny * ny + nz * nz) ** 0.5 or 1.0
+    return nx / length, ny / length, nz / length
+
+
+def _typed(values, typecode):
+    """
+    Devuelve 'values' (array, arreglo NumPy o lista) como array.array del
+    tipo dado. Los arreglos NumPy se copian como bytes, sin crear un
+    objeto de Python por numero.
+    """
+    if isinstance(values, array):
+        return values if values.typecode == typecode else array(typecode, values)
+    if hasattr(values, 'ravel'):
+        return array(typecode, np.ascontiguousarray(values, dtype=_NUMPY_TYPES[typecode]).tobytes())
+    return array(typecode, values)
+
+
+def _index_range(values):
+    """
+    (minimo, maximo) de un array de indices; (0, 0) si esta vacio.
+    """
+    if not values:
+        return 0, 0
+    if np is not None:
+        view = np.frombuffer(values, dtype=_NUMPY_TYPES[values.typecode])
+        return int(view.min()), int(view.max())
+    return min(values), max(values)
+
+
+# Anclar al '\n' (en vez de '^' con re.M) deja que el motor busque el
+# prefijo literal directamente, que es mucho mas rapido. Se aceptan lineas
+# indentadas, como en el parser original (line.split()).
+_LINE_RE = {head: re.compile(r'\n *%s +([^\n]*)' % head)
+            for head in ('v', 'vn', 'vt', 'f', 'mtllib')}
+_USEMTL_RE = re.compile(r'\n *(?:usemtl|usemat) +([^\n]*)')
+
+
+def _float_block(rows, width):
+    """
+    Convierte las lineas 'v'/'vn'/'vt' (sin el prefijo) a un arreglo
+    float32 de una sola vez. Igual que el parser original, solo se toman
+    los primeros 'width' valores de cada linea.
+    """
+    if not rows:
+        return np.zeros((0, width), dtype=np.float32)
+    # Se parsea en float64 y luego se reduce, igual que float() + float32.
+    flat = np.fromstring(' '.join(rows), dtype=np.float64, sep=' ')
+    if flat.size != width * len(rows):
+        flat = np.fromstring(' '.join(' '.join(r.split()[:width]) for r in rows),
+                             dtype=np.float64, sep=' ')
+    return flat.astype(np.float32).reshape(-1, width)
+
+
+def _corner_fields(corner):
+    # v[/vt[/vn]] con campos vacios o ausentes -> "v vt vn" con ceros
+    w = corner.split('/')
+    return ' '.join(x or '0' for x in (w + ['', ''])[:3])
+
+
+def _face_block(rows):
+    """
+    Convierte los registros 'f' (v, v/vt, v//vn o v/vt/vn) a arreglos de
+    indices. Los indices ausentes quedan en 0, como en el parser original.
+    """
+    text = '\n'.join(rows).replace('//', '/0/') + '\n'
+    # Esquinas por cara: inicios de token (no blanco precedido de blanco)
+    # contados por linea, sin dividir cada registro en Python.
+    raw = np.frombuffer(text.encode('utf-8'), dtype=np.uint8)
+    newline = raw == 10
+    blank = newline | (raw == 32) | (raw == 13)
+    starts = ~blank
+    starts[1:] &= blank[:-1]
+    corners = np.flatnonzero(starts)
+    line_of = np.searchsorted(np.flatnonzero(newline), corners)
+    sizes = np.bincount(line_of, minlength=len(rows)).astype(np.int32)
+    n_corners = len(corners)
+    # Barras por esquina: si todas tienen la misma forma el bloque se
+    # convierte de una vez; si no (caras 'f 1 2 3' junto a 'f 1//1 ...',
+    # o campos vacios al final) se rellena cada esquina hasta v/vt/vn.
+    corner_of = np.searchsorted(corners, np.flatnonzero(raw == 47), side='right') - 1
+    slashes = np.bincount(corner_of, minlength=n_corners)
+    if n_corners and slashes.min() == slashes.max() <= 2 and '/ ' not in text and '/\n' not in text:
+        width = int(slashes[0]) + 1
+    else:
+        width = 3
+        text = ' '.join(map(_corner_fields, text.split()))
+    idx = np.fromstring(text.replace('/', ' '), dtype=np.int64, sep=' ')
+    if idx.size != width * n_corners:
+        raise ValueError("malformed face record")
+    idx = idx.reshape(-1, width)
+    zeros = np.zeros(n_corners, dtype=np.int32)
+    face_v = idx[:, 0].astype(np.int32)
+    face_vt = idx[:, 1].astype(np.int32) if width >= 2 else zeros
+    face_vn = idx[:, 2].astype(np.int32) if width >= 3 else zeros
+    return sizes, face_v, face_vn, face_vt
+
+
+def parse_arrays(filename, swapyz=False):
+    """
+    Parser vectorizado de archivos OBJ. Lee el archivo una sola vez,
+    clasifica las lineas por prefijo y convierte cada bloque con NumPy.
+    Devuelve un diccionario con la geometria en arreglos planos:
+    vertices/normals (N, 3) y texcoords (N, 2) en float32; face_sizes,
+    face_v, face_vn, face_vt y face_mtl (id en 'material_names', -1 si la
+    cara no tiene material) en int32.
+    """
+    if np is None:
+        raise ImportError("parse_arrays requires numpy")
+    with open(filename, 'r') as f:
+        # El salto inicial permite anclar los patrones a '\n<prefijo> '.
+        text = '\n' + f.read().replace('\t', ' ')
+
+    # Cada bloque se extrae con una expresion regular (en C) en lugar de
+    # recorrer las lineas en Python. Las caras se agrupan por 'usemtl'.
+    blocks = {head: _LINE_RE[head].findall(text) for head in ('v', 'vn', 'vt')}
+    blocks['f'] = []
+    face_mtl = []
+    names = []
+    ids = {}
+    segments = _USEMTL_RE.split(text)
+    for i in range(0, len(segments), 2):
+        mtl_id = -1
+        if i > 0:
+            name = segments[i - 1].split()[0]
+            if name not in ids:
+                ids[name] = len(names)
+                names.append(name)
+            mtl_id = ids[name]
+        rows = _LINE_RE['f'].findall(segments[i])
+        blocks['f'].extend(rows)
+        face_mtl.extend([mtl_id] * len(rows))
+    mtllib = _LINE_RE['mtllib'].search(text)
+    if mtllib:
+        mtllib = os.path.join(os.path.dirname(filename), mtllib.group(1).split()[0])
+
+    vertices = _float_block(blocks['v'], 3)
+    normals = _float_block(blocks['vn'], 3)
+    if swapyz:
+        vertices = vertices[:, [0, 2, 1]]
+        normals = normals[:, [0, 2, 1]]
+    if blocks['f']:
+        face_sizes, face_v, face_vn, face_vt = _face_block(blocks['f'])
+    else:
+        face_sizes = face_v = face_vn = face_vt = np.zeros(0, dtype=np.int32)
+    return {
+        'vertices': np.ascontiguousarray(vertices),
+        'normals': np.ascontiguousarray(normals),
+        'texcoords': _float_block(blocks['vt'], 2),
+        'face_sizes': face_sizes,
+        'face_v': face_v,
+        'face_vn': face_vn,
+        'face_vt': face_vt,
+        'face_mtl': np.array(face_mtl, dtype=np.int32),
+        'material_names': names,
+        'mtllib': mtllib,
+    }
+
+
+# Formato intercalado de los VBO: posicion (3), normal (3), texcoord (2).
+VERTEX_FLOATS = 8
+VERTEX_STRIDE = VERTEX_FLOATS * 4
+
+
 class OBJ:
+    # Geometria en arreglos planos (ver setArrays), no en listas por vertice:
+    #   vertices, normals   array('f') x, y, z seguidos
+    #   texcoords           array('f') u, v seguidos
+    #   face_offsets        array('I') inicio de cada cara en los indices (caras + 1)
+    #   face_v/vn/vt        array('i') indices base 1 por esquina (0 = sin dato)
+    #   face_mtl            array('i') id de material por cara en material_names (-1 = ninguno)
     generate_on_init = True
+    # False: los assets sueltan la copia en CPU (dropGeometry) una vez que
+    # la malla y sus niveles de detalle estan en la GPU.
+    keep_geometry = True
+    # 'displaylist': glBegin/glEnd compilado en una display list (original).
+    # 'vbo': triangulos intercalados en un VBO, un glDrawArrays por material.
+    backend = 'displaylist'
+    # Con 'vbo' y NumPy: vertices sin repetir mas un index buffer con los
+    # triangulos reordenados para la cache de vertices (ver meshopt.py).
+    index_buffers = True
+    use_cache = True
+    cache_suffix = '.cache'
+    # Bundle de assets abierto (ver bundle.open_bundle); se consulta antes
+    # que el cache y el texto.
+    bundle = None
+    # 'numpy' usa parse_arrays; 'python' el parser linea por linea.
+    parser = 'numpy' if np is not None else 'python'
     @classmethod
-    def loadTexture(cls, imagefile):
-        surf = pygame.image.load(imagefile)
-        image = pygame.image.tostring(surf, 'RGBA', 1)
-        ix, iy = surf.get_rect().size
-        texid = glGenTextures(1)
-        glBindTexture(GL_TEXTURE_2D, texid)
-        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_LINEAR)
-        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_LINEAR)
-        glTexImage2D(GL_TEXTURE_2D, 0, GL_RGBA, ix, iy, 0, GL_RGBA, GL_UNSIGNED_BYTE, image)
-        return texid
+    def loadTexture(cls, imagefile, pixels=None):
+        # Compartida con el resto del proceso a traves del registro
+        return texture_registry.acquire(imagefile, pixels=pixels)
 
     @classmethod
-    def loadMaterial(cls, filename):
+    def parseMaterial(cls, filename):
+        with tracer.span('loadMaterial', file=os.path.basename(filename)):
+            if cls.bundle is not None:
+                contents = cls.bundle.material(filename)
+                if contents is not None:
+                    return contents
+            return cls.readMaterial(filename)
+
+    @classmethod
+    def readMaterial(cls, filename):
         contents = {}
         mtl = None
-        dirname = os.path.dirname(filename)
         for line in open(filename, "r"):
             if line.startswith('#'): continue
             values = line.split()
@@ -31,20 +292,116 @@ class OBJ:
                 raise ValueError("mtl file doesn't start with newmtl stmt")
             elif values[0] == 'map_Kd':
                 mtl[values[0]] = values[1]
-                imagefile = os.path.join(dirname, mtl['map_Kd'])
-                mtl['texture_Kd'] = cls.loadTexture(imagefile)
             else:
                 mtl[values[0]] = list(map(float, values[1:]))
         return contents
 
-    def __init__(self, filename, swapyz=False):
-        self.vertices = []
-        self.normals = []
-        self.texcoords = []
-        self.faces = []
+    @classmethod
+    def loadTextures(cls, contents, dirname, pixels=None):
+        """
+        Sube las texturas 'map_Kd' de los materiales. 'pixels' puede traer
+        imagenes ya decodificadas por decodeTextures() ({ruta: pixeles}).
+        """
+        for mtl in contents.values():
+            if 'map_Kd' in mtl:
+                imagefile = os.path.join(dirname, mtl['map_Kd'])
+                mtl['texture_Kd'] = cls.loadTexture(
+                    imagefile, pixels.get(imagefile) if pixels else None)
+        return contents
+
+    @classmethod
+    def loadMaterial(cls, filename):
+        contents = cls.parseMaterial(filename)
+        return cls.loadTextures(contents, os.path.dirname(filename))
+
+    def __init__(self, filename, swapyz=False, defer_gl=False):
+        # defer_gl=True solo lee y procesa los archivos, sin llamar a
+        # OpenGL (p. ej. desde un hilo de carga); despues se llama a
+        # uploadTextures() y generate() en el hilo de render.
+        self.reset()
+        # Con un bundle el .obj puede no venir junto al juego
+        size = os.path.getsize(filename) if os.path.exists(filename) else 0
+        with tracer.span('OBJ', file=os.path.basename(filename), bytes=size) as attrs:
+            loaded = False
+            if self.bundle is not None:
+                with tracer.span('loadBundle'):
+                    loaded = self.loadBundle(filename, swapyz)
+            if not loaded:
+                with tracer.span('loadCache'):
+                    loaded = self.use_cache and self.loadCache(filename, swapyz)
+            if not loaded:
+                with tracer.span('parse', parser=self.parser):
+                    if self.parser == 'numpy' and np is not None:
+                        self.parseNumpy(filename, swapyz)
+                    else:
+                        self.parse(filename, swapyz)
+                if self.use_cache:
+                    with tracer.span('saveCache'):
+                        self.saveCache(filename, swapyz)
+            self.groupFaces()
+            self.computeBounds()
+            attrs['cached'] = bool(loaded)
+            attrs['faces'] = self.faceCount()
+            if defer_gl:
+                return
+            self.uploadTextures()
+            if self.generate_on_init:
+                self.generate()
+
+    @classmethod
+    def fromGeometry(cls, data, mtl, defer_gl=False):
+        """
+        Crea un OBJ a partir de geometria ya construida (p. ej. un nivel de
+        detalle o un trozo de otra malla), en el formato de parse_arrays.
+        Comparte la tabla de materiales de la malla original, asi que no
+        libera sus texturas en free().
+        """
+        obj = cls.__new__(cls)
+        obj.reset()
+        obj.setArrays(data)
+        obj.mtl = mtl
+        obj.owns_textures = False
+        obj.groupFaces()
+        obj.computeBounds()
+        if obj.generate_on_init and not defer_gl:
+            obj.generate()
+        return obj
+
+    def reset(self):
+        self.vertices = array('f')
+        self.normals = array('f')
+        self.texcoords = array('f')
+        self.face_offsets = array('I', [0])
+        self.face_v = array('i')
+        self.face_vn = array('i')
+        self.face_vt = array('i')
+        self.face_mtl = array('i')
+        self.material_names = []
         self.gl_list = 0
+        self.vbo = 0
+        self.ibo = 0
+        self.index_type = GL_UNSIGNED_INT
+        self.index_size = 4
+        self.batches = []
+        self.material_groups = {}
+        self.stats = {}
+        self.bounds_min = self.bounds_max = self.bounds_center = (0.0, 0.0, 0.0)
+        self.bounds_radius = 0.0
+        self.mtllib = None
+        self.mtl = {}
+        self.owns_textures = True
+        self.prepared = None
+        self.bundle_key = None
+        # (ruta, swapyz) del .obj cuyo cache aun no guarda los buffers indexados
+        self.cache_source = None
+
+    def parse(self, filename, swapyz=False):
         dirname = os.path.dirname(filename)
-        material = None
+        vertices, normals, texcoords = array('f'), array('f'), array('f')
+        face_sizes = array('I')
+        face_v, face_vn, face_vt, face_mtl = array('i'), array('i'), array('i'), array('i')
+        names, ids = [], {}
+        material = -1
         for line in open(filename, "r"):
             if line.startswith('#'): continue
             values = line.split()
@@ -53,64 +410,645 @@ class OBJ:
                 v = list(map(float, values[1:4]))
                 if swapyz:
                     v = v[0], v[2], v[1]
-                self.vertices.append(v)
+                vertices.extend(v)
             elif values[0] == 'vn':
                 v = list(map(float, values[1:4]))
                 if swapyz:
                     v = v[0], v[2], v[1]
-                self.normals.append(v)
+                normals.extend(v)
             elif values[0] == 'vt':
-                self.texcoords.append(list(map(float, values[1:3])))
+                texcoords.extend(map(float, values[1:3]))
             elif values[0] in ('usemtl', 'usemat'):
-                material = values[1]
+                if values[1] not in ids:
+                    ids[values[1]] = len(names)
+                    names.append(values[1])
+                material = ids[values[1]]
             elif values[0] == 'mtllib':
-                self.mtl = self.loadMaterial(os.path.join(dirname, values[1]))
+                self.mtllib = os.path.join(dirname, values[1])
+                self.mtl = self.parseMaterial(self.mtllib)
             elif values[0] == 'f':
-                face = []
-                texcoords = []
-                norms = []
                 for v in values[1:]:
                     w = v.split('/')
-                    face.append(int(w[0]))
+                    face_v.append(int(w[0]))
                     if len(w) >= 2 and len(w[1]) > 0:
-                        texcoords.append(int(w[1]))
+                        face_vt.append(int(w[1]))
                     else:
-                        texcoords.append(0)
+                        face_vt.append(0)
                     if len(w) >= 3 and len(w[2]) > 0:
-                        norms.append(int(w[2]))
+                        face_vn.append(int(w[2]))
                     else:
-                        norms.append(0)
-                self.faces.append((face, norms, texcoords, material))
-        if self.generate_on_init:
-            self.generate()
+                        face_vn.append(0)
+                face_sizes.append(len(values) - 1)
+                face_mtl.append(material)
+        self.setArrays({
+            'vertices': vertices, 'normals': normals, 'texcoords': texcoords,
+            'face_sizes': face_sizes, 'face_v': face_v, 'face_vn': face_vn,
+            'face_vt': face_vt, 'face_mtl': face_mtl, 'material_names': names,
+        })
+
+    def parseNumpy(self, filename, swapyz=False):
+        data = parse_arrays(filename, swapyz)
+        self.setArrays(data)
+        self.mtllib = data['mtllib']
+        if self.mtllib:
+            self.mtl = self.parseMaterial(self.mtllib)
+
+    def setArrays(self, data):
+        """
+        Toma la geometria de los arreglos planos que producen parse_arrays,
+        el parser de texto y el cache (los tamaños de cara se guardan como
+        desplazamientos).
+        """
+        self.vertices = _typed(data['vertices'], 'f')
+        self.normals = _typed(data['normals'], 'f')
+        self.texcoords = _typed(data['texcoords'], 'f')
+        face_sizes = _typed(data['face_sizes'], 'I')
+        self.face_offsets = array('I', accumulate(face_sizes, initial=0))
+        self.face_v = _typed(data['face_v'], 'i')
+        self.face_vn = _typed(data['face_vn'], 'i')
+        self.face_vt = _typed(data['face_vt'], 'i')
+        self.face_mtl = _typed(data['face_mtl'], 'i')
+        self.material_names = list(data['material_names'])
+        if (len(self.vertices) % 3 or len(self.normals) % 3 or len(self.texcoords) % 2
+                or self.face_offsets[-1] != len(self.face_v)
+                or not len(self.face_v) == len(self.face_vn) == len(self.face_vt)
+                or len(self.face_mtl) != len(face_sizes)
+                or (self.face_mtl and max(self.face_mtl) >= len(self.material_names))):
+            raise ValueError("face index arrays don't match face sizes")
+        # Indices base 1; 0 marca una normal o texcoord ausente. Un cache
+        # corrupto puede traer indices fuera de rango que solo fallarian
+        # al armar los buffers.
+        for name, indices, count, lowest in (('face_v', self.face_v, len(self.vertices) // 3, 1),
+                                              ('face_vn', self.face_vn, len(self.normals) // 3, 0),
+                                              ('face_vt', self.face_vt, len(self.texcoords) // 2, 0)):
+            low, high = _index_range(indices)
+            if low < lowest or high > count:
+                raise ValueError(f"{name} index out of range")
+
+    def faceCount(self):
+        return len(self.face_offsets) - 1
+
+    def faceSizes(self):
+        offsets = self.face_offsets
+        return array('I', (end - start for start, end in zip(offsets, offsets[1:])))
+
+    def triangleCount(self):
+        # Suma de (esquinas - 2) de todas las caras
+        return self.face_offsets[-1] - 2 * self.faceCount()
+
+    def materialName(self, material_id):
+        return self.material_names[material_id] if material_id >= 0 else None
+
+    def face(self, i):
+        """
+        Cara 'i' como (vertices, normales, texcoords, material), con listas
+        de indices base 1.
+        """
+        start, end = self.face_offsets[i], self.face_offsets[i + 1]
+        return (self.face_v[start:end].tolist(), self.face_vn[start:end].tolist(),
+                self.face_vt[start:end].tolist(), self.materialName(self.face_mtl[i]))
+
+    def iterFaces(self):
+        for i in range(self.faceCount()):
+            yield self.face(i)
+
+    def cachePath(self, filename):
+        return filename + self.cache_suffix
+
+    def saveCache(self, filename, swapyz=False, indexed=None):
+        """
+        Escribe la geometria parseada (y los buffers 'indexed' de
+        indexTriangles, si se dan) en el archivo cache. Si no se puede
+        escribir (directorio de solo lectura, geometria irregular) se omite
+        sin error: el cache es solo una optimizacion.
+        """
+        try:
+            deps = [_file_key(filename)]
+            if self.mtllib:
+                deps.append(_file_key(self.mtllib))
+            materials = {}
+            for name, mtl in getattr(self, 'mtl', {}).items():
+                materials[name] = {k: v for k, v in mtl.items() if k != 'texture_Kd'}
+
+            data = {
+                'vertices': self.vertices,
+                'normals': self.normals,
+                'texcoords': self.texcoords,
+                'face_sizes': self.faceSizes(),
+                'face_v': self.face_v,
+                'face_vn': self.face_vn,
+                'face_vt': self.face_vt,
+                'face_mtl': self.face_mtl,
+            }
+
+            info = {
+                'byteorder': sys.byteorder,
+                'deps': deps,
+                'mtllib': self.mtllib,
+                'materials': materials,
+                'material_names': self.material_names,
+                'lengths': [len(data[name]) for name, _ in CACHE_SECTIONS],
+            }
+            if indexed is not None:
+                vertices, indices, batches, stats = indexed
+                info['indexed'] = {
+                    'vertex_floats': VERTEX_FLOATS,
+                    'dtype': indices.dtype.str,
+                    'lengths': [len(vertices), len(indices)],
+                    'batches': [list(batch) for batch in batches],
+                    'stats': stats,
+                }
+            meta = json.dumps(info).encode('utf-8')
+            meta += b' ' * (-len(meta) % 4)
+
+            path = self.cachePath(filename)
+            tmp = path + '.tmp'
+            with open(tmp, 'wb') as f:
+                f.write(CACHE_HEADER.pack(CACHE_MAGIC, CACHE_VERSION, bool(swapyz), len(meta)))
+                f.write(meta)
+                for name, _ in CACHE_SECTIONS:
+                    data[name].tofile(f)
+                if indexed is not None:
+                    np.ascontiguousarray(vertices, dtype=np.float32).tofile(f)
+                    np.ascontiguousarray(indices).tofile(f)
+            os.replace(tmp, path)
+            self.cache_source = None if indexed is not None else (filename, swapyz)
+            return True
+        except (OSError, KeyError, TypeError, ValueError, OverflowError):
+            return False
+
+    def loadCache(self, filename, swapyz=False):
+        """
+        Carga la geometria desde el archivo cache mapeado en memoria.
+        Devuelve False si no existe, esta desactualizado o corrupto; en ese
+        caso el llamador parsea el texto y reconstruye el cache.
+        """
+        path = self.cachePath(filename)
+        try:
+            with open(path, 'rb') as f, \
+                    mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                magic, version, cached_swapyz, meta_len = CACHE_HEADER.unpack_from(mm, 0)
+                if magic != CACHE_MAGIC or version != CACHE_VERSION:
+                    return False
+                if bool(cached_swapyz) != bool(swapyz):
+                    return False
+                offset = CACHE_HEADER.size
+                meta = json.loads(mm[offset:offset + meta_len].decode('utf-8'))
+                offset += meta_len
+                if meta['byteorder'] != sys.byteorder:
+                    return False
+                if os.path.abspath(meta['deps'][0]['path']) != os.path.abspath(filename):
+                    return False
+                if not all(_key_is_fresh(dep) for dep in meta['deps']):
+                    return False
+
+                data = {}
+                for (name, typecode), length in zip(CACHE_SECTIONS, meta['lengths']):
+                    arr = array(typecode)
+                    end = offset + length * arr.itemsize
+                    if end > len(mm):
+                        return False
+                    arr.frombytes(mm[offset:end])
+                    data[name] = arr
+                    offset = end
+                indexed = None
+                info = meta.get('indexed')
+                if info is not None:
+                    n_vertices, n_indices = info['lengths']
+                    end = offset + 4 * n_vertices
+                    index_end = end + int(info['dtype'][2:]) * n_indices
+                    if index_end > len(mm):
+                        return False
+                    if info['vertex_floats'] == VERTEX_FLOATS and np is not None:
+                        indexed = (np.frombuffer(mm[offset:end], dtype=np.float32),
+                                   np.frombuffer(mm[end:index_end], dtype=info['dtype']),
+                                   [tuple(batch) for batch in info['batches']],
+                                   dict(info['stats']))
+                    offset = index_end
+                if offset != len(mm):
+                    return False
+        except (OSError, ValueError, KeyError, TypeError, IndexError,
+                struct.error, UnicodeDecodeError):
+            return False
+
+        data['material_names'] = meta['material_names']
+        try:
+            self.setArrays(data)
+        except (ValueError, IndexError):
+            self.reset()
+            return False
+
+        self.mtllib = meta['mtllib']
+        if self.mtllib:
+            self.mtl = meta['materials']
+        if indexed is not None:
+            if self.usesIndices():
+                self.prepared = (False, None, indexed)
+        else:
+            self.cache_source = (filename, swapyz)
+        return True
+
+    def loadBundle(self, filename, swapyz=False):
+        """
+        Toma la geometria, los materiales y los buffers ya indexados de la
+        malla desde el bundle abierto. Devuelve False si no esta en el
+        bundle (o su .obj cambio); el llamador la carga del cache o texto.
+        """
+        entry = self.bundle.mesh(filename, swapyz)
+        if entry is None:
+            return False
+        level = entry['levels'][0]
+        try:
+            self.setArrays(self.bundle.geometry(entry, level))
+        except (ValueError, KeyError):
+            self.reset()
+            return False
+        self.mtllib = entry['mtllib'] and self.bundle.abspath(entry['mtllib'])
+        self.mtl = self.bundle.materials(entry)
+        self.prepared = self.bundle.prepared(level)
+        self.bundle_key = entry['key']
+        return True
+
+    def decodeTextures(self):
+        """
+        Decodifica las imagenes de los materiales sin subirlas (no usa
+        OpenGL). Devuelve {ruta: pixeles} para uploadTextures().
+        """
+        pixels = {}
+        if self.mtllib:
+            dirname = os.path.dirname(self.mtllib)
+            for mtl in self.mtl.values():
+                if 'map_Kd' in mtl:
+                    imagefile = os.path.join(dirname, mtl['map_Kd'])
+                    pixels[imagefile] = texture_registry.loadPixels(imagefile, True)
+        return pixels
+
+    def uploadTextures(self, pixels=None):
+        if self.mtllib:
+            with tracer.span('uploadTextures'):
+                self.loadTextures(self.mtl, os.path.dirname(self.mtllib), pixels)
+
+    def prepare(self, no_textures=False):
+        """
+        Calcula los triangulos de generate() (y los buffers indexados, si
+        se usan) sin tocar OpenGL, para hacerlo en un hilo de carga;
+        generate() los usa en lugar de recalcularlos.
+        """
+        prepared = self.prepared
+        if prepared is not None and prepared[0] == no_textures and (
+                prepared[2] if self.usesIndices() else prepared[1]) is not None:
+            # Ya vienen preparados (p. ej. del bundle)
+            return
+        triangles = self.triangles(no_textures)
+        indexed = self.buildIndexed(triangles, no_textures) if self.usesIndices() else None
+        self.prepared = (no_textures, triangles, indexed)
+
+    def preparedTriangles(self, no_textures=False):
+        prepared, self.prepared = self.prepared, None
+        if prepared is not None and prepared[0] == no_textures and prepared[1] is not None:
+            return prepared[1]
+        return self.triangles(no_textures)
+
+    def preparedIndexed(self, no_textures=False):
+        prepared = self.prepared
+        if prepared is not None and prepared[0] == no_textures and prepared[2] is not None:
+            self.prepared = None
+            return prepared[2]
+        return self.buildIndexed(self.preparedTriangles(no_textures), no_textures)
+
+    def usesIndices(self):
+        return self.backend == 'vbo' and self.index_buffers and np is not None
+
+    def indexTriangles(self, triangles):
+        """
+        Vertices, indices, lotes y stats de meshopt.build_indexed.
+        """
+        from meshopt import build_indexed
+        with tracer.span('indexTriangles'):
+            return build_indexed(triangles, VERTEX_FLOATS)
+
+    def buildIndexed(self, triangles, no_textures=False):
+        """
+        indexTriangles() que ademas guarda el resultado en el cache de la
+        malla, para que las cargas siguientes no vuelvan a indexar.
+        """
+        indexed = self.indexTriangles(triangles)
+        if self.cache_source is not None and not no_textures and self.use_cache:
+            with tracer.span('saveCache'):
+                self.saveCache(*self.cache_source, indexed=indexed)
+        return indexed
+
+    def computeBounds(self):
+        """
+        Caja alineada a los ejes y esfera envolvente (centrada en la caja)
+        en coordenadas del modelo, para el culling por frustum.
+        """
+        if not self.vertices:
+            return
+        if np is not None:
+            points = np.frombuffer(self.vertices, dtype=np.float32).reshape(-1, 3).astype(np.float64)
+            self.bounds_min = tuple(points.min(axis=0).tolist())
+            self.bounds_max = tuple(points.max(axis=0).tolist())
+        else:
+            it = iter(self.vertices)
+            points = list(zip(it, it, it))
+            xs, ys, zs = zip(*points)
+            self.bounds_min = (min(xs), min(ys), min(zs))
+            self.bounds_max = (max(xs), max(ys), max(zs))
+        cx, cy, cz = self.bounds_center = tuple(
+            (lo + hi) * 0.5 for lo, hi in zip(self.bounds_min, self.bounds_max))
+        if np is not None:
+            self.bounds_radius = float(((points - self.bounds_center) ** 2).sum(axis=1).max()) ** 0.5
+        else:
+            self.bounds_radius = max(
+                (x - cx) ** 2 + (y - cy) ** 2 + (z - cz) ** 2 for x, y, z in points) ** 0.5
+
+    def groupFaces(self):
+        """
+        Agrupa las caras por material, en orden de primera aparicion, para
+        que el render cambie de estado una sola vez por material. Devuelve
+        {material: array('I') con los numeros de cara}.
+        """
+        groups = {}
+        if np is not None:
+            ids = np.frombuffer(self.face_mtl, dtype=np.int32)
+            found, first = np.unique(ids, return_index=True)
+            for material_id in found[np.argsort(first)].tolist():
+                faces = np.flatnonzero(ids == material_id).astype(np.uint32)
+                groups[self.materialName(material_id)] = array('I', faces.tobytes())
+        else:
+            for i, material_id in enumerate(self.face_mtl):
+                groups.setdefault(self.materialName(material_id), array('I')).append(i)
+        self.material_groups = groups
+        return groups
+
+    def triangles(self, no_textures=False):
+        """
+        Triangula las caras en abanico (equivalente a GL_POLYGON para
+        poligonos convexos) por grupo de material. Devuelve
+        {material: array('f')} con los vertices en el formato intercalado
+        de VERTEX_FLOATS.
+        """
+        groups = {}
+        for material, faces in (self.material_groups or self.groupFaces()).items():
+            if np is not None:
+                groups[material] = self.fanArrays(faces, no_textures)
+                continue
+            data = groups[material] = array('f')
+            for i in faces:
+                self.appendFan(data, i, no_textures)
+        return groups
+
+    def appendFan(self, data, i, no_textures=False):
+        """
+        Agrega a 'data' los triangulos en abanico de la cara 'i'.
+        """
+        start, end = self.face_offsets[i], self.face_offsets[i + 1]
+        vertices, normals, texcoords = self.vertices, self.normals, self.texcoords
+        positions = [tuple(vertices[3 * v - 3:3 * v]) for v in self.face_v[start:end]]
+        face_normal = None
+        corners = []
+        for k in range(end - start):
+            vn = self.face_vn[start + k]
+            if vn > 0:
+                normal = normals[3 * vn - 3:3 * vn]
+            else:
+                if face_normal is None:
+                    face_normal = _face_normal(positions)
+                normal = face_normal
+            vt = self.face_vt[start + k]
+            if not no_textures and vt > 0:
+                uv = texcoords[2 * vt - 2:2 * vt]
+            else:
+                uv = (0.0, 0.0)
+            corners.append((*positions[k], *normal, *uv))
+        for k in range(1, len(corners) - 1):
+            data.extend(corners[0])
+            data.extend(corners[k])
+            data.extend(corners[k + 1])
+
+    def fanArrays(self, faces, no_textures=False):
+        """
+        appendFan vectorizado con NumPy para un grupo de caras; da los
+        mismos floats que la version por cara.
+        """
+        offsets = np.frombuffer(self.face_offsets, dtype=np.uint32).astype(np.int64)
+        faces = np.frombuffer(faces, dtype=np.uint32).astype(np.int64)
+        per_face = np.maximum(offsets[faces + 1] - offsets[faces] - 2, 0)
+        total = int(per_face.sum())
+        if total == 0:
+            return array('f')
+        # Triangulo k (1..n-2) de cada cara: esquinas 0, k y k + 1
+        face_of = np.repeat(faces, per_face)
+        k = np.arange(total) - np.repeat(np.cumsum(per_face) - per_face, per_face) + 1
+        base = offsets[face_of]
+        corners = np.stack([base, base + k, base + k + 1], axis=1).reshape(-1)
+
+        face_v = np.frombuffer(self.face_v, dtype=np.int32)
+        positions = np.frombuffer(self.vertices, dtype=np.float32).reshape(-1, 3)
+        out = np.zeros((len(corners), VERTEX_FLOATS), dtype=np.float32)
+        out[:, 0:3] = positions[face_v[corners] - 1]
+
+        vn = np.frombuffer(self.face_vn, dtype=np.int32)[corners]
+        has_normal = vn > 0
+        if has_normal.any():
+            normals = np.frombuffer(self.normals, dtype=np.float32).reshape(-1, 3)
+            out[has_normal, 3:6] = normals[vn[has_normal] - 1]
+        if not has_normal.all():
+            # Normal geometrica de la cara, en float64 como _face_normal
+            first = offsets[np.repeat(face_of, 3)[~has_normal]]
+            p0, p1, p2 = (positions[face_v[first + j] - 1].astype(np.float64) for j in range(3))
+            ux, uy, uz = (p1 - p0).T
+            vx, vy, vz = (p2 - p0).T
+            nx, ny, nz = uy * vz - uz * vy, uz * vx - ux * vz, ux * vy - uy * vx
+            length = (nx * nx + ny * ny + nz * nz) ** 0.5
+            length[length == 0] = 1.0
+            out[~has_normal, 3:6] = np.stack([nx / length, ny / length, nz / length], axis=1)
+
+        if not no_textures:
+            vt = np.frombuffer(self.face_vt, dtype=np.int32)[corners]
+            has_uv = vt > 0
+            texcoords = np.frombuffer(self.texcoords, dtype=np.float32).reshape(-1, 2)
+            out[has_uv, 6:8] = texcoords[vt[has_uv] - 1]
+        return array('f', out.tobytes())
+
+    def generateVBO(self, no_textures=False):
+        if self.usesIndices():
+            return self.generateIndexedVBO(no_textures)
+        data = array('f')
+        self.batches = []
+        for material, vertices in self.preparedTriangles(no_textures).items():
+            first = len(data) // VERTEX_FLOATS
+            data.extend(vertices)
+            self.batches.append((material, first, len(vertices) // VERTEX_FLOATS))
+        self.no_textures = no_textures
+        self.countBatches()
+        self.vbo = glGenBuffers(1)
+        glBindBuffer(GL_ARRAY_BUFFER, self.vbo)
+        glBufferData(GL_ARRAY_BUFFER, len(data) * data.itemsize, data.tobytes(), GL_STATIC_DRAW)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+
+    def generateIndexedVBO(self, no_textures=False):
+        # Cada (posicion, normal, texcoord) distinto se sube una sola vez;
+        # los lotes son rangos del index buffer (primer indice, cuantos).
+        vertices, indices, self.batches, index_stats = self.preparedIndexed(no_textures)
+        self.no_textures = no_textures
+        self.countBatches()
+        self.stats.update(index_stats)
+        if indices.dtype == np.uint16:
+            self.index_type, self.index_size = GL_UNSIGNED_SHORT, 2
+        else:
+            self.index_type, self.index_size = GL_UNSIGNED_INT, 4
+        self.vbo, self.ibo = glGenBuffers(2)
+        glBindBuffer(GL_ARRAY_BUFFER, self.vbo)
+        glBufferData(GL_ARRAY_BUFFER, vertices.nbytes, vertices, GL_STATIC_DRAW)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+        glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, self.ibo)
+        glBufferData(GL_ELEMENT_ARRAY_BUFFER, indices.nbytes, indices, GL_STATIC_DRAW)
+        glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, 0)
+
+    def renderVBO(self):
+        self.bindVBO()
+        self.drawBatches()
+        self.unbindVBO()
+
+    def bindVBO(self):
+        """
+        Activa el VBO y los punteros de vertices. Separado de drawBatches
+        para poder dibujar muchas instancias con un solo bind.
+        """
+        glBindBuffer(GL_ARRAY_BUFFER, self.vbo)
+        if self.ibo:
+            glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, self.ibo)
+        glEnableClientState(GL_VERTEX_ARRAY)
+        glEnableClientState(GL_NORMAL_ARRAY)
+        glVertexPointer(3, GL_FLOAT, VERTEX_STRIDE, ctypes.c_void_p(0))
+        glNormalPointer(GL_FLOAT, VERTEX_STRIDE, ctypes.c_void_p(12))
+        if not self.no_textures:
+            glEnableClientState(GL_TEXTURE_COORD_ARRAY)
+            glTexCoordPointer(2, GL_FLOAT, VERTEX_STRIDE, ctypes.c_void_p(24))
+            glEnable(GL_TEXTURE_2D)
+        glFrontFace(GL_CCW)
+
+    def drawBatches(self):
+        if self.ibo:
+            for material, first, count in self.batches:
+                self.applyMaterial(material, self.no_textures)
+                glDrawElements(GL_TRIANGLES, count, self.index_type,
+                               ctypes.c_void_p(first * self.index_size))
+            return
+        for material, first, count in self.batches:
+            self.applyMaterial(material, self.no_textures)
+            glDrawArrays(GL_TRIANGLES, first, count)
+
+    def unbindVBO(self):
+        if not self.no_textures:
+            glDisable(GL_TEXTURE_2D)
+            glDisableClientState(GL_TEXTURE_COORD_ARRAY)
+        glDisableClientState(GL_NORMAL_ARRAY)
+        glDisableClientState(GL_VERTEX_ARRAY)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+        if self.ibo:
+            glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, 0)
 
     def generate(self, no_textures=False):
+        with tracer.span('generate', backend=self.backend, faces=self.faceCount()):
+            if self.backend == 'vbo':
+                self.generateVBO(no_textures)
+            else:
+                self.generateDisplayList(no_textures)
+
+    def generateDisplayList(self, no_textures=False):
+        # Un cambio de estado y un solo glBegin(GL_TRIANGLES) por material,
+        # en lugar de glColor/glBindTexture y glBegin(GL_POLYGON) por cara.
+        self.batches = []
         self.gl_list = glGenLists(1)
         glNewList(self.gl_list, GL_COMPILE)
         if not no_textures:
             glEnable(GL_TEXTURE_2D)
         glFrontFace(GL_CCW)
-        for face in self.faces:
-            vertices, normals, texture_coords, material = face
-            mtl = self.mtl[material]
-            if not no_textures and 'texture_Kd' in mtl:
-                glBindTexture(GL_TEXTURE_2D, mtl['texture_Kd'])
-            else:
-                glColor(*mtl['Kd'])
-            glBegin(GL_POLYGON)
-            for i in range(len(vertices)):
-                if normals[i] > 0:
-                    glNormal3fv(self.normals[normals[i] - 1])
-                if not no_textures and texture_coords[i] > 0:
-                    glTexCoord2fv(self.texcoords[texture_coords[i] - 1])
-                glVertex3fv(self.vertices[vertices[i] - 1])
+        first = 0
+        for material, data in self.preparedTriangles(no_textures).items():
+            count = len(data) // VERTEX_FLOATS
+            self.batches.append((material, first, count))
+            first += count
+            self.applyMaterial(material, no_textures)
+            glBegin(GL_TRIANGLES)
+            for i in range(0, len(data), VERTEX_FLOATS):
+                glNormal3f(data[i + 3], data[i + 4], data[i + 5])
+                if not no_textures:
+                    glTexCoord2f(data[i + 6], data[i + 7])
+                glVertex3f(data[i], data[i + 1], data[i + 2])
             glEnd()
         if not no_textures:
             glDisable(GL_TEXTURE_2D)
         glEndList()
+        self.countBatches()
+
+    def applyMaterial(self, material, no_textures=False):
+        mtl = self.mtl[material]
+        if not no_textures and 'texture_Kd' in mtl:
+            glBindTexture(GL_TEXTURE_2D, mtl['texture_Kd'])
+        else:
+            glColor(*mtl['Kd'])
+
+    def countBatches(self):
+        """
+        Contadores de la malla: cambios de estado de material y lotes de
+        dibujo por render, junto con los que haria el recorrido cara por
+        cara original para comparar.
+        """
+        self.stats = {
+            'faces': self.faceCount(),
+            'triangles': sum(count for _, _, count in self.batches) // 3,
+            'state_changes': len(self.batches),
+            'draw_batches': len(self.batches),
+            'state_changes_unbatched': self.faceCount(),
+            'draw_batches_unbatched': self.faceCount(),
+        }
+        return self.stats
 
     def render(self):
-        glCallList(self.gl_list)
+        if self.vbo:
+            self.renderVBO()
+        else:
+            glCallList(self.gl_list)
+
+    def dropGeometry(self, force=False):
+        """
+        Suelta la copia en CPU de la geometria si la malla ya esta en la
+        GPU (VBO o display list), o siempre con force=True (p. ej. cuando
+        ya se dividio en trozos). Se conservan los limites y stats; los
+        niveles de detalle o generate() de nuevo necesitan volver a cargar
+        el modelo. Devuelve True si se solto.
+        """
+        if not (force or self.vbo or self.gl_list):
+            return False
+        self.vertices = array('f')
+        self.normals = array('f')
+        self.texcoords = array('f')
+        self.face_offsets = array('I', [0])
+        self.face_v = array('i')
+        self.face_vn = array('i')
+        self.face_vt = array('i')
+        self.face_mtl = array('i')
+        self.material_groups = {}
+        self.prepared = None
+        return True
 
     def free(self):
-        glDeleteLists([self.gl_list])
\ No newline at end of file
+        if self.vbo:
+            glDeleteBuffers(1, [self.vbo])
+            self.vbo = 0
+            self.batches = []
+        if self.ibo:
+            glDeleteBuffers(1, [self.ibo])
+            self.ibo = 0
+        if self.gl_list:
+            glDeleteLists(self.gl_list, 1)
+            self.gl_list = 0
+        if self.owns_textures:
+            for mtl in self.mtl.values():
+                texid = mtl.pop('texture_Kd', None)
+                if texid is not None:
+                    texture_registry.release(texid)
@@ -2,29 +2,50 @@ import pygame
 from OpenGL.GL import *
 import math
 
-from objloader import OBJ
+from assets import load_mesh
+from frustum import transform_sphere, merge_spheres, part_sphere
+from transform import Transform, yaw_scale_matrix
+from animation import bake
+from timestep import lerp
 
 class Brazo:
     """
     Gestiona el estado y el renderizado de un brazo del robot,
     incluyendo su movimiento de balanceo.
     """
-    def __init__(self, filepath):
-        try:
-            self.obj = OBJ(filepath, swapyz=True)
-        except FileNotFoundError:
-            print(f"Error: No se pudo cargar el modelo 3D desde {filepath}")
-            self.obj = None
+    def __init__(self, filepath, load_model=True, lod_cells=None):
+        self.filepath = filepath
+        self.obj = None
+        if load_model:
+            self.load_models(lod_cells)
         
         self.swing_angle = 0.0
         self.swing_direction = 1
         self.swing_speed = 2.5 # Grados por fotograma
+        self.prev_swing_angle = self.swing_angle # Del paso anterior
+
+        # Tabla horneada de la animacion (ver local_matrix)
+        self.table = None
+        self.table_key = None
+
+        # El padre (el cuerpo) lo asigna Cuerpo al crear sus brazos
+        self.transform = Transform()
+
+    def load_models(self, lod_cells=None):
+        """
+        Carga (o toma del AssetManager) la malla de la parte.
+        """
+        try:
+            self.obj = load_mesh(self.filepath, swapyz=True, lod_cells=lod_cells)
+        except FileNotFoundError:
+            print(f"Error: No se pudo cargar el modelo 3D desde {self.filepath}")
 
     def update(self, is_moving, hasChicken):
         """
         Actualiza el ángulo del brazo. Si el robot se mueve, se balancea.
         Si está quieto, regresa a su posición original.
         """
+        self.prev_swing_angle = self.swing_angle
 
         if hasChicken:
             self.swing_angle = -90
@@ -43,7 +64,7 @@ class Brazo:
         if abs(self.swing_angle) > 45.0:
             self.swing_direction *= -1
 
-    def draw(self, position_offset, invert_swing=False):
+    def draw(self, position_offset, invert_swing=False, alpha=1.0):
         """
         Dibuja el brazo. Un nuevo parametro 'invert_swing' permite
         negar el angulo para el movimiento opuesto.
@@ -52,12 +73,56 @@ class Brazo:
             return
             
         glPushMatrix()
-                
+        glMultMatrixf(self.local_matrix(position_offset, invert_swing, alpha))
+        self.obj.render()
+        glPopMatrix()
+
+    def render_angle(self, alpha=1.0):
+        """
+        Angulo de balanceo interpolado con 'alpha' entre el paso anterior y
+        el actual. Al tomar o soltar una gallina (-90, sin invertir) se usa
+        el angulo actual.
+        """
+        prev, angle = self.prev_swing_angle, self.swing_angle
+        if alpha >= 1.0 or prev == angle or prev == -90 or angle == -90:
+            return angle
+        return lerp(prev, angle, alpha)
+
+    def local_matrix(self, position_offset, invert_swing=False, alpha=1.0):
+        """
+        Matriz local tomada de la tabla horneada del balanceo (hasta 90
+        grados mas un paso, por el -90 al sostener una gallina). Solo se
+        calcula si el angulo (interpolado con 'alpha') no esta en la tabla.
+        """
+        table_key = (invert_swing, *position_offset)
+        if table_key != self.table_key:
+            self.table = bake(Brazo.pose_matrix, self.swing_speed, 90.0 + self.swing_speed,
+                              tuple(position_offset), invert_swing)
+            self.table_key = table_key
+        table = self.table
+        angle = self.render_angle(alpha)
+        phase = table.index(angle)
+        if phase is None:
+            return self.transform.update((None, angle, invert_swing, *position_offset),
+                                         self.pose_matrix, angle, position_offset, invert_swing)
+        return self.transform.pose((table, phase), table.matrices[phase])
+
+    def matrix(self, position_offset, invert_swing=False):
+        """
+        Matriz local del brazo (column-major, lista para glMultMatrixf).
+        """
+        return self.pose_matrix(self.swing_angle, position_offset, invert_swing)
+
+    @staticmethod
+    def pose_matrix(swing_angle, position_offset, invert_swing=False):
+        """
+        Matriz local del brazo para un angulo de balanceo dado.
+        """
         # Determina el angulo a usar, aplicando la inversion si es necesario
-        if invert_swing and self.swing_angle != -90:
-            angle_to_use = -self.swing_angle
+        if invert_swing and swing_angle != -90:
+            angle_to_use = -swing_angle
         else:
-            angle_to_use = self.swing_angle
+            angle_to_use = swing_angle
 
         angle_rad = math.radians(angle_to_use)
         
@@ -72,12 +137,7 @@ class Brazo:
             0.0, sin_a,   cos_a,  0.0,
              tx,    ty,      tz,  1.0
         ]
-        
-        glMultMatrixf(brazo_matrix)
-        
-        self.obj.render()
-        
-        glPopMatrix()
+        return brazo_matrix
 
 
 class Cuerpo:
@@ -85,13 +145,13 @@ class Cuerpo:
     Clase principal del robot. Gestiona el estado general, el movimiento,
     la posicion y contiene las instancias de los brazos.
     """
-    def __init__(self, filepath, initial_pos, scale):
-        try:
-            self.obj = OBJ(filepath, swapyz=True)
-        except FileNotFoundError:
-            print(f"Error: No se pudo cargar el modelo 3D desde {filepath}")
-            self.obj = None
-            
+    def __init__(self, filepath, initial_pos, scale, load_model=True, lod_cells=None):
+        # Sin modelo (load_model=False) la clase solo simula: draw() no
+        # hace nada y no se necesita un contexto OpenGL. Los modelos se
+        # pueden cargar despues con load_models().
+        self.filepath = filepath
+        self.obj = None
+
         self.position = list(initial_pos)
         self.scale_factor = scale
         self.rotation_y = 0.0
@@ -101,6 +161,8 @@ class Cuerpo:
         
         self.hasChicken = False
         self.takingChicken = False
+        self.pickup_radius = 12.0 # Alcance para tomar una gallina
+        self.chicken = None # Gallina que lleva el robot
         self.vertical_bob = 0.0
         self.bob_angle = 0.0
         self.bob_speed = 8.0 
@@ -108,8 +170,12 @@ class Cuerpo:
         
         self.base_height = 6.5
         
-        self.brazo_izq = Brazo(filepath="obj/robot/brazoizq.obj")
-        self.brazo_der = Brazo(filepath="obj/robot/brazoder.obj")
+        self.brazo_izq = Brazo(filepath="obj/robot/brazoizq.obj", load_model=False)
+        self.brazo_der = Brazo(filepath="obj/robot/brazoder.obj", load_model=False)
+
+        self.transform = Transform()
+        self.brazo_izq.transform.parent = self.transform
+        self.brazo_der.transform.parent = self.transform
         
         offset_x = 0.75
         offset_y = -0.4
@@ -126,6 +192,34 @@ class Cuerpo:
         # --- Imprimir posicion ---
         self.last_known_position = list(self.position)
 
+        # Estado del paso de simulacion anterior, para dibujar interpolando
+        # con 'alpha' entre ese paso y el actual (ver timestep.py)
+        self.prev_position = list(self.position)
+        self.prev_rotation_y = self.rotation_y
+        self.prev_vertical_bob = self.vertical_bob
+        self.alpha = 1.0
+
+        if load_model:
+            self.load_models(lod_cells)
+
+    def model_files(self):
+        """
+        Rutas de todas las mallas del robot (cuerpo y brazos).
+        """
+        return [self.filepath, self.brazo_izq.filepath, self.brazo_der.filepath]
+
+    def load_models(self, lod_cells=None):
+        """
+        Carga las mallas del cuerpo y los brazos. Si ya estan en el
+        AssetManager (p. ej. precargadas por AsyncLoader) no lee archivos.
+        """
+        try:
+            self.obj = load_mesh(self.filepath, swapyz=True, lod_cells=lod_cells)
+        except FileNotFoundError:
+            print(f"Error: No se pudo cargar el modelo 3D desde {self.filepath}")
+        self.brazo_izq.load_models(lod_cells)
+        self.brazo_der.load_models(lod_cells)
+
     # Nueva funcion auxiliar para actualizar la direccion
     def update_direction(self):
         """
@@ -135,10 +229,34 @@ class Cuerpo:
         self.direction[0] = math.cos(rad)
         self.direction[2] = -math.sin(rad)
 
-    def move(self, keys):
+    def nearest_chicken(self, index):
+        """
+        Devuelve (gallina, distancia) de la gallina mas cercana dentro de
+        pickup_radius segun el indice espacial, o None.
+        """
+        return index.nearest(self.position[0], self.position[2], self.pickup_radius)
+
+    def pick_chicken(self, index):
+        """
+        Toma la gallina mas cercana al alcance segun el indice espacial.
+        Sin indice, o con uno vacio (main.py todavia no registra gallinas),
+        se toma sin revisar, como antes.
+        """
+        if not index:
+            self.hasChicken = True
+            return
+        found = self.nearest_chicken(index)
+        if found is not None:
+            self.chicken = found[0]
+            self.hasChicken = True
+
+    def move(self, keys, chickens=None):
         """
         Procesa la entrada del teclado para actualizar el estado del robot.
+        Es un paso de simulacion: las velocidades son por paso. 'chickens'
+        es el SpatialHash de gallinas con el que se decide cual tomar.
         """
+        self.save_state()
         is_moving = False
         is_moving_forward = False
 
@@ -148,8 +266,9 @@ class Cuerpo:
             self.rotation_y -= self.turn_speed
         if keys[pygame.K_q]:
             self.hasChicken = False
-        if keys[pygame.K_e]:
-            self.hasChicken = True
+            self.chicken = None
+        if keys[pygame.K_e] and not self.hasChicken:
+            self.pick_chicken(chickens)
         if keys[pygame.K_f]:
             self.takingChicken = True
             
@@ -195,6 +314,27 @@ class Cuerpo:
         self.brazo_izq.update(is_moving, self.hasChicken)
         self.brazo_der.update(is_moving, self.hasChicken)
 
+    def save_state(self):
+        """
+        Guarda el estado actual como el del paso anterior.
+        """
+        self.prev_position[:] = self.position
+        self.prev_rotation_y = self.rotation_y
+        self.prev_vertical_bob = self.vertical_bob
+
+    def render_state(self):
+        """
+        (posicion, rotacion_y, balanceo vertical) interpolados con 'alpha'
+        entre el paso anterior y el actual.
+        """
+        a = self.alpha
+        if a >= 1.0:
+            return self.position, self.rotation_y, self.vertical_bob
+        p, q = self.prev_position, self.position
+        return ([lerp(p[0], q[0], a), lerp(p[1], q[1], a), lerp(p[2], q[2], a)],
+                lerp(self.prev_rotation_y, self.rotation_y, a),
+                lerp(self.prev_vertical_bob, self.vertical_bob, a))
+
     def draw(self):
         """
         Dibuja el cuerpo del robot y luego a sus brazos hijos.
@@ -204,33 +344,57 @@ class Cuerpo:
             
         glPushMatrix()
         
-        tx, ty, tz = self.position
-        ty += self.base_height + self.vertical_bob
-        sx = sy = sz = self.scale_factor
-        r = math.radians(self.rotation_y)
-        s = math.radians(-90.0)
-
-        cos_r, sin_r = math.cos(r), math.sin(r)
-        cos_s, sin_s = math.cos(s), math.sin(s)
-
-        m0 = sx * (cos_r * cos_s - sin_r * sin_s)
-        m2 = sx * (-cos_r * sin_s - sin_r * cos_s)
-        m5 = sy
-        m8 = sz * (sin_r * cos_s + cos_r * sin_s)
-        m10 = sz * (-sin_r * sin_s + cos_r * cos_s)
-
-        cuerpo_matrix = [
-            m0,  0.0,  m2,  0.0,
-           0.0,   m5, 0.0,  0.0,
-            m8,  0.0, m10,  0.0,
-            tx,   ty,  tz,  1.0
-        ]
-        
-        glMultMatrixf(cuerpo_matrix)
+        glMultMatrixf(self.local_matrix())
         
         self.obj.render()
         
-        self.brazo_izq.draw(self.offset_brazo_izq)
-        self.brazo_der.draw(self.offset_brazo_der, invert_swing=True)
+        self.brazo_izq.draw(self.offset_brazo_izq, alpha=self.alpha)
+        self.brazo_der.draw(self.offset_brazo_der, invert_swing=True, alpha=self.alpha)
         
-        glPopMatrix()
\ No newline at end of file
+        glPopMatrix()
+
+    def local_matrix(self):
+        """
+        Matriz del cuerpo (en el estado interpolado de render_state())
+        cacheada en su Transform; solo se recalcula si cambio la posicion,
+        la rotacion, el balanceo o la escala.
+        """
+        (tx, ty, tz), rotation_y, vertical_bob = self.render_state()
+        return self.transform.update(
+            (tx, ty, tz, rotation_y, vertical_bob, self.scale_factor, self.base_height),
+            yaw_scale_matrix, tx, ty + self.base_height + vertical_bob, tz,
+            self.scale_factor, rotation_y, -90.0)
+
+    def matrix(self):
+        """
+        Matriz del cuerpo en el mundo (column-major).
+        """
+        tx, ty, tz = self.position
+        ty += self.base_height + self.vertical_bob
+        return yaw_scale_matrix(tx, ty, tz, self.scale_factor, self.rotation_y, -90.0)
+
+    def update_lod(self, camera_pos, selector):
+        """
+        Elige el nivel de detalle del cuerpo y los brazos segun la distancia
+        a la camara. Devuelve el nivel elegido.
+        """
+        if not self.obj:
+            return 0
+        distance = math.dist(camera_pos, self.render_state()[0])
+        level = selector.select(self.obj.level, distance)
+        for obj in (self.obj, self.brazo_izq.obj, self.brazo_der.obj):
+            if obj:
+                obj.set_level(level)
+        return level
+
+    def bounding_sphere(self):
+        """
+        Esfera envolvente del robot con sus brazos, en el mundo.
+        """
+        if not self.obj:
+            return None
+        return transform_sphere(self.local_matrix(), *merge_spheres([
+            (self.obj.bounds_center, self.obj.bounds_radius),
+            part_sphere(self.brazo_izq.obj, self.offset_brazo_izq),
+            part_sphere(self.brazo_der.obj, self.offset_brazo_der),
+        ]))
\ No newline at end of file
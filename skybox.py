@@ -0,0 +1,71 @@
+from OpenGL.GL import *
+
+
+class Skybox:
+    """
+    Caja del cielo compilada una sola vez en una display list. Con
+    'texture' usa la misma textura 2D en las seis caras (el modo original);
+    con 'cube_texture' usa un GL_TEXTURE_CUBE_MAP y cada vertice toma su
+    propia posicion como direccion de muestreo.
+    """
+    def __init__(self, size, texture=0, cube_texture=0):
+        self.size = size
+        self.texture = texture
+        self.cube_texture = cube_texture
+        self.target = GL_TEXTURE_CUBE_MAP if cube_texture else GL_TEXTURE_2D
+        self.gl_list = 0
+        self.build()
+
+    def faces(self):
+        half_size = self.size / 2
+        return [
+            # Cara frontal
+            [(-half_size, half_size, -half_size), (half_size, half_size, -half_size),
+             (half_size, -half_size, -half_size), (-half_size, -half_size, -half_size)],
+            # Cara trasera
+            [(half_size, half_size, half_size), (-half_size, half_size, half_size),
+             (-half_size, -half_size, half_size), (half_size, -half_size, half_size)],
+            # Cara izquierda
+            [(-half_size, half_size, half_size), (-half_size, half_size, -half_size),
+             (-half_size, -half_size, -half_size), (-half_size, -half_size, half_size)],
+            # Cara derecha
+            [(half_size, half_size, -half_size), (half_size, half_size, half_size),
+             (half_size, -half_size, half_size), (half_size, -half_size, -half_size)],
+            # Cara superior
+            [(-half_size, half_size, half_size), (half_size, half_size, half_size),
+             (half_size, half_size, -half_size), (-half_size, half_size, -half_size)],
+            # Cara inferior
+            [(-half_size, -half_size, half_size), (half_size, -half_size, half_size),
+             (half_size, -half_size, -half_size), (-half_size, -half_size, -half_size)]
+        ]
+
+    def build(self):
+        tex_coords = [(0.0, 0.0), (1.0, 0.0), (1.0, 1.0), (0.0, 1.0)]
+        self.gl_list = glGenLists(1)
+        glNewList(self.gl_list, GL_COMPILE)
+        glBindTexture(self.target, self.cube_texture or self.texture)
+        glBegin(GL_QUADS)
+        for vertices in self.faces():
+            for i in range(4):
+                x, y, z = vertices[i]
+                if self.cube_texture:
+                    glTexCoord3f(x, y, z)
+                else:
+                    glTexCoord2f(tex_coords[i][0], tex_coords[i][1])
+                glVertex3d(x, y, z)
+        glEnd()
+        glBindTexture(self.target, 0)
+        glEndList()
+
+    def draw(self):
+        """
+        Dibuja el cielo. Iluminacion y profundidad las maneja el llamador.
+        """
+        glEnable(self.target)
+        glCallList(self.gl_list)
+        glDisable(self.target)
+
+    def free(self):
+        if self.gl_list:
+            glDeleteLists(self.gl_list, 1)
+            self.gl_list = 0
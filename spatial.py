@@ -0,0 +1,122 @@
+import math
+
+
+class SpatialHash:
+    """
+    Indice de rejilla uniforme sobre el plano XZ del mundo. Cada entidad se
+    guarda en la celda que contiene su posicion; las consultas solo revisan
+    las celdas que toca el circulo buscado, en lugar de todas las entidades.
+
+    Las posiciones fuera de 'bounds' se asignan a la celda del borde, asi
+    que las consultas siguen siendo correctas aunque algo salga del mundo.
+    """
+    def __init__(self, cell_size, bounds):
+        self.cell_size = float(cell_size)
+        self.x_min, self.x_max, self.z_min, self.z_max = bounds
+        self.cols = max(1, int(math.ceil((self.x_max - self.x_min) / self.cell_size)))
+        self.rows = max(1, int(math.ceil((self.z_max - self.z_min) / self.cell_size)))
+        self.inv_cell = 1.0 / self.cell_size
+        self.cells = {}      # (col, row) -> {entidad: (x, z)}
+        self.entities = {}   # entidad -> (col, row)
+
+    def cell_of(self, x, z):
+        # int() trunca hacia cero; los valores negativos se recortan a 0 igual
+        col = int((x - self.x_min) * self.inv_cell)
+        row = int((z - self.z_min) * self.inv_cell)
+        if col < 0:
+            col = 0
+        elif col >= self.cols:
+            col = self.cols - 1
+        if row < 0:
+            row = 0
+        elif row >= self.rows:
+            row = self.rows - 1
+        return col, row
+
+    def insert(self, entity, x, z):
+        cell = self.cell_of(x, z)
+        self.entities[entity] = cell
+        self.cells.setdefault(cell, {})[entity] = (x, z)
+
+    def update(self, entity, x, z):
+        """
+        Actualiza la posicion de una entidad. Solo cambia de celda cuando
+        realmente cruza un borde; si no, solo se reescribe su posicion.
+        """
+        old = self.entities.get(entity)
+        if old is None:
+            self.insert(entity, x, z)
+            return
+        cell = self.cell_of(x, z)
+        if cell == old:
+            self.cells[cell][entity] = (x, z)
+            return
+        bucket = self.cells[old]
+        del bucket[entity]
+        if not bucket:
+            del self.cells[old]
+        self.entities[entity] = cell
+        self.cells.setdefault(cell, {})[entity] = (x, z)
+
+    def remove(self, entity):
+        cell = self.entities.pop(entity, None)
+        if cell is None:
+            return
+        bucket = self.cells[cell]
+        del bucket[entity]
+        if not bucket:
+            del self.cells[cell]
+
+    def __len__(self):
+        return len(self.entities)
+
+    def candidates(self, x, z, radius):
+        col0, row0 = self.cell_of(x - radius, z - radius)
+        col1, row1 = self.cell_of(x + radius, z + radius)
+        cells = self.cells
+        for col in range(col0, col1 + 1):
+            for row in range(row0, row1 + 1):
+                bucket = cells.get((col, row))
+                if bucket:
+                    yield from bucket.items()
+
+    def query_radius(self, x, z, radius):
+        """
+        Lista de (entidad, distancia) a menos de 'radius' de (x, z).
+        """
+        r2 = radius * radius
+        found = []
+        for entity, (ex, ez) in self.candidates(x, z, radius):
+            d2 = (ex - x) ** 2 + (ez - z) ** 2
+            if d2 <= r2:
+                found.append((entity, math.sqrt(d2)))
+        return found
+
+    def query_rect(self, x0, z0, x1, z1):
+        """
+        Entidades dentro del rectangulo [x0, x1] x [z0, z1].
+        """
+        col0, row0 = self.cell_of(x0, z0)
+        col1, row1 = self.cell_of(x1, z1)
+        found = []
+        for col in range(col0, col1 + 1):
+            for row in range(row0, row1 + 1):
+                for entity, (ex, ez) in self.cells.get((col, row), {}).items():
+                    if x0 <= ex <= x1 and z0 <= ez <= z1:
+                        found.append(entity)
+        return found
+
+    def nearest(self, x, z, radius):
+        """
+        (entidad, distancia) mas cercana a (x, z) dentro de 'radius', o
+        None si no hay ninguna.
+        """
+        best = None
+        best_d2 = radius * radius
+        for entity, (ex, ez) in self.candidates(x, z, radius):
+            d2 = (ex - x) ** 2 + (ez - z) ** 2
+            if d2 <= best_d2:
+                best, best_d2 = entity, d2
+        if best is None:
+            return None
+        return best, math.sqrt(best_d2)
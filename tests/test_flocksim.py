@@ -0,0 +1,55 @@
+"""
+Paridad de flocksim.Flock (estructura de arreglos) con Gallina.move /
+Pata.update / Ala.update, gallina por gallina.
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pygame
+
+from gallina import Gallina
+from inputs import KeyState
+from flocksim import Flock
+
+KEYS = (pygame.K_LEFT, pygame.K_RIGHT, pygame.K_UP, pygame.K_DOWN)
+
+
+def make_gallinas(count, rng):
+    gallinas = []
+    for _ in range(count):
+        g = Gallina("obj/gallina/gallina.obj",
+                    [rng.uniform(-300, 300), 0.0, rng.uniform(-300, 300)], 3.0,
+                    load_model=False)
+        g.rotation_y = rng.uniform(0.0, 360.0)
+        gallinas.append(g)
+    return gallinas
+
+
+def test_flock_matches_gallinas(count=200, ticks=600, seed=0):
+    rng = np.random.default_rng(seed)
+    gallinas = make_gallinas(count, rng)
+    flock = Flock.from_gallinas(gallinas)
+    # Patrones de teclas precalculados que se repiten ciclicamente
+    inputs = rng.random((37, 4, count)) < np.array([0.2, 0.2, 0.6, 0.1])[None, :, None]
+    for tick in range(ticks):
+        pressed = inputs[tick % len(inputs)]
+        for i, g in enumerate(gallinas):
+            g.move(KeyState(k for k, on in zip(KEYS, pressed[:, i]) if on))
+        flock.step(*pressed)
+
+    pos = np.array([g.position for g in gallinas])
+    assert np.allclose(flock.position, pos, rtol=0, atol=1e-9)
+    assert np.array_equal(flock.rotation_y, [g.rotation_y for g in gallinas])
+    for side in ('pata_izq', 'pata_der'):
+        assert np.array_equal(flock.march_angle,
+                              [getattr(g, side).march_angle for g in gallinas]), side
+        assert np.array_equal(flock.march_direction,
+                              [getattr(g, side).march_direction for g in gallinas]), side
+    for side in ('ala_izq', 'ala_der'):
+        assert np.array_equal(flock.flap_phase,
+                              [getattr(g, side).flap_phase for g in gallinas]), side
+        assert np.array_equal(flock.flap_direction,
+                              [getattr(g, side).flap_direction for g in gallinas]), side
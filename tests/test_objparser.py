@@ -0,0 +1,152 @@
+"""
+Paridad del parser vectorizado (objloader.parse_arrays) con el parser
+linea por linea de OBJ en archivos con formatos de cara mezclados y
+lineas indentadas, y rechazo de archivos .obj.cache corruptos.
+"""
+import os
+import sys
+import json
+import struct
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+from objloader import OBJ, CACHE_HEADER, CACHE_SECTIONS
+
+VERTICES = """v 0 0 0
+v 1 0 0
+v 1 1 0
+v 0 1 0
+vt 0 0
+vt 1 0
+vt 1 1
+vn 0 0 1
+vn 0 1 0
+"""
+
+CASES = {
+    'mixed_v_vvn': "f 1 2 3\nf 1//1 3//1 4//1\n",
+    'mixed_vvn_v': "f 1//1 3//1 4//1\nf 1 2 3\n",
+    'mixed_all': "f 1 2 3\nf 1/1 2/2 3/3\nf 1//2 2//2 3//2\nf 1/1/1 3/3/1 4/2/1\n",
+    'mixed_in_face': "f 1 2/2 3//1 4/3/2\n",
+    'empty_fields': "f 1/1/ 2/2/ 3/3/\nf 1// 3// 4//\n",
+    'indented': "  v 2 2 2\n\tvn 1 0 0\n  vt 0.5 0.5\nusemtl a\n  f 1/1/1 2/2/2 5/4/3\n"
+                "\t\tf 1 2 5\n   usemtl b\n\tf 3//1 4//1 5//1\n",
+    'usemtl_blocks': "usemtl a\nf 1 2 3\nusemtl b\nf 1//1 3//1 4//1\nusemtl a\nf 1/1 2/2 3/3\n",
+    'plain': "f 1 2 3\nf 1 3 4\n",
+    'vvt': "f 1/1 2/2 3/3\n",
+    'vvn': "f 1//1 2//1 3//1\n",
+    'full': "f 1/1/1 2/2/1 3/3/1\n",
+}
+
+
+def load(path, parser, swapyz, use_cache=False):
+    obj = OBJ.__new__(OBJ)
+    obj.parser = parser
+    obj.use_cache = use_cache
+    obj.bundle = None
+    obj.__init__(path, swapyz=swapyz, defer_gl=True)
+    return obj
+
+
+@pytest.mark.parametrize('swapyz', [False, True])
+@pytest.mark.parametrize('name', sorted(CASES))
+def test_numpy_parser_matches_line_parser(tmp_path, name, swapyz):
+    path = tmp_path / (name + '.obj')
+    path.write_text(VERTICES + CASES[name])
+    a = load(str(path), 'python', swapyz)
+    b = load(str(path), 'numpy', swapyz)
+    assert a.faceCount() > 0
+    assert a.vertices == b.vertices
+    assert a.normals == b.normals
+    assert a.texcoords == b.texcoords
+    assert a.face_offsets == b.face_offsets
+    assert a.face_v == b.face_v
+    assert a.face_vn == b.face_vn
+    assert a.face_vt == b.face_vt
+    assert list(map(a.materialName, a.face_mtl)) == list(map(b.materialName, b.face_mtl))
+
+
+def test_models_match_line_parser():
+    root = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'obj')
+    path = os.path.join(root, 'gallina', 'gallina.obj')
+    a = load(path, 'python', True)
+    b = load(path, 'numpy', True)
+    assert a.face_v == b.face_v and a.face_vn == b.face_vn and a.face_vt == b.face_vt
+    assert a.vertices == b.vertices
+
+
+def same_geometry(a, b):
+    return (a.vertices == b.vertices and a.normals == b.normals and a.texcoords == b.texcoords
+            and a.face_offsets == b.face_offsets and a.face_v == b.face_v
+            and a.face_vn == b.face_vn and a.face_vt == b.face_vt)
+
+
+def cached_model(tmp_path):
+    """
+    Escribe un modelo y su .obj.cache; devuelve (ruta, geometria parseada).
+    """
+    path = tmp_path / 'model.obj'
+    path.write_text(VERTICES + CASES['mixed_all'])
+    parsed = load(str(path), 'python', True, use_cache=True)
+    assert os.path.exists(parsed.cachePath(str(path)))
+    return str(path), parsed
+
+
+def section_offset(cache, section):
+    """
+    Posicion en bytes de la seccion 'section' dentro del cache.
+    """
+    _, _, _, meta_len = CACHE_HEADER.unpack_from(cache, 0)
+    offset = CACHE_HEADER.size + meta_len
+    meta = json.loads(cache[CACHE_HEADER.size:offset])
+    for (name, _), length in zip(CACHE_SECTIONS, meta['lengths']):
+        if name == section:
+            return offset
+        offset += 4 * length
+    raise KeyError(section)
+
+
+def test_cache_round_trip(tmp_path):
+    path, parsed = cached_model(tmp_path)
+    obj = OBJ.__new__(OBJ)
+    obj.reset()
+    assert obj.loadCache(path, swapyz=True)
+    assert same_geometry(parsed, obj)
+
+
+@pytest.mark.parametrize('section,value', [('face_v', 999999), ('face_v', 0),
+                                           ('face_vn', 999999), ('face_vt', -1)])
+def test_cache_with_bad_index_is_reparsed(tmp_path, section, value):
+    path, parsed = cached_model(tmp_path)
+    cache_path = parsed.cachePath(path)
+    with open(cache_path, 'r+b') as f:
+        cache = f.read()
+        f.seek(section_offset(cache, section))
+        f.write(struct.pack('<i', value))
+    obj = OBJ.__new__(OBJ)
+    obj.reset()
+    assert not obj.loadCache(path, swapyz=True)
+    assert same_geometry(parsed, load(path, 'python', True, use_cache=True))
+
+
+def test_truncated_cache_is_reparsed(tmp_path):
+    path, parsed = cached_model(tmp_path)
+    cache_path = parsed.cachePath(path)
+    with open(cache_path, 'r+b') as f:
+        f.truncate(os.path.getsize(cache_path) - 4)
+    obj = OBJ.__new__(OBJ)
+    obj.reset()
+    assert not obj.loadCache(path, swapyz=True)
+    assert same_geometry(parsed, load(path, 'python', True, use_cache=True))
+
+
+def test_stale_cache_is_reparsed(tmp_path):
+    path, _ = cached_model(tmp_path)
+    with open(path, 'a') as f:
+        f.write("f 2 3 4\n")
+    obj = OBJ.__new__(OBJ)
+    obj.reset()
+    assert not obj.loadCache(path, swapyz=True)
+    assert load(path, 'python', True, use_cache=True).faceCount() == 5
@@ -0,0 +1,252 @@
+import os
+import struct
+from collections import OrderedDict
+
+import pygame
+from OpenGL.GL import *
+
+from tracer import tracer
+
+# --- Cache de pixeles decodificados ---
+# Archivo "<imagen>.texcache" junto a la imagen con los pixeles RGBA ya
+# decodificados, para no volver a decodificar el BMP/PNG en cada arranque.
+# Cabecera: magic, version, flip, ancho, alto y el mtime/tamaño de la
+# imagen de origen; despues vienen ancho * alto * 4 bytes.
+TEXCACHE_MAGIC = b'TEXC'
+TEXCACHE_VERSION = 1
+TEXCACHE_HEADER = struct.Struct('<4sIB3xIIqQ')
+
+# Orden de las caras de un cube map: +X, -X, +Y, -Y, +Z, -Z
+CUBE_MAP_TARGETS = (
+    GL_TEXTURE_CUBE_MAP_POSITIVE_X, GL_TEXTURE_CUBE_MAP_NEGATIVE_X,
+    GL_TEXTURE_CUBE_MAP_POSITIVE_Y, GL_TEXTURE_CUBE_MAP_NEGATIVE_Y,
+    GL_TEXTURE_CUBE_MAP_POSITIVE_Z, GL_TEXTURE_CUBE_MAP_NEGATIVE_Z,
+)
+
+
+class TextureRegistry:
+    """
+    Registro de texturas compartido por todo el proceso. Cada imagen se
+    decodifica y se sube a la GPU una sola vez por combinacion de ruta
+    absoluta y parametros de muestreo; las siguientes peticiones reciben
+    el mismo id y solo incrementan su contador de referencias. Los pixeles
+    decodificados se guardan en disco (ver TEXCACHE_*) para los siguientes
+    arranques.
+
+    Las texturas sin referencias siguen residentes para reutilizarse. Si
+    se define 'budget_bytes', las menos usadas recientemente se eliminan
+    en cuanto la memoria estimada supera el presupuesto.
+    """
+    use_cache = True
+    cache_suffix = '.texcache'
+    # Bundle de assets abierto (ver bundle.open_bundle): pixeles y mipmaps
+    # ya decodificados, antes que el cache de disco
+    bundle = None
+
+    def __init__(self, budget_bytes=None):
+        self.budget_bytes = budget_bytes
+        self.entries = {}            # clave -> [texid, refcount, bytes]
+        self.keys = {}               # texid -> clave
+        self.unused = OrderedDict()  # claves sin referencias, en orden LRU
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.bytes_resident = 0
+
+    def acquire(self, filepath, min_filter=GL_LINEAR, mag_filter=GL_LINEAR,
+                wrap=GL_REPEAT, mipmap=False, flip=True, pixels=None):
+        """
+        Devuelve el id de la textura para 'filepath' con los parametros
+        dados, cargandola si todavia no esta residente. 'pixels' son los
+        datos ya decodificados por loadPixels(filepath, flip), si los hay.
+        """
+        key = (os.path.abspath(filepath), min_filter, mag_filter, wrap, mipmap, flip)
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.hits += 1
+            entry[1] += 1
+            self.unused.pop(key, None)
+            return entry[0]
+
+        self.misses += 1
+        texid, size = self.upload(filepath, min_filter, mag_filter, wrap, mipmap, flip, pixels)
+        return self.add(key, texid, size)
+
+    def acquireCubeMap(self, filepaths, min_filter=GL_LINEAR, mag_filter=GL_LINEAR,
+                       pixels=None):
+        """
+        Igual que acquire() pero para un cube map (GL_TEXTURE_CUBE_MAP) con
+        seis imagenes en el orden de CUBE_MAP_TARGETS.
+        """
+        if len(filepaths) != 6:
+            raise ValueError("Un cube map necesita 6 imagenes")
+        key = ('cube',) + tuple(os.path.abspath(p) for p in filepaths) + (min_filter, mag_filter)
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.hits += 1
+            entry[1] += 1
+            self.unused.pop(key, None)
+            return entry[0]
+
+        self.misses += 1
+        texid, size = self.uploadCubeMap(filepaths, min_filter, mag_filter, pixels)
+        return self.add(key, texid, size)
+
+    def add(self, key, texid, size):
+        self.entries[key] = [texid, 1, size]
+        self.keys[texid] = key
+        self.bytes_resident += size
+        self.enforceBudget()
+        return texid
+
+    def release(self, texid):
+        """
+        Libera una referencia. La textura queda en cache hasta que el
+        presupuesto obligue a eliminarla o se llame a purge().
+        """
+        key = self.keys.get(texid)
+        if key is None:
+            return
+        entry = self.entries[key]
+        entry[1] -= 1
+        if entry[1] <= 0:
+            entry[1] = 0
+            self.unused[key] = None
+            self.enforceBudget()
+
+    def enforceBudget(self):
+        if self.budget_bytes is None:
+            return
+        while self.bytes_resident > self.budget_bytes and self.unused:
+            key, _ = self.unused.popitem(last=False)
+            self.delete(key)
+            self.evictions += 1
+
+    def purge(self):
+        """
+        Elimina de la GPU todas las texturas sin referencias.
+        """
+        while self.unused:
+            key, _ = self.unused.popitem(last=False)
+            self.delete(key)
+
+    def delete(self, key):
+        texid, _, size = self.entries.pop(key)
+        del self.keys[texid]
+        self.bytes_resident -= size
+        glDeleteTextures([texid])
+
+    def stats(self):
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'textures': len(self.entries),
+            'references': sum(entry[1] for entry in self.entries.values()),
+            'bytes_resident': self.bytes_resident,
+        }
+
+    def cachePath(self, filepath):
+        return filepath + self.cache_suffix
+
+    def loadPixels(self, filepath, flip):
+        """
+        Devuelve (pixeles RGBA, ancho, alto) de la imagen, desde el cache
+        de disco si esta al dia; si no, decodifica con pygame y lo escribe.
+        """
+        size = os.path.getsize(filepath) if os.path.exists(filepath) else 0
+        with tracer.span('decode', file=os.path.basename(filepath), bytes=size) as attrs:
+            data, width, height, attrs['cached'] = self.readPixels(filepath, flip)
+        return data, width, height
+
+    def readPixels(self, filepath, flip):
+        if self.bundle is not None:
+            image = self.bundle.texture(filepath, flip)
+            if image is not None:
+                return image[0], image[1], image[2], True
+        st = os.stat(filepath)
+        path = self.cachePath(filepath)
+        if self.use_cache:
+            try:
+                with open(path, 'rb') as f:
+                    header = f.read(TEXCACHE_HEADER.size)
+                    magic, version, cached_flip, width, height, mtime, size = \
+                        TEXCACHE_HEADER.unpack(header)
+                    if (magic == TEXCACHE_MAGIC and version == TEXCACHE_VERSION
+                            and cached_flip == bool(flip)
+                            and mtime == st.st_mtime_ns and size == st.st_size):
+                        data = f.read()
+                        if len(data) == width * height * 4:
+                            return data, width, height, True
+            except (OSError, struct.error):
+                pass
+
+        surf = pygame.image.load(filepath)
+        data = pygame.image.tostring(surf, 'RGBA', flip)
+        width, height = surf.get_rect().size
+        if self.use_cache:
+            # Si no se puede escribir se omite: el cache es solo una optimizacion
+            try:
+                tmp = path + '.tmp'
+                with open(tmp, 'wb') as f:
+                    f.write(TEXCACHE_HEADER.pack(TEXCACHE_MAGIC, TEXCACHE_VERSION, bool(flip),
+                                                 width, height, st.st_mtime_ns, st.st_size))
+                    f.write(data)
+                os.replace(tmp, path)
+            except OSError:
+                pass
+        return data, width, height, False
+
+    def upload(self, filepath, min_filter, mag_filter, wrap, mipmap, flip, pixels=None):
+        image, ix, iy = pixels or self.loadPixels(filepath, flip)
+        levels = None
+        if mipmap and self.bundle is not None:
+            levels = self.bundle.mipmaps(filepath, flip)
+        with tracer.span('texture', file=os.path.basename(filepath), width=ix, height=iy):
+            return self.uploadPixels(image, ix, iy, min_filter, mag_filter, wrap, mipmap, levels)
+
+    def uploadPixels(self, image, ix, iy, min_filter, mag_filter, wrap, mipmap, levels=None):
+        """
+        'levels' son los mipmaps 1..n ya calculados ([(pixeles, ancho,
+        alto), ...]); sin ellos se generan en la GPU.
+        """
+        texid = glGenTextures(1)
+        glBindTexture(GL_TEXTURE_2D, texid)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_S, wrap)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_T, wrap)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, min_filter)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, mag_filter)
+        glTexImage2D(GL_TEXTURE_2D, 0, GL_RGBA, ix, iy, 0, GL_RGBA, GL_UNSIGNED_BYTE, image)
+        size = ix * iy * 4
+        if mipmap and levels:
+            for level, (data, width, height) in enumerate(levels, 1):
+                glTexImage2D(GL_TEXTURE_2D, level, GL_RGBA, width, height, 0,
+                             GL_RGBA, GL_UNSIGNED_BYTE, data)
+                size += width * height * 4
+            glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAX_LEVEL, len(levels))
+        elif mipmap:
+            glGenerateMipmap(GL_TEXTURE_2D)
+            # La cadena de mipmaps agrega cerca de un tercio.
+            size = size * 4 // 3
+        return texid, size
+
+    def uploadCubeMap(self, filepaths, min_filter, mag_filter, pixels=None):
+        texid = glGenTextures(1)
+        glBindTexture(GL_TEXTURE_CUBE_MAP, texid)
+        glTexParameteri(GL_TEXTURE_CUBE_MAP, GL_TEXTURE_WRAP_S, GL_CLAMP_TO_EDGE)
+        glTexParameteri(GL_TEXTURE_CUBE_MAP, GL_TEXTURE_WRAP_T, GL_CLAMP_TO_EDGE)
+        glTexParameteri(GL_TEXTURE_CUBE_MAP, GL_TEXTURE_WRAP_R, GL_CLAMP_TO_EDGE)
+        glTexParameteri(GL_TEXTURE_CUBE_MAP, GL_TEXTURE_MIN_FILTER, min_filter)
+        glTexParameteri(GL_TEXTURE_CUBE_MAP, GL_TEXTURE_MAG_FILTER, mag_filter)
+        size = 0
+        for i, (target, filepath) in enumerate(zip(CUBE_MAP_TARGETS, filepaths)):
+            # Las caras de un cube map van con la primera fila arriba
+            image, ix, iy = pixels[i] if pixels else self.loadPixels(filepath, False)
+            glTexImage2D(target, 0, GL_RGBA, ix, iy, 0, GL_RGBA, GL_UNSIGNED_BYTE, image)
+            size += ix * iy * 4
+        glBindTexture(GL_TEXTURE_CUBE_MAP, 0)
+        return texid, size
+
+
+# Registro por defecto, usado por OBJ y por main.load_texture
+registry = TextureRegistry()
@@ -0,0 +1,41 @@
+class FixedTimestep:
+    """
+    Acumulador para correr la logica de juego a 'hz' pasos por segundo sin
+    importar a cuantos FPS se dibuje. Cada fotograma se llama a
+    advance(segundos transcurridos), se ejecutan los pasos que devuelve y
+    se dibuja interpolando con 'alpha' (0 = estado del paso anterior,
+    1 = estado actual).
+
+    Si un fotograma tarda demasiado (carga, ventana arrastrada...) no se
+    corren mas de 'max_steps' pasos: el tiempo sobrante se descarta y el
+    juego se frena un instante en lugar de entrar en la espiral de pasos
+    cada vez mas atrasados.
+    """
+    def __init__(self, hz=60, max_steps=5):
+        self.hz = hz
+        self.dt = 1.0 / hz
+        self.max_steps = max_steps
+        self.accumulator = 0.0
+        self.alpha = 1.0
+        self.steps = 0       # pasos simulados en total
+        self.dropped = 0.0   # segundos descartados por el limite de pasos
+
+    def advance(self, elapsed):
+        """
+        Suma 'elapsed' segundos y devuelve cuantos pasos de simulacion hay
+        que correr en este fotograma.
+        """
+        self.accumulator += elapsed
+        steps = int(self.accumulator / self.dt)
+        if steps > self.max_steps:
+            self.dropped += (steps - self.max_steps) * self.dt
+            self.accumulator -= (steps - self.max_steps) * self.dt
+            steps = self.max_steps
+        self.accumulator -= steps * self.dt
+        self.alpha = min(1.0, max(0.0, self.accumulator / self.dt))
+        self.steps += steps
+        return steps
+
+
+def lerp(a, b, t):
+    return a + (b - a) * t
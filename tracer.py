@@ -0,0 +1,154 @@
+import json
+import time
+import threading
+from contextlib import contextmanager
+
+
+class Span:
+    """
+    Un intervalo medido: nombre, inicio y fin (segundos desde el origen
+    del tracer), datos extra (archivo, tamaño, caras...) y el indice del
+    span padre dentro del mismo hilo.
+    """
+    __slots__ = ('name', 'start', 'end', 'attrs', 'parent', 'thread')
+
+    def __init__(self, name, start, attrs, parent, thread):
+        self.name = name
+        self.start = start
+        self.end = None
+        self.attrs = attrs
+        self.parent = parent
+        self.thread = thread
+
+    @property
+    def duration(self):
+        return (self.end if self.end is not None else self.start) - self.start
+
+
+class Tracer:
+    """
+    Trazador de arranque. span() mide una fase anidada (cada hilo tiene su
+    propia pila, asi que tambien sirve dentro de AsyncLoader) y mark()
+    registra un instante, p. ej. el primer pygame.display.flip(). Al final
+    report() da un resumen en texto tipo flame graph y write() exporta
+    todo a JSON.
+    """
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self.origin = time.perf_counter()
+        self.spans = []
+        self.marks = {}
+        self.local = threading.local()
+        self.lock = threading.Lock()
+
+    def now(self):
+        return time.perf_counter() - self.origin
+
+    @contextmanager
+    def span(self, name, **attrs):
+        """
+        Mide el bloque. Devuelve el dict de atributos, para agregar datos
+        que solo se conocen al final (p. ej. el numero de caras).
+        """
+        if not self.enabled:
+            yield attrs
+            return
+        stack = getattr(self.local, 'stack', None)
+        if stack is None:
+            stack = self.local.stack = []
+        span = Span(name, self.now(), attrs, stack[-1] if stack else None,
+                    threading.current_thread().name)
+        with self.lock:
+            index = len(self.spans)
+            self.spans.append(span)
+        stack.append(index)
+        try:
+            yield attrs
+        finally:
+            span.end = self.now()
+            stack.pop()
+
+    def mark(self, name):
+        """
+        Registra el instante 'name' la primera vez que se llama.
+        """
+        if self.enabled and name not in self.marks:
+            self.marks[name] = self.now()
+
+    def children(self):
+        tree = {}
+        for index, span in enumerate(self.spans):
+            tree.setdefault(span.parent, []).append(index)
+        return tree
+
+    def report(self, width=30):
+        """
+        Resumen en texto: un renglon por span, con sangria por nivel y una
+        barra proporcional a su duracion.
+        """
+        tree = self.children()
+        total = max([s.end or s.start for s in self.spans] + list(self.marks.values()) + [1e-9])
+        lines = []
+
+        def walk(index, depth):
+            span = self.spans[index]
+            bar = '#' * max(1, int(round(span.duration / total * width)))
+            extra = ' '.join(f"{k}={v}" for k, v in span.attrs.items())
+            label = '  ' * depth + span.name
+            lines.append(f"{label:<44} {span.duration * 1000:9.1f} ms  {bar:<{width}} {extra}".rstrip())
+            for child in tree.get(index, []):
+                walk(child, depth + 1)
+
+        threads = []
+        for index in tree.get(None, []):
+            thread = self.spans[index].thread
+            if thread not in threads:
+                threads.append(thread)
+        for thread in threads:
+            lines.append(f"[{thread}]")
+            for index in tree.get(None, []):
+                if self.spans[index].thread == thread:
+                    walk(index, 1)
+        for name, t in sorted(self.marks.items(), key=lambda item: item[1]):
+            lines.append(f"{name:<44} {t * 1000:9.1f} ms (desde el inicio)")
+        return '\n'.join(lines)
+
+    def folded(self):
+        """
+        Pilas colapsadas ("a;b;c microsegundos propios"), el formato de
+        entrada de flamegraph.pl y speedscope.
+        """
+        tree = self.children()
+        lines = []
+        for index, span in enumerate(self.spans):
+            names = [span.name]
+            parent = span.parent
+            while parent is not None:
+                names.append(self.spans[parent].name)
+                parent = self.spans[parent].parent
+            names.append(span.thread)
+            own = span.duration - sum(self.spans[c].duration for c in tree.get(index, []))
+            lines.append(f"{';'.join(reversed(names))} {max(0, int(own * 1e6))}")
+        return '\n'.join(lines)
+
+    def to_dict(self):
+        return {
+            'marks_ms': {name: t * 1000 for name, t in self.marks.items()},
+            'spans': [{
+                'name': span.name,
+                'thread': span.thread,
+                'parent': span.parent,
+                'start_ms': span.start * 1000,
+                'duration_ms': span.duration * 1000,
+                'attrs': span.attrs,
+            } for span in self.spans],
+        }
+
+    def write(self, path):
+        with open(path, 'w') as f:
+            json.dump(self.to_dict(), f, indent=1)
+
+
+# Trazador del proceso; se crea al importar este modulo, asi que conviene
+# importarlo antes que pygame para medir tambien las importaciones.
+tracer = Tracer()
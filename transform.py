@@ -0,0 +1,102 @@
+import math
+import ctypes
+
+from frustum import mat_mul
+
+# Matriz 4x4 column-major en float32, lista para glMultMatrixf sin
+# convertir una lista de Python en cada llamada.
+Matrix16 = ctypes.c_float * 16
+
+IDENTITY = (1.0, 0.0, 0.0, 0.0,
+            0.0, 1.0, 0.0, 0.0,
+            0.0, 0.0, 1.0, 0.0,
+            0.0, 0.0, 0.0, 1.0)
+
+
+def yaw_scale_matrix(tx, ty, tz, scale, yaw, offset=0.0):
+    """
+    Traslacion, escala uniforme y giro sobre Y de 'yaw' + 'offset' grados
+    (column-major). Es la matriz de Cuerpo, Gallina y la granja.
+    """
+    sx = sy = sz = scale
+    r = math.radians(yaw)
+    s = math.radians(offset)
+
+    cos_r, sin_r = math.cos(r), math.sin(r)
+    cos_s, sin_s = math.cos(s), math.sin(s)
+
+    m0 = sx * (cos_r * cos_s - sin_r * sin_s)
+    m2 = sx * (-cos_r * sin_s - sin_r * cos_s)
+    m5 = sy
+    m8 = sz * (sin_r * cos_s + cos_r * sin_s)
+    m10 = sz * (-sin_r * sin_s + cos_r * cos_s)
+
+    return [
+        m0,  0.0,  m2,  0.0,
+       0.0,   m5, 0.0,  0.0,
+        m8,  0.0, m10,  0.0,
+        tx,   ty,  tz,  1.0
+    ]
+
+
+class Transform:
+    """
+    Nodo de la jerarquia de transformaciones (cuerpo -> brazo, pata, ala).
+    Guarda la matriz local y la del mundo en buffers float32 reservados
+    una sola vez. update() solo reconstruye la local cuando cambia su
+    clave (posicion, rotacion, escala, angulo de animacion...), y
+    world_matrix() solo multiplica por la del padre cuando alguna de las
+    dos cambio desde la ultima vez.
+    """
+    __slots__ = ('local', 'own', 'world', 'parent', 'key', 'version', 'world_seen', 'rebuilds')
+
+    def __init__(self, parent=None):
+        self.own = Matrix16(*IDENTITY)
+        self.local = self.own
+        self.world = Matrix16(*IDENTITY)
+        self.parent = parent
+        self.key = None
+        self.version = 0
+        self.world_seen = None
+        self.rebuilds = 0
+
+    def update(self, key, build, *args):
+        """
+        Devuelve la matriz local. Si 'key' cambio desde la ultima llamada
+        se reconstruye con build(*args), que devuelve 16 valores.
+        """
+        if key != self.key:
+            self.own[:] = build(*args)
+            self.local = self.own
+            self.key = key
+            self.version += 1
+            self.rebuilds += 1
+        return self.local
+
+    def pose(self, key, baked):
+        """
+        Usa 'baked' (una matriz horneada de solo lectura, ver animation.py)
+        como matriz local, sin copiarla.
+        """
+        if key != self.key:
+            self.local = baked
+            self.key = key
+            self.version += 1
+        return self.local
+
+    def stamp(self):
+        if self.parent is None:
+            return self.version
+        return self.version, self.parent.stamp()
+
+    def world_matrix(self):
+        """
+        Matriz local compuesta con la de todos los padres.
+        """
+        if self.parent is None:
+            return self.local
+        stamp = self.stamp()
+        if stamp != self.world_seen:
+            self.world[:] = mat_mul(self.parent.world_matrix(), self.local)
+            self.world_seen = stamp
+        return self.world